@@ -7,14 +7,17 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 # Import routing BEFORE creating Django application to avoid E402
 from smartpark.routing import websocket_urlpatterns  # noqa: E402
+from smartpark.background import BackgroundTasksMiddleware  # noqa: E402
 
 # Create the default Django ASGI application
 django_application = get_asgi_application()
 
 # Wrap with WebSocket support
-application = ProtocolTypeRouter(
-    {
-        "http": django_application,
-        "websocket": AuthMiddlewareStack(URLRouter(websocket_urlpatterns)),
-    }
+application = BackgroundTasksMiddleware(
+    ProtocolTypeRouter(
+        {
+            "http": django_application,
+            "websocket": AuthMiddlewareStack(URLRouter(websocket_urlpatterns)),
+        }
+    )
 )
@@ -53,6 +53,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Birinchi turadi - qolgan middleware vaqti ham o'lchanadi
+    "smartpark.middleware.request_metrics_middleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -104,6 +106,9 @@ DATABASES = {
         "PASSWORD": env.str("POSTGRES_PASSWORD"),
         "HOST": env.str("POSTGRES_HOST"),
         "PORT": env.str("POSTGRES_PORT"),
+        # 0001 dan boshlab migratsiya qilib bo'lmaydi (admin CustomUser dan oldin),
+        # test bazasi modellardan to'g'ridan-to'g'ri yaratiladi
+        "TEST": {"MIGRATE": False},
     }
 }
 
@@ -152,6 +157,24 @@ STATICFILES_DIRS = [
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Fayl yozish vaqti so'rov metrikalariga qo'shiladi
+STORAGES = {
+    "default": {"BACKEND": "smartpark.storage.TimedFileSystemStorage"},
+    # Kamera rasmlari: tarkib xeshi bo'yicha nom, sana/xesh papkalari, takrorlar bitta fayl
+    "camera": {"BACKEND": "smartpark.storage.ContentAddressedStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+# Kamera rasmlari (manage.py apply_retention): full_days dan eski rasmlar max_dimension
+# gacha kichraytiriladi, archive_days dan eskilari MEDIA_ROOT/archive/<kun>.tar ga
+# joylanadi. /media/archive/ so'rovlari Django'ga (smartpark.views.archived_image) borishi kerak
+IMAGE_RETENTION = {
+    "full_days": env.int("IMAGE_FULL_DAYS", 30),
+    "archive_days": env.int("IMAGE_ARCHIVE_DAYS", 180),
+    "max_dimension": 1280,
+    "quality": 75,
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -163,6 +186,41 @@ DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
 
 HOUR_PRICE = 4000
+# Tarif qoidalari (smartpark/tariffs.py). Standart qiymatlar eski hisobga teng:
+# har boshlangan soat HOUR_PRICE, kamida 1 soat, tungi narx va kunlik chegara yo'q
+TARIFF = {
+    "day_rate": HOUR_PRICE,
+    "night_rate": env.int("TARIFF_NIGHT_RATE", HOUR_PRICE),
+    "night_start": 22,
+    "night_end": 6,
+    "grace_minutes": env.int("TARIFF_GRACE_MINUTES", 0),
+    "min_hours": 1,
+    "daily_cap": env.int("TARIFF_DAILY_CAP", None),
+    # Maxsus taksi kuniga shuncha tashrif uchun to'laydi, keyingilari bepul.
+    # Standart 0 - maxsus taksi hozirgidek to'lamaydi
+    "taxi_paid_visits": env.int("TARIFF_TAXI_PAID_VISITS", 0),
+}
 
 AUTH_USER_MODEL = "smartpark.CustomUser"
 MIN_TIME_BETWEEN_ENTRIES = 2
+# Chiqishda raqam aniq topilmasa, o'xshash raqam shu ishonchdan past bo'lmasa qabul qilinadi
+# (O/0, B/8 kabi almashishlar 0.9 dan yuqori, boshqa belgi xatosi 0.875)
+PLATE_MATCH_MIN_CONFIDENCE = env.float("PLATE_MATCH_MIN_CONFIDENCE", 0.9)
+
+# Shlakbaum serial porti (Linuxda /dev/ttyUSB0, Windowsda COM3 bo'lishi mumkin)
+BARRIER_PORT = env.str("BARRIER_PORT", "/dev/ttyUSB0")
+BARRIER_BAUDRATE = env.int("BARRIER_BAUDRATE", 9600)
+BARRIER_SETTLE_SECONDS = env.float("BARRIER_SETTLE_SECONDS", 2)
+
+# WebSocket qayta ulanishda o'tkazib yuborilgan hodisalar shu Redis oqimidan olinadi
+# (bo'sh qoldirilsa - faqat bitta jarayon uchun xotirada)
+EVENT_LOG_REDIS_URL = env.str("EVENT_LOG_REDIS_URL", "")
+# Ichkaridagi avtomobillar xaritasi (raqam -> kirish ID), bo'sh qoldirilsa - xotirada
+# (standart - EVENT_LOG_REDIS_URL bilan bir xil)
+OPEN_SESSIONS_REDIS_URL = env.str("OPEN_SESSIONS_REDIS_URL", EVENT_LOG_REDIS_URL)
+
+# Shundan uzoq davom etgan so'rov/WebSocket xabari smartpark.slow logiga yoziladi
+SLOW_REQUEST_SECONDS = env.float("SLOW_REQUEST_SECONDS", 0.5)
+SLOW_MESSAGE_SECONDS = env.float("SLOW_MESSAGE_SECONDS", 0.25)
+# /metrics uchun Bearer token (bo'sh bo'lsa - ochiq)
+METRICS_TOKEN = env.str("METRICS_TOKEN", "")
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, VehicleEntry, Cars
+from .models import CustomUser, VehicleEntry, Cars, DailyStatistics, HourlyRollup
 
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
@@ -17,8 +17,8 @@ class CustomUserAdmin(UserAdmin):
 
 @admin.register(VehicleEntry)
 class VehicleEntryAdmin(admin.ModelAdmin):
-    list_display = ('number_plate', 'entry_time', 'exit_time', 'is_paid', 'total_amount')
-    list_filter = ('is_paid', 'entry_time', 'exit_time')
+    list_display = ('number_plate', 'entry_time', 'exit_time', 'is_paid', 'is_disputed', 'total_amount')
+    list_filter = ('is_paid', 'is_disputed', 'entry_time', 'exit_time')
     search_fields = ('number_plate',)
     readonly_fields = ('entry_image', 'exit_image', 'total_amount')
     date_hierarchy = 'entry_time'
@@ -29,3 +29,16 @@ class CarsAdmin(admin.ModelAdmin):
     list_filter = ('is_free', 'is_special_taxi', 'is_blocked')
     search_fields = ('number_plate', 'position')
     readonly_fields = ('license_file',)
+
+@admin.register(DailyStatistics)
+class DailyStatisticsAdmin(admin.ModelAdmin):
+    list_display = ('date', 'total_entries', 'total_exits', 'unpaid_entries')
+    readonly_fields = ('date', 'total_entries', 'total_exits', 'unpaid_entries')
+    date_hierarchy = 'date'
+
+@admin.register(HourlyRollup)
+class HourlyRollupAdmin(admin.ModelAdmin):
+    list_display = ('hour', 'car_class', 'entries', 'exits', 'revenue', 'paid_revenue', 'occupied_seconds')
+    list_filter = ('car_class',)
+    readonly_fields = ('hour', 'car_class', 'entries', 'exits', 'revenue', 'paid_revenue', 'occupied_seconds')
+    date_hierarchy = 'hour'
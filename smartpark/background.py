@@ -0,0 +1,43 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+_task_factories = []
+_running_tasks = set()
+
+
+def register_worker_task(factory):
+    """Register a coroutine function to run for the lifetime of an ASGI worker"""
+    _task_factories.append(factory)
+    return factory
+
+
+async def _supervise(factory):
+    # Worker vazifasi yiqilsa, biroz kutib qayta ishga tushiramiz
+    while True:
+        try:
+            await factory()
+            return
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Background task %s crashed", factory.__qualname__)
+            await asyncio.sleep(5)
+
+
+class BackgroundTasksMiddleware:
+    """ASGI middleware that starts registered worker tasks on the first connection"""
+
+    def __init__(self, app):
+        self.app = app
+        self._started = False
+
+    async def __call__(self, scope, receive, send):
+        if not self._started:
+            self._started = True
+            for factory in _task_factories:
+                task = asyncio.create_task(_supervise(factory))
+                _running_tasks.add(task)
+                task.add_done_callback(_running_tasks.discard)
+        return await self.app(scope, receive, send)
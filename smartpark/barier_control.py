@@ -1,62 +1,169 @@
-import serial
+import logging
+import queue
+import threading
 import time
 
+import serial
+from django.conf import settings
+
+OPEN_COMMAND = b"O"  # Bu sizning qurilmangizga bog‘liq (masalan b'\xA0\x01\x01\xA2')
+CLOSE_COMMAND = b"C"
 
-def control_barrier_time(delay_seconds=10):
+logger = logging.getLogger(__name__)
+
+
+class BarrierController:
     """
-    Shlakboumni ochadi va N soniyadan keyin avtomatik yopadi.
+    Shlakbaum serial portini bitta fon thread'ida doimiy ochiq ushlab turadi.
+
+    Callers only enqueue commands, so open/close return immediately. The
+    worker keeps the port open between commands, closes the barrier when
+    an auto-close deadline passes (a later open pushes the deadline back)
+    and reopens the port after serial errors. Only one process may own a
+    given port, so run the controller in a single worker.
     """
-    try:
-        port = "/dev/ttyUSB0"  # Ehtiyot bo‘ling: o‘zingizga mos portni belgilang
-        baudrate = 9600
 
-        with serial.Serial(port, baudrate, timeout=1) as ser:
-            time.sleep(2)  # Port ochilgandan keyin barqarorlashish
+    def __init__(self, port, baudrate=9600, settle_seconds=2, reconnect_delay=1):
+        self.port = port
+        self.baudrate = baudrate
+        self.settle_seconds = settle_seconds
+        self.reconnect_delay = reconnect_delay
+        self._commands = queue.Queue()
+        self._serial = None
+        self._close_at = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="barrier-controller", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        if self._thread is not None:
+            self._commands.put(("stop", None))
+            self._thread.join(timeout)
+
+    def open_barrier(self, close_after=None):
+        """Queue an open; with close_after the barrier closes after that many seconds"""
+        self.start()._commands.put(("open", close_after))
+
+    def close_barrier(self):
+        self.start()._commands.put(("close", None))
+
+    def _run(self):
+        # Port oldindan ochiladi - birinchi buyruq 2 soniya kutmaydi
+        self._connect_quietly()
+        while True:
+            try:
+                if not self._step():
+                    return
+            except Exception:
+                # Kutilmagan xato thread'ni to'xtatmasin - keyingi buyruqlar ham bajarilsin
+                logger.exception("Barrier controller command failed")
+                self._disconnect()
 
-            # Ochish buyrug‘i
-            ser.write(
-                b"O"
-            )  # Bu sizning qurilmangizga bog‘liq (masalan b'\xA0\x01\x01\xA2')
-            print("✅ Barrier OPEN command sent")
+    def _step(self):
+        """Handle one queued command or auto-close; False once stopped"""
+        timeout = None
+        if self._close_at is not None:
+            timeout = max(0, self._close_at - time.monotonic())
+        try:
+            action, close_after = self._commands.get(timeout=timeout)
+        except queue.Empty:
+            action, close_after = "close", None
 
-            # Kutish
-            time.sleep(delay_seconds)
+        if action == "stop":
+            self._disconnect()
+            return False
+        if action == "open":
+            if self._write(OPEN_COMMAND):
+                logger.info("Barrier OPEN command sent")
+            if close_after:
+                self._close_at = time.monotonic() + close_after
+        elif action == "close":
+            if self._write(CLOSE_COMMAND):
+                logger.info("Barrier CLOSE command sent")
+                self._close_at = None
+            elif self._close_at is not None:
+                # Avtomatik yopish bajarilmadi - keyinroq qayta urinamiz
+                self._close_at = time.monotonic() + self.reconnect_delay
+        return True
 
-            # Yopish buyrug‘i
-            ser.write(b"C")
-            print("✅ Barrier CLOSE command sent")
+    def _write(self, command):
+        for attempt in range(2):
+            try:
+                if self._serial is None:
+                    self._connect()
+                self._serial.write(command)
+                self._serial.flush()
+                return True
+            except serial.SerialException as e:
+                logger.warning("Serial port error: %s", e)
+                self._disconnect()
+                if attempt == 0:
+                    time.sleep(self.reconnect_delay)
+        return False
 
-    except serial.SerialException as e:
-        print(f"❌ Serial port error: {e}")
-    except Exception as e:
-        print(f"❌ Unexpected error: {e}")
+    def _connect(self):
+        ser = serial.serial_for_url(self.port, self.baudrate, timeout=1)
+        if self.settle_seconds:
+            time.sleep(self.settle_seconds)  # Port ochilgandan keyin barqarorlashish
+        self._serial = ser
+
+    def _connect_quietly(self):
+        try:
+            self._connect()
+        except serial.SerialException as e:
+            logger.warning("Serial port error: %s", e)
+        except Exception:
+            logger.exception("Barrier port could not be opened")
+
+    def _disconnect(self):
+        if self._serial is not None:
+            try:
+                self._serial.close()
+            except (serial.SerialException, OSError):
+                pass
+            self._serial = None
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_barrier_controller():
+    """Process-wide controller configured from BARRIER_* settings"""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = BarrierController(
+                settings.BARRIER_PORT,
+                settings.BARRIER_BAUDRATE,
+                settle_seconds=settings.BARRIER_SETTLE_SECONDS,
+            )
+        return _controller
+
+
+def control_barrier_time(delay_seconds=10):
+    """
+    Shlakboumni ochadi va N soniyadan keyin avtomatik yopadi.
+    """
+    get_barrier_controller().open_barrier(close_after=delay_seconds)
 
 
 def control_barrier_command(action="open"):
     """
     Shlakbaumni boshqarish: 'open' yoki 'close'
-    Qurilmaga serial orqali signal yuboradi.
+    Buyruq navbatga qo'yiladi va darhol qaytadi.
     """
-    try:
-        # USB portga ulanganda chiqadigan nom (Linuxda /dev/ttyUSB0, Windowsda COM3 bo'lishi mumkin)
-        port = "/dev/ttyUSB0"  # EHTIYOT BO‘LING: sizda boshqa bo‘lishi mumkin, `ls /dev/ttyUSB*` bilan tekshiring
-        baudrate = 9600  # Modulga mos ravishda sozlang (odatda 9600)
-
-        # Serial port ochiladi
-        with serial.Serial(port, baudrate, timeout=1) as ser:
-            time.sleep(2)  # Port ochilgandan keyin kutish
-
-            if action == "open":
-                command = b"O"  # O = Open (sizning modulga bog‘liq, ba'zida b'\xA0\x01\x01\xA2' bo'lishi mumkin)
-            elif action == "close":
-                command = b"C"  # C = Close
-            else:
-                raise ValueError("Action must be 'open' or 'close'")
-
-            ser.write(command)
-            print(f"✅ Barrier command sent: {action}")
-
-    except serial.SerialException as e:
-        print(f"❌ Serial port error: {e}")
-    except Exception as e:
-        print(f"❌ Unexpected error: {e}")
+    if action == "open":
+        get_barrier_controller().open_barrier()
+    elif action == "close":
+        get_barrier_controller().close_barrier()
+    else:
+        logger.error("Unexpected barrier action %r: must be 'open' or 'close'", action)
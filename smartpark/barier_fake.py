@@ -0,0 +1,61 @@
+import os
+import select
+import threading
+import time
+import tty
+
+
+class FakeBarrierDevice:
+    """
+    Pseudo-terminal that behaves like the barrier relay board.
+
+    Point BarrierController at .port; every byte written to it is recorded
+    with a monotonic timestamp and toggles .is_open, so tests can check
+    what reached the "hardware" and when without a USB adapter.
+    """
+
+    def __init__(self):
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self.received = []
+        self.is_open = False
+        self._stopped = threading.Event()
+        self._changed = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run, name="fake-barrier", daemon=True
+        )
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join(1)
+        os.close(self._master)
+        os.close(self._slave)
+
+    def wait_for(self, count, timeout=5):
+        """Block until at least `count` commands were received"""
+        with self._changed:
+            return self._changed.wait_for(lambda: len(self.received) >= count, timeout)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            ready, _, _ = select.select([self._master], [], [], 0.1)
+            if not ready:
+                continue
+            try:
+                data = os.read(self._master, 64)
+            except OSError:
+                return
+            with self._changed:
+                for byte in data:
+                    command = bytes([byte])
+                    if command == b"O":
+                        self.is_open = True
+                    elif command == b"C":
+                        self.is_open = False
+                    self.received.append((time.monotonic(), command))
+                self._changed.notify_all()
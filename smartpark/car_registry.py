@@ -0,0 +1,179 @@
+"""
+Bulk import and export of the Cars registry.
+
+Rows are read from CSV or XLSX with the export's columns (number_plate,
+is_free, is_special_taxi, is_blocked, position) or with the dashboard's
+car_type column instead of the flags. Plates are normalized like
+open_sessions.plate_key and validated; the valid rows are upserted on the
+unique number_plate with bulk_create(update_conflicts=True) in chunks.
+bulk_create sends no post_save, so instead of one car_updated broadcast
+per row the plate cache is invalidated once and a single "imported"
+summary goes to the cars topic after commit.
+"""
+
+import csv
+import io
+import re
+import zipfile
+
+from django.db import transaction
+
+from .models import Cars
+from .open_sessions import plate_key
+from .plate_cache import invalidate_plate_cache
+from .publisher import publish
+from .topics import CARS
+
+try:
+    import openpyxl
+    from openpyxl.utils.exceptions import InvalidFileException
+except ImportError:  # ixtiyoriy, bo'lmasa faqat CSV
+    openpyxl = None
+
+COLUMNS = ("number_plate", "is_free", "is_special_taxi", "is_blocked", "position")
+CAR_TYPES = ("free", "special_taxi", "blocked", "normal")
+UPDATE_FIELDS = ["is_free", "is_special_taxi", "is_blocked", "position"]
+CHUNK_SIZE = 1000
+
+# Kamida bitta raqam va bitta harf, 5-15 belgi (01A123BC, 01123ABC, ...)
+PLATE_RE = re.compile(r"^(?=.*\d)(?=.*[A-Z])[0-9A-Z]{5,15}$")
+
+TRUE_VALUES = {"1", "true", "yes", "ha", "x", "+"}
+FALSE_VALUES = {"", "0", "false", "no", "yo'q", "yoq", "-"}
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def _flag(value, column):
+    text = "" if value is None else str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"{column}: '{value}' is not a yes/no value")
+
+
+def read_rows(file, filename):
+    """Yield one dict per data row of a .csv or .xlsx upload"""
+    if filename.lower().endswith(".xlsx"):
+        if openpyxl is None:
+            raise ImportFormatError("XLSX import needs openpyxl; upload a CSV")
+        try:
+            workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        except (zipfile.BadZipFile, InvalidFileException, KeyError) as e:
+            # Kengaytmasi .xlsx, lekin ichi boshqa fayl yoki buzilgan arxiv
+            raise ImportFormatError(f"not a valid XLSX file: {e}") from None
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(cell or "").strip().lower() for cell in next(rows, ())]
+            for row in rows:
+                yield dict(zip(header, row))
+        finally:
+            workbook.close()
+        return
+    # Excel'dan saqlangan CSV boshida BOM bo'ladi
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or ()]
+    yield from reader
+
+
+def parse_cars(rows):
+    """
+    Validate rows into unsaved Cars.
+
+    Returns (cars, errors); errors are {"row": n, "error": message} with n
+    the spreadsheet line. A plate repeated in the file keeps its last row.
+    """
+    cars = {}
+    errors = []
+    for line, row in enumerate(rows, start=2):
+        try:
+            number_plate = plate_key(str(row.get("number_plate") or ""))
+            if not PLATE_RE.match(number_plate):
+                raise ValueError(f"invalid number plate '{row.get('number_plate')}'")
+            car_type = str(row.get("car_type") or "").strip().lower()
+            if car_type:
+                if car_type not in CAR_TYPES:
+                    raise ValueError(f"car_type must be one of {', '.join(CAR_TYPES)}")
+                is_free = car_type == "free"
+                is_special_taxi = car_type == "special_taxi"
+                is_blocked = car_type == "blocked"
+            else:
+                is_free = _flag(row.get("is_free"), "is_free")
+                is_special_taxi = _flag(row.get("is_special_taxi"), "is_special_taxi")
+                is_blocked = _flag(row.get("is_blocked"), "is_blocked")
+            position = str(row.get("position") or "").strip()
+            # create_car bilan bir xil qoida
+            if is_free and not position:
+                raise ValueError("position is required for free cars")
+            if len(position) > Cars._meta.get_field("position").max_length:
+                raise ValueError("position is too long")
+        except ValueError as e:
+            errors.append({"row": line, "error": str(e)})
+            continue
+        cars[number_plate] = Cars(
+            number_plate=number_plate,
+            is_free=is_free,
+            is_special_taxi=is_special_taxi,
+            is_blocked=is_blocked,
+            position=position if is_free else None,
+        )
+    return list(cars.values()), errors
+
+
+def import_cars(cars, chunk_size=CHUNK_SIZE):
+    """Upsert the cars and broadcast one summary; returns {"created", "updated"}"""
+    created = updated = 0
+    with transaction.atomic():
+        for start in range(0, len(cars), chunk_size):
+            chunk = cars[start : start + chunk_size]
+            existing = set(
+                Cars.objects.filter(
+                    number_plate__in=[car.number_plate for car in chunk]
+                ).values_list("number_plate", flat=True)
+            )
+            Cars.objects.bulk_create(
+                chunk,
+                update_conflicts=True,
+                unique_fields=["number_plate"],
+                update_fields=UPDATE_FIELDS,
+            )
+            updated += len(existing)
+            created += len(chunk) - len(existing)
+        summary = {"created": created, "updated": updated}
+        if cars:
+            invalidate_plate_cache()
+            publish(
+                CARS,
+                {
+                    "type": "broadcast_car_update",
+                    "action": "imported",
+                    "summary": summary,
+                },
+            )
+    return summary
+
+
+def export_rows(queryset=None):
+    """Header and one row per car, in the import's column order"""
+    queryset = Cars.objects.order_by("number_plate") if queryset is None else queryset
+    yield list(COLUMNS)
+    for row in queryset.values_list(*COLUMNS).iterator():
+        yield [int(value) if isinstance(value, bool) else value or "" for value in row]
+
+
+def export_csv(output, queryset=None):
+    csv.writer(output).writerows(export_rows(queryset))
+
+
+def export_xlsx(output, queryset=None):
+    if openpyxl is None:
+        raise ImportFormatError("XLSX export needs openpyxl")
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("cars")
+    for row in export_rows(queryset):
+        sheet.append(row)
+    workbook.save(output)
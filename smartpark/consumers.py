@@ -1,33 +1,124 @@
 import json
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.utils import timezone
-from datetime import datetime
+from .entries import (
+    day_entries,
+    entries_page,
+    latest_unpaid_entry,
+    parse_fields,
+    parse_limit,
+    unpaid_entries,
+)
+from .event_log import event_id_key, event_log, notification_frame, with_event_id
+from .metrics import measure, record_message
 from .models import VehicleEntry
+from .outbox import Outbox
+from .serializers import RECEIPT_ROW, compile_serializer, dumps_text
+from .snapshots import snapshot_cache
+from .statistics import get_daily_snapshot, get_daily_statistics, parse_day
+from .topics import default_topics, parse_topics
+
+# Metrikalarda yorliq bo'ladigan, mijoz yuborishi mumkin bo'lgan xabarlar
+MESSAGE_TYPES = (
+    "get_statistics",
+    "get_vehicle_entries",
+    "mark_as_paid",
+    "delete_entry",
+    "get_unpaid_entries",
+    "get_latest_unpaid_entry",
+    "get_receipt",
+    "subscribe",
+    "unsubscribe",
+)
 
 
 class HomeConsumer(AsyncWebsocketConsumer):
     async def connect(self):
-        # Join the home_updates group
-        await self.channel_layer.group_add("home_updates", self.channel_name)
+        # Sekin mijoz kanal qatlamini emas, faqat o'z navbatini to'ldiradi
+        self.outbox = Outbox(self.send)
+        self.groups = set()
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        try:
+            # ?topics=entries.2025-01-31,unpaid - sahifa faqat keraklisini oladi
+            topics = parse_topics(query.get("topics", [""])[0]) or default_topics()
+        except ValueError:
+            await self.close(code=4400)
+            return
+        await self.subscribe(topics)
         await self.accept()
-        await self.send(
-            text_data=json.dumps(
-                {
-                    "type": "connection_established",
-                    "message": "Connected to Smart AutoPark WebSocket",
-                }
-            )
+        self.outbox.start()
+
+        # Qayta ulangan mijozga faqat o'tkazib yuborgan hodisalari yuboriladi
+        last_event_id = query.get("last_event_id", [None])[0]
+        missed = await event_log.since(last_event_id) if last_event_id else None
+        self.replayed_until = None
+        self.queue(
+            {
+                "type": "connection_established",
+                "message": "Connected to Smart AutoPark WebSocket",
+                "resumed": missed is not None,
+                "replayed": len(missed or []),
+            }
         )
+        if missed is not None:
+            for event_id, group, text in missed:
+                if group in self.groups:
+                    self.outbox.put(with_event_id(event_id, text))
+            self.replayed_until = event_id_key(
+                missed[-1][0] if missed else last_event_id
+            )
 
     async def disconnect(self, close_code):
-        # Leave the home_updates group
-        await self.channel_layer.group_discard("home_updates", self.channel_name)
+        await self.unsubscribe(list(self.groups))
+        await self.outbox.stop()
+
+    async def subscribe(self, topics):
+        for group in topics:
+            if group not in self.groups:
+                await self.channel_layer.group_add(group, self.channel_name)
+                self.groups.add(group)
+
+    async def unsubscribe(self, topics):
+        for group in topics:
+            if group in self.groups:
+                await self.channel_layer.group_discard(group, self.channel_name)
+                self.groups.discard(group)
+
+    async def handle_subscription(self, message_type, topics):
+        try:
+            topics = parse_topics(topics)
+        except ValueError as e:
+            self.queue({"type": "error", "message": str(e)})
+            return
+        if message_type == "subscribe":
+            await self.subscribe(topics)
+        else:
+            await self.unsubscribe(topics)
+        self.queue({"type": "subscriptions", "topics": sorted(self.groups)})
+
+    def already_replayed(self, event):
+        """Group events that raced the replay on connect are sent only once"""
+        if self.replayed_until is None or "event_id" not in event:
+            return False
+        return event_id_key(event["event_id"]) <= self.replayed_until
+
+    def queue(self, data, key=None):
+        """Encode a frame and hand it to the connection's outbox"""
+        self.outbox.put(dumps_text(data), key)
 
     async def receive(self, text_data):
         data = json.loads(text_data)
         message_type = data.get("type")
+        if message_type not in MESSAGE_TYPES:
+            return
 
+        with measure() as sample:
+            await self.handle_message(message_type, data)
+        record_message(message_type, sample)
+
+    async def handle_message(self, message_type, data):
         if message_type == "get_statistics":
             await self.send_statistics(
                 data.get("date", timezone.now().date().isoformat())
@@ -37,6 +128,9 @@ class HomeConsumer(AsyncWebsocketConsumer):
                 data.get("date", timezone.now().date().isoformat()),
                 data.get("number_plate", ""),
                 data.get("status", "all"),
+                data.get("cursor"),
+                data.get("limit"),
+                data.get("fields"),
             )
         elif message_type == "mark_as_paid":
             await self.handle_mark_as_paid(data.get("entry_id"))
@@ -52,168 +146,87 @@ class HomeConsumer(AsyncWebsocketConsumer):
             )
         elif message_type == "get_receipt":
             await self.handle_get_receipt(data.get("entry_id"))
+        elif message_type in ("subscribe", "unsubscribe"):
+            await self.handle_subscription(message_type, data.get("topics"))
 
     # Handle broadcast messages from signals
     async def broadcast_update(self, event):
-        """Handle broadcast updates from VehicleEntry signals"""
-        await self.send(
-            text_data=json.dumps(
-                {
-                    "type": "model_update",
-                    "statistics": event["statistics"],
-                    "vehicle_entries": event["vehicle_entries"],
-                    "action": event["action"],
-                    "entry_id": event.get("entry_id"),
-                    "number_plate": event.get("number_plate"),
-                }
-            )
-        )
-        
-        # If this is a payment completion, also send latest unpaid entry update
-        if event.get("action") == "payment_completed":
-            today = timezone.now().date().isoformat()
-            latest_unpaid = await self.get_latest_unpaid_entry(today)
-            await self.send(
-                text_data=json.dumps(
-                    {
-                        "type": "latest_unpaid_entry_update",
-                        "data": latest_unpaid,
-                    }
-                )
-            )
+        """Handle delta broadcasts from VehicleEntry signals"""
+        # Shu kun uchun keshlangan snapshotlar endi eskirgan
+        snapshot_cache.advance(event["date"], event["seq"])
+        if self.already_replayed(event):
+            return
+        # model_update signals.py da bir marta kodlangan
+        self.outbox.put(event["text"])
 
     async def broadcast_notification(self, event):
         """Handle broadcast notifications"""
-        await self.send(
-            text_data=json.dumps(
-                {
-                    "type": "notification",
-                    "title": event["title"],
-                    "message": event["message"],
-                    "notification_type": event["notification_type"],
-                    "timestamp": event["timestamp"],
-                }
-            )
-        )
+        if self.already_replayed(event):
+            return
+        self.outbox.put(event.get("text") or notification_frame(event))
+
+    async def broadcast_statistics(self, event):
+        """Handle counter updates on a stats.<date> topic"""
+        snapshot_cache.advance(event["date"], event["seq"])
+        self.outbox.put(event["text"], key=f"statistics_update:{event['date']}")
+
+    async def broadcast_car_update(self, event):
+        """Handle broadcast updates from Cars signals"""
+        message = {
+            "type": "car_update",
+            "car": event.get("car"),
+            "action": event["action"],
+        }
+        if "summary" in event:
+            # Ommaviy import: har bir avtomobil o'rniga bitta xulosa
+            message["summary"] = event["summary"]
+        self.queue(message)
 
     async def latest_unpaid_entry_update(self, event):
         """Handle latest unpaid entry updates"""
-        await self.send(
-            text_data=json.dumps(
-                {
-                    "type": "latest_unpaid_entry_update",
-                    "data": event["data"],
-                }
-            )
-        )
-
-    @database_sync_to_async
-    def get_statistics(self, date_str):
-        try:
-            # Convert date string to timezone-aware datetime for proper filtering
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-            # Create timezone-aware datetime range for the entire day
-            start_datetime = timezone.make_aware(
-                datetime.combine(date_obj, datetime.min.time())
-            )
-            end_datetime = timezone.make_aware(
-                datetime.combine(date_obj, datetime.max.time())
-            )
-        except ValueError:
-            # Fallback to today if date parsing fails
-            today = timezone.now().date()
-            start_datetime = timezone.make_aware(
-                datetime.combine(today, datetime.min.time())
-            )
-            end_datetime = timezone.make_aware(
-                datetime.combine(today, datetime.max.time())
-            )
+        snapshot_cache.advance(event["date"], event["seq"])
+        self.outbox.put(event["text"], key="latest_unpaid_entry_update")
 
-        # Get today's entries using timezone-aware datetime range
-        today_entries = VehicleEntry.objects.filter(
-            entry_time__gte=start_datetime, entry_time__lte=end_datetime
+    async def get_statistics(self, date_str):
+        day = parse_day(date_str)
+        return await snapshot_cache.get(
+            ("statistics", day), day.isoformat(), lambda: get_daily_snapshot(day)
         )
-        total_entries = today_entries.count()
-        total_exits = today_entries.filter(exit_time__isnull=False).count()
-        total_inside = total_entries - total_exits
-
-        # Get unpaid entries
-        unpaid_entries = today_entries.filter(
-            is_paid=False, exit_time__isnull=False
-        ).count()
-
-        return {
-            "total_entries": total_entries,
-            "total_exits": total_exits,
-            "total_inside": total_inside,
-            "unpaid_entries": unpaid_entries,
-        }
 
-    @database_sync_to_async
-    def get_vehicle_entries(
-        self, date_str, number_plate_filter="", status_filter="all"
+    async def get_vehicle_entries(
+        self,
+        date_str,
+        number_plate_filter="",
+        status_filter="all",
+        cursor=None,
+        limit=None,
+        fields=None,
     ):
-        try:
-            # Convert date string to timezone-aware datetime for proper filtering
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-            # Create timezone-aware datetime range for the entire day
-            start_datetime = timezone.make_aware(
-                datetime.combine(date_obj, datetime.min.time())
-            )
-            end_datetime = timezone.make_aware(
-                datetime.combine(date_obj, datetime.max.time())
-            )
-        except ValueError:
-            # Fallback to today if date parsing fails
-            today = timezone.now().date()
-            start_datetime = timezone.make_aware(
-                datetime.combine(today, datetime.min.time())
-            )
-            end_datetime = timezone.make_aware(
-                datetime.combine(today, datetime.max.time())
-            )
-
-        # Use timezone-aware datetime range instead of naive date
-        entries = VehicleEntry.objects.filter(
-            entry_time__gte=start_datetime, entry_time__lte=end_datetime
-        ).order_by("-entry_time")
-
-        if number_plate_filter:
-            entries = entries.filter(number_plate__icontains=number_plate_filter)
-
-        # Status filter
-        if status_filter == "paid":
-            entries = entries.filter(is_paid=True)
-        elif status_filter == "unpaid":
-            entries = entries.filter(is_paid=False, exit_time__isnull=False)
-        elif status_filter == "inside":
-            entries = entries.filter(exit_time__isnull=True)
-        elif status_filter == "exited":
-            entries = entries.filter(exit_time__isnull=False)
-
-        entries_data = []
-        for entry in entries:
-            # Ensure timezone-aware formatting
-            entry_time = entry.entry_time
-            exit_time = entry.exit_time
-
-            entries_data.append(
-                {
-                    "id": entry.id,
-                    "number_plate": entry.number_plate,
-                    "entry_time": entry_time.strftime("%H:%M"),
-                    "exit_time": exit_time.strftime("%H:%M") if exit_time else None,
-                    "total_amount": entry.total_amount or 0,
-                    "is_paid": entry.is_paid,
-                    "entry_image": entry.entry_image.url if entry.entry_image else None,
-                    "exit_image": entry.exit_image.url if entry.exit_image else None,
-                    "status": "inside"
-                    if not entry.exit_time
-                    else ("paid" if entry.is_paid else "unpaid"),
-                }
-            )
-
-        return entries_data
+        day = parse_day(date_str)
+        fields = tuple(parse_fields(fields))
+        limit = parse_limit(limit)
+
+        def compute():
+            # Versiya yozuvlardan oldin o'qiladi: snapshot hech qachon undan eski emas
+            _, seq = get_daily_snapshot(day)
+            entries_data, next_cursor = entries_page(
+                day_entries(day, number_plate_filter, status_filter),
+                fields,
+                cursor=cursor,
+                limit=limit,
+            )
+            return entries_data, next_cursor, day.isoformat(), seq
+
+        key = (
+            "entries",
+            day,
+            number_plate_filter,
+            status_filter,
+            fields,
+            cursor,
+            limit,
+        )
+        return await snapshot_cache.get(key, day.isoformat(), compute)
 
     @database_sync_to_async
     def mark_as_paid(self, entry_id):
@@ -222,17 +235,15 @@ class HomeConsumer(AsyncWebsocketConsumer):
             entry.is_paid = True
             entry.save()
 
-            # Get updated statistics and vehicle entries for real-time update
+            # Ro'yxatning o'zi signal orqali delta sifatida barcha mijozlarga boradi
             today = timezone.now().date().isoformat()
             stats = self.get_statistics_sync(today)
-            vehicle_entries = self.get_vehicle_entries_sync(today, "", "all")
             latest_unpaid = self.get_latest_unpaid_entry_sync(today)
 
             return {
                 "success": True,
                 "entry_id": entry_id,
                 "statistics": stats,
-                "vehicle_entries": vehicle_entries,
                 "latest_unpaid_entry": latest_unpaid,
             }
         except VehicleEntry.DoesNotExist:
@@ -240,150 +251,11 @@ class HomeConsumer(AsyncWebsocketConsumer):
 
     def get_statistics_sync(self, date_str):
         """Synchronous version of get_statistics for use in mark_as_paid"""
-        try:
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-            start_datetime = timezone.make_aware(
-                datetime.combine(date_obj, datetime.min.time())
-            )
-            end_datetime = timezone.make_aware(
-                datetime.combine(date_obj, datetime.max.time())
-            )
-        except ValueError:
-            today = timezone.now().date()
-            start_datetime = timezone.make_aware(
-                datetime.combine(today, datetime.min.time())
-            )
-            end_datetime = timezone.make_aware(
-                datetime.combine(today, datetime.max.time())
-            )
-
-        today_entries = VehicleEntry.objects.filter(
-            entry_time__gte=start_datetime, entry_time__lte=end_datetime
-        )
-        total_entries = today_entries.count()
-        total_exits = today_entries.filter(exit_time__isnull=False).count()
-        total_inside = total_entries - total_exits
-        unpaid_entries = today_entries.filter(
-            is_paid=False, exit_time__isnull=False
-        ).count()
-
-        return {
-            "total_entries": total_entries,
-            "total_exits": total_exits,
-            "total_inside": total_inside,
-            "unpaid_entries": unpaid_entries,
-        }
-
-    def get_vehicle_entries_sync(
-        self, date_str, number_plate_filter="", status_filter="all"
-    ):
-        """Synchronous version of get_vehicle_entries for use in mark_as_paid"""
-        try:
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-            start_datetime = timezone.make_aware(
-                datetime.combine(date_obj, datetime.min.time())
-            )
-            end_datetime = timezone.make_aware(
-                datetime.combine(date_obj, datetime.max.time())
-            )
-        except ValueError:
-            today = timezone.now().date()
-            start_datetime = timezone.make_aware(
-                datetime.combine(today, datetime.min.time())
-            )
-            end_datetime = timezone.make_aware(
-                datetime.combine(today, datetime.max.time())
-            )
-
-        entries = VehicleEntry.objects.filter(
-            entry_time__gte=start_datetime, entry_time__lte=end_datetime
-        ).order_by("-entry_time")
-
-        if number_plate_filter:
-            entries = entries.filter(number_plate__icontains=number_plate_filter)
-
-        if status_filter == "paid":
-            entries = entries.filter(is_paid=True)
-        elif status_filter == "unpaid":
-            entries = entries.filter(is_paid=False, exit_time__isnull=False)
-        elif status_filter == "inside":
-            entries = entries.filter(exit_time__isnull=True)
-        elif status_filter == "exited":
-            entries = entries.filter(exit_time__isnull=False)
-
-        entries_data = []
-        for entry in entries:
-            entry_time = entry.entry_time
-            exit_time = entry.exit_time
-
-            entries_data.append(
-                {
-                    "id": entry.id,
-                    "number_plate": entry.number_plate,
-                    "entry_time": entry_time.strftime("%H:%M"),
-                    "exit_time": exit_time.strftime("%H:%M") if exit_time else None,
-                    "total_amount": entry.total_amount or 0,
-                    "is_paid": entry.is_paid,
-                    "entry_image": entry.entry_image.url if entry.entry_image else None,
-                    "exit_image": entry.exit_image.url if entry.exit_image else None,
-                    "status": "inside"
-                    if not entry.exit_time
-                    else ("paid" if entry.is_paid else "unpaid"),
-                }
-            )
-
-        return entries_data
+        return get_daily_statistics(parse_day(date_str))
 
     def get_latest_unpaid_entry_sync(self, date_str):
         """Synchronous version of get_latest_unpaid_entry for use in mark_as_paid"""
-        try:
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-            start_datetime = timezone.make_aware(
-                datetime.combine(date_obj, datetime.min.time())
-            )
-            end_datetime = timezone.make_aware(
-                datetime.combine(date_obj, datetime.max.time())
-            )
-        except ValueError:
-            today = timezone.now().date()
-            start_datetime = timezone.make_aware(
-                datetime.combine(today, datetime.min.time())
-            )
-            end_datetime = timezone.make_aware(
-                datetime.combine(today, datetime.max.time())
-            )
-
-        latest_entry = (
-            VehicleEntry.objects.filter(
-                entry_time__gte=start_datetime,
-                entry_time__lte=end_datetime,
-                is_paid=False,
-                exit_time__isnull=False,
-            )
-            .order_by("-exit_time")
-            .first()
-        )
-
-        if latest_entry:
-            entry_time = latest_entry.entry_time
-            exit_time = latest_entry.exit_time
-
-            return {
-                "id": latest_entry.id,
-                "number_plate": latest_entry.number_plate,
-                "entry_time": entry_time.strftime("%H:%M"),
-                "exit_time": exit_time.strftime("%H:%M"),
-                "total_amount": latest_entry.total_amount or 0,
-                "duration_hours": (exit_time - entry_time).total_seconds() / 3600,
-                "entry_image": latest_entry.entry_image.url
-                if latest_entry.entry_image
-                else None,
-                "exit_image": latest_entry.exit_image.url
-                if latest_entry.exit_image
-                else None,
-            }
-        else:
-            return None
+        return latest_unpaid_entry(parse_day(date_str))
 
     @database_sync_to_async
     def delete_entry(self, entry_id):
@@ -394,173 +266,92 @@ class HomeConsumer(AsyncWebsocketConsumer):
         except VehicleEntry.DoesNotExist:
             return {"success": False, "error": "Entry not found"}
 
-    @database_sync_to_async
-    def get_latest_unpaid_entry(self, date_str):
-        try:
-            # Convert date string to timezone-aware datetime for proper filtering
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-            # Create timezone-aware datetime range for the entire day
-            start_datetime = timezone.make_aware(
-                datetime.combine(date_obj, datetime.min.time())
-            )
-            end_datetime = timezone.make_aware(
-                datetime.combine(date_obj, datetime.max.time())
-            )
-        except ValueError:
-            # Fallback to today if date parsing fails
-            today = timezone.now().date()
-            start_datetime = timezone.make_aware(
-                datetime.combine(today, datetime.min.time())
-            )
-            end_datetime = timezone.make_aware(
-                datetime.combine(today, datetime.max.time())
-            )
-
-        # Get the latest unpaid entry that has exited using timezone-aware datetime range
-        latest_entry = (
-            VehicleEntry.objects.filter(
-                entry_time__gte=start_datetime,
-                entry_time__lte=end_datetime,
-                is_paid=False,
-                exit_time__isnull=False,
-            )
-            .order_by("-exit_time")
-            .first()
+    async def get_latest_unpaid_entry(self, date_str):
+        day = parse_day(date_str)
+        return await snapshot_cache.get(
+            ("latest_unpaid", day), day.isoformat(), lambda: latest_unpaid_entry(day)
         )
 
-        if latest_entry:
-            # Ensure timezone-aware formatting
-            entry_time = latest_entry.entry_time
-            exit_time = latest_entry.exit_time
-
-            return {
-                "id": latest_entry.id,
-                "number_plate": latest_entry.number_plate,
-                "entry_time": entry_time.strftime("%H:%M"),
-                "exit_time": exit_time.strftime("%H:%M"),
-                "total_amount": latest_entry.total_amount or 0,
-                "duration_hours": (exit_time - entry_time).total_seconds() / 3600,
-                "entry_image": latest_entry.entry_image.url
-                if latest_entry.entry_image
-                else None,
-                "exit_image": latest_entry.exit_image.url
-                if latest_entry.exit_image
-                else None,
-            }
-        else:
-            return None
-
-    @database_sync_to_async
-    def get_unpaid_entries(self, date_str):
-        try:
-            # Convert date string to timezone-aware datetime for proper filtering
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-            # Create timezone-aware datetime range for the entire day
-            start_datetime = timezone.make_aware(
-                datetime.combine(date_obj, datetime.min.time())
-            )
-            end_datetime = timezone.make_aware(
-                datetime.combine(date_obj, datetime.max.time())
-            )
-        except ValueError:
-            # Fallback to today if date parsing fails
-            today = timezone.now().date()
-            start_datetime = timezone.make_aware(
-                datetime.combine(today, datetime.min.time())
-            )
-            end_datetime = timezone.make_aware(
-                datetime.combine(today, datetime.max.time())
-            )
-
-        # Get unpaid entries that have exited using timezone-aware datetime range
-        unpaid_entries = VehicleEntry.objects.filter(
-            entry_time__gte=start_datetime,
-            entry_time__lte=end_datetime,
-            is_paid=False,
-            exit_time__isnull=False,
-        ).order_by("-exit_time")
-
-        entries_data = []
-        for entry in unpaid_entries:
-            # Ensure timezone-aware formatting
-            entry_time = entry.entry_time
-            exit_time = entry.exit_time
-
-            entries_data.append(
-                {
-                    "id": entry.id,
-                    "number_plate": entry.number_plate,
-                    "entry_time": entry_time.strftime("%H:%M"),
-                    "exit_time": exit_time.strftime("%H:%M"),
-                    "total_amount": entry.total_amount or 0,
-                    "duration_hours": (exit_time - entry_time).total_seconds() / 3600,
-                }
-            )
-
-        return entries_data
+    async def get_unpaid_entries(self, date_str):
+        day = parse_day(date_str)
+        return await snapshot_cache.get(
+            ("unpaid", day), day.isoformat(), lambda: unpaid_entries(day)
+        )
 
     @database_sync_to_async
     def get_receipt(self, entry_id):
-        try:
-            entry = VehicleEntry.objects.get(id=entry_id)
-
-            if not entry.is_paid:
-                return {"success": False, "error": "Entry is not paid"}
-
-            # Ensure timezone-aware formatting
-            entry_time = entry.entry_time
-            exit_time = entry.exit_time
-
-            receipt_data = {
-                "id": entry.id,
-                "number_plate": entry.number_plate,
-                "entry_time": entry_time.strftime("%H:%M"),
-                "exit_time": exit_time.strftime("%H:%M") if exit_time else None,
-                "total_amount": entry.total_amount or 0,
-                "is_paid": entry.is_paid,
-                "duration_hours": (exit_time - entry_time).total_seconds() / 3600
-                if exit_time
-                else 0,
-            }
-
-            return {"success": True, "receipt": receipt_data}
-        except VehicleEntry.DoesNotExist:
+        receipt_data = compile_serializer(RECEIPT_ROW).first(
+            VehicleEntry.objects.filter(id=entry_id)
+        )
+        if receipt_data is None:
             return {"success": False, "error": "Entry not found"}
+        if not receipt_data["is_paid"]:
+            return {"success": False, "error": "Entry is not paid"}
+        return {"success": True, "receipt": receipt_data}
 
     async def handle_get_receipt(self, entry_id):
         result = await self.get_receipt(entry_id)
-        await self.send(text_data=json.dumps({"type": "receipt_data", "data": result}))
+        self.queue({"type": "receipt_data", "data": result})
 
     async def handle_delete_entry(self, entry_id):
         result = await self.delete_entry(entry_id)
-        await self.send(text_data=json.dumps({"type": "entry_deleted", "data": result}))
+        self.queue({"type": "entry_deleted", "data": result})
 
     async def send_statistics(self, date_str):
-        stats = await self.get_statistics(date_str)
-        await self.send(
-            text_data=json.dumps({"type": "statistics_update", "data": stats})
+        stats, seq = await self.get_statistics(date_str)
+        self.queue(
+            {
+                "type": "statistics_update",
+                "data": stats,
+                "date": parse_day(date_str).isoformat(),
+                "seq": seq,
+            },
+            key=f"statistics_update:{parse_day(date_str).isoformat()}",
         )
 
     async def send_vehicle_entries(
-        self, date_str, number_plate_filter="", status_filter="all"
+        self,
+        date_str,
+        number_plate_filter="",
+        status_filter="all",
+        cursor=None,
+        limit=None,
+        fields=None,
     ):
-        entries = await self.get_vehicle_entries(
-            date_str, number_plate_filter, status_filter
-        )
-        await self.send(
-            text_data=json.dumps({"type": "vehicle_entries_update", "data": entries})
+        try:
+            entries, next_cursor, day, seq = await self.get_vehicle_entries(
+                date_str, number_plate_filter, status_filter, cursor, limit, fields
+            )
+        except ValueError as e:
+            self.queue({"type": "error", "message": str(e)})
+            return
+        self.queue(
+            {
+                "type": "vehicle_entries_update",
+                "data": entries,
+                "date": day,
+                "seq": seq,
+                # cursor bo'lsa bu keyingi sahifa - ro'yxat oxiriga qo'shiladi
+                "cursor": cursor,
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None,
+            },
+            # Yangi birinchi sahifa eskisini bekor qiladi, keyingi sahifalar emas
+            key=None if cursor else "vehicle_entries_update",
         )
 
     async def send_latest_unpaid_entry(self, date_str):
         entry = await self.get_latest_unpaid_entry(date_str)
-        await self.send(
-            text_data=json.dumps({"type": "latest_unpaid_entry_update", "data": entry})
+        self.queue(
+            {"type": "latest_unpaid_entry_update", "data": entry},
+            key="latest_unpaid_entry_update",
         )
 
     async def send_unpaid_entries(self, date_str):
         entries = await self.get_unpaid_entries(date_str)
-        await self.send(
-            text_data=json.dumps({"type": "unpaid_entries_update", "data": entries})
+        self.queue(
+            {"type": "unpaid_entries_update", "data": entries},
+            key="unpaid_entries_update",
         )
 
     async def handle_mark_as_paid(self, entry_id):
@@ -568,39 +359,15 @@ class HomeConsumer(AsyncWebsocketConsumer):
 
         if result["success"]:
             # Send payment update to client
-            await self.send(
-                text_data=json.dumps({"type": "payment_update", "data": result})
-            )
+            self.queue({"type": "payment_update", "data": result})
 
-            # Send real-time updates to all clients
-            await self.channel_layer.group_send(
-                "home_updates",
+            # Send latest unpaid entry update
+            self.queue(
                 {
-                    "type": "broadcast_update",
-                    "statistics": result["statistics"],
-                    "vehicle_entries": result["vehicle_entries"],
-                    "action": "payment_completed",
-                    "entry_id": entry_id,
+                    "type": "latest_unpaid_entry_update",
+                    "data": result["latest_unpaid_entry"],
                 },
+                key="latest_unpaid_entry_update",
             )
-
-            # Send latest unpaid entry update
-            if result["latest_unpaid_entry"]:
-                await self.send(
-                    text_data=json.dumps(
-                        {
-                            "type": "latest_unpaid_entry_update",
-                            "data": result["latest_unpaid_entry"],
-                        }
-                    )
-                )
-            else:
-                await self.send(
-                    text_data=json.dumps(
-                        {"type": "latest_unpaid_entry_update", "data": None}
-                    )
-                )
         else:
-            await self.send(
-                text_data=json.dumps({"type": "payment_update", "data": result})
-            )
+            self.queue({"type": "payment_update", "data": result})
@@ -0,0 +1,118 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import VehicleEntry
+from .serializers import (
+    ENTRY_FIELDS,
+    ENTRY_ROW,
+    LATEST_UNPAID_ROW,
+    UNPAID_ROW,
+    compile_serializer,
+)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def parse_fields(value):
+    """Turn ?fields=a,b (or a list from a WebSocket message) into known field names"""
+    if not value:
+        return list(ENTRY_ROW)
+    if isinstance(value, str):
+        value = value.split(",")
+    fields = [str(field).strip() for field in value if str(field).strip()]
+    unknown = [field for field in fields if field not in ENTRY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def parse_limit(value):
+    if value in (None, ""):
+        return DEFAULT_PAGE_SIZE
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+
+
+def encode_cursor(entry_time, entry_id):
+    raw = f"{entry_time.isoformat()}|{entry_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        entry_time, entry_id = raw.split("|")
+        parsed = parse_datetime(entry_time)
+        if parsed is None:
+            raise ValueError
+        return parsed, int(entry_id)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def day_entries(day, number_plate="", status="all"):
+    """The dashboard's entry filters for one day"""
+    start_datetime = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+    end_datetime = timezone.make_aware(datetime.combine(day, datetime.max.time()))
+    entries = VehicleEntry.objects.filter(
+        entry_time__gte=start_datetime, entry_time__lte=end_datetime
+    )
+    if number_plate:
+        entries = entries.filter(number_plate__icontains=number_plate)
+    if status == "paid":
+        entries = entries.filter(is_paid=True)
+    elif status == "unpaid":
+        entries = entries.filter(is_paid=False, exit_time__isnull=False)
+    elif status == "inside":
+        entries = entries.filter(exit_time__isnull=True)
+    elif status == "exited":
+        entries = entries.filter(exit_time__isnull=False)
+    return entries
+
+
+def entries_page(entries, fields, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return (rows, next_cursor) for one page of entries, newest first.
+
+    Pages are keyed on (entry_time, id) so rows inserted while a client
+    scrolls never shift or repeat later pages. Only the columns needed for
+    the requested fields are selected.
+    """
+    if cursor:
+        entry_time, entry_id = decode_cursor(cursor)
+        entries = entries.filter(
+            Q(entry_time__lt=entry_time) | Q(entry_time=entry_time, id__lt=entry_id)
+        )
+
+    serializer = compile_serializer(fields)
+    # Kursor uchun oxirgi qatorning (entry_time, id) si ham kerak
+    columns = serializer.columns + ("entry_time", "id")
+    rows = list(
+        entries.order_by("-entry_time", "-id").values_list(*columns)[: limit + 1]
+    )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][-2], rows[-1][-1])
+
+    serialize = serializer.serialize
+    return [serialize(row) for row in rows], next_cursor
+
+
+def unpaid_entries(day):
+    """Exited but unpaid entries of the day, latest exit first"""
+    entries = day_entries(day, status="unpaid").order_by("-exit_time")
+    return compile_serializer(UNPAID_ROW).rows(entries)
+
+
+def latest_unpaid_entry(day):
+    entries = day_entries(day, status="unpaid").order_by("-exit_time")
+    return compile_serializer(LATEST_UNPAID_ROW).first(entries)
@@ -0,0 +1,161 @@
+"""
+Replay buffer for the dashboard WebSocket stream.
+
+Every broadcast_update and broadcast_notification frame is appended once,
+by the publisher, together with its topic group and gets an event id. A
+reconnecting dashboard passes the last id it saw and is sent only the
+frames it missed on its topics, as long as that id is still in the buffer;
+otherwise it falls back to a full snapshot.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict
+
+import redis.asyncio as redis
+from django.conf import settings
+
+from .serializers import dumps_text
+
+logger = logging.getLogger(__name__)
+
+RESUMABLE_TYPES = {"broadcast_update", "broadcast_notification"}
+STREAM_KEY = "smartpark:home_updates"
+EVENT_LOG_MAXLEN = 1000
+# Bundan ko'p o'tkazib yuborilgan bo'lsa, snapshot olish arzonroq
+MAX_REPLAY = 500
+# Redis osilib qolsa, xabar hodisa ID'siz shu vaqtdan keyin yuboriladi
+REDIS_TIMEOUT_SECONDS = 1
+
+
+def event_id_key(event_id):
+    """Sort key for "<ms>-<seq>" ids (Redis stream ids use the same format)"""
+    try:
+        ms, seq = event_id.split("-")
+        return int(ms), int(seq)
+    except (AttributeError, ValueError):
+        return None
+
+
+def with_event_id(event_id, text):
+    # text har doim dumps_text() bergan JSON obyekt, shuning uchun qayta kodlamaymiz
+    return '{"event_id": "%s", %s' % (event_id, text[1:])
+
+
+def notification_frame(message):
+    return dumps_text(
+        {
+            "type": "notification",
+            "title": message["title"],
+            "message": message["message"],
+            "notification_type": message["notification_type"],
+            "timestamp": message["timestamp"],
+        }
+    )
+
+
+class MemoryEventLog:
+    """Single-process buffer for runserver and setups without Redis"""
+
+    def __init__(self, maxlen=EVENT_LOG_MAXLEN):
+        self.maxlen = maxlen
+        self._frames = OrderedDict()
+        self._epoch = int(time.time() * 1000)
+        self._seq = itertools.count(1)
+
+    async def append(self, group, text):
+        event_id = f"{self._epoch}-{next(self._seq)}"
+        self._frames[event_id] = (group, text)
+        while len(self._frames) > self.maxlen:
+            self._frames.popitem(last=False)
+        return event_id
+
+    async def since(self, last_id, limit=MAX_REPLAY):
+        if last_id not in self._frames:
+            return None
+        missed = []
+        found = False
+        for event_id, (group, text) in self._frames.items():
+            if found:
+                missed.append((event_id, group, text))
+                if len(missed) > limit:
+                    return None
+            found = found or event_id == last_id
+        return missed
+
+
+class RedisEventLog:
+    """Buffer shared by all workers, kept in a capped Redis stream"""
+
+    def __init__(self, url, maxlen=EVENT_LOG_MAXLEN):
+        self.url = url
+        self.maxlen = maxlen
+        self._loop = None
+        self._redis = None
+
+    def _client(self):
+        # redis.asyncio ulanishlari bitta event loopga bog'langan
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._redis = redis.from_url(
+                self.url,
+                socket_timeout=REDIS_TIMEOUT_SECONDS,
+                socket_connect_timeout=REDIS_TIMEOUT_SECONDS,
+            )
+            self._loop = loop
+        return self._redis
+
+    async def append(self, group, text):
+        try:
+            event_id = await self._client().xadd(
+                STREAM_KEY,
+                {"group": group, "frame": text},
+                maxlen=self.maxlen,
+                approximate=True,
+            )
+        except redis.RedisError:
+            logger.exception("Cannot append to the event log")
+            return None
+        return event_id.decode()
+
+    async def since(self, last_id, limit=MAX_REPLAY):
+        if event_id_key(last_id) is None:
+            return None
+        client = self._client()
+        try:
+            # Oxirgi ko'rilgan hodisa hali oqimda bo'lsagina davom ettiramiz
+            if not await client.xrange(STREAM_KEY, last_id, last_id, count=1):
+                return None
+            rows = await client.xrange(STREAM_KEY, f"({last_id}", "+", count=limit + 1)
+        except redis.RedisError:
+            logger.exception("Cannot read the event log")
+            return None
+        if len(rows) > limit:
+            return None
+        return [
+            (event_id.decode(), fields[b"group"].decode(), fields[b"frame"].decode())
+            for event_id, fields in rows
+        ]
+
+
+def _build_event_log():
+    url = getattr(settings, "EVENT_LOG_REDIS_URL", "")
+    if url:
+        return RedisEventLog(url)
+    return MemoryEventLog()
+
+
+event_log = _build_event_log()
+
+
+async def record_event(group, message):
+    """Append a resumable message and attach its event id"""
+    if message.get("type") not in RESUMABLE_TYPES:
+        return message
+    text = message.get("text") or notification_frame(message)
+    event_id = await event_log.append(group, text)
+    if event_id is None:
+        return {**message, "text": text}
+    return {**message, "text": with_event_id(event_id, text), "event_id": event_id}
@@ -0,0 +1,239 @@
+import logging
+from datetime import datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from config.settings import MIN_TIME_BETWEEN_ENTRIES, PLATE_MATCH_MIN_CONFIDENCE
+
+from .models import VehicleEntry
+from .multipart import MemoryViewFile, read_anpr_event
+from .open_sessions import (
+    AlreadyInside,
+    ais_inside,
+    amatch_open_entry,
+    aopen_session,
+    close_session,
+    discard_image,
+)
+from .plate_cache import aget_car_policy
+from .publisher import apublish
+from .tariffs import tariff
+from .topics import ALERTS
+
+logger = logging.getLogger(__name__)
+
+
+async def notify(title, message, notification_type):
+    await apublish(
+        ALERTS,
+        {
+            "type": "broadcast_notification",
+            "title": title,
+            "message": message,
+            "notification_type": notification_type,
+            "timestamp": timezone.now().isoformat(),
+        },
+    )
+
+
+async def store_image(field_name, image_data, filename):
+    """Write the JPEG to the field's storage off the event loop and return its name"""
+    field = VehicleEntry._meta.get_field(field_name)
+    name = field.generate_filename(None, filename)
+    # Disk yozuvi DB oqimini band qilmasligi uchun alohida thread'da
+    return await sync_to_async(field.storage.save, thread_sensitive=False)(
+        name, MemoryViewFile(image_data, name=filename), max_length=field.max_length
+    )
+
+
+@sync_to_async
+def close_entry(entry):
+    """Close the open session and save the exit; False if another push closed it"""
+    # Signal hisoblagichlarni shu tranzaksiyada yangilaydi
+    with transaction.atomic():
+        if not close_session(entry):
+            return False
+        entry.save()
+        return True
+
+
+@csrf_exempt
+@require_POST
+async def areceive_entry(request):
+    """Async variant of views.receive_entry"""
+    try:
+        # ASGI tanani oldindan o'qib qo'ygan, bu yerda faqat buferdan o'qiladi
+        event = read_anpr_event(request)
+        number_plate = event.number_plate or f"TEMP{timezone.now().strftime('%H%M%S')}"
+        if not event.boundary or not event.image:
+            return JsonResponse({"error": "Rasm topilmadi"}, status=400)
+
+        car = await aget_car_policy(number_plate)
+        if car and car.is_blocked:
+            await notify(
+                "🚫 Bloklangan avtomobil",
+                f"Avtomobil {number_plate} bloklangan! Chiqish taqiqlanadi.",
+                "error",
+            )
+            return JsonResponse(
+                {
+                    "status": "error",
+                    "message": f"Bu avtomobilga taqiq qo'shilgan! {number_plate}",
+                }
+            )
+
+        try:
+            if await ais_inside(number_plate):
+                raise AlreadyInside(number_plate)
+            timestamp = timezone.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"{number_plate}_{timestamp}.jpg"
+            image_name = await store_image("entry_image", event.image, filename)
+            entry = await aopen_session(
+                number_plate=number_plate,
+                entry_image=image_name,
+                total_amount=0,
+            )
+        except AlreadyInside:
+            await notify(
+                "🚫 Avtomobil oldin kiritilgan",
+                f"Avtomobil {number_plate} oldin kiritilgan!",
+                "warning",
+            )
+            return JsonResponse(
+                {
+                    "status": "error",
+                    "message": f"Bu avtomobilga taqiq qo'shilgan! {number_plate}",
+                }
+            )
+        return JsonResponse(
+            {
+                "status": "ok",
+                "message": "VehicleEntry created",
+                "number_plate": number_plate,
+                "file_saved": filename,
+                "entry_id": entry.id,
+            }
+        )
+    except Exception as e:
+        logger.exception("Camera entry push failed")
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+@csrf_exempt
+@require_POST
+async def areceive_exit(request):
+    """Async variant of views.receive_exit"""
+    try:
+        event = read_anpr_event(request)
+        current_time = timezone.now()
+        today = current_time.date()
+        start_datetime = timezone.make_aware(
+            datetime.combine(today, datetime.min.time())
+        )
+        end_datetime = timezone.make_aware(datetime.combine(today, datetime.max.time()))
+        number_plate = event.number_plate or f"TEMP{current_time.strftime('%H%M%S')}"
+        if not event.boundary or not event.image:
+            return JsonResponse({"error": "Rasm topilmadi"}, status=400)
+
+        latest_entry, confidence = await amatch_open_entry(number_plate)
+        closest = ""
+        if latest_entry and confidence < PLATE_MATCH_MIN_CONFIDENCE:
+            closest = f" Eng yaqini: {latest_entry.number_plate} ({confidence:.0%})"
+            latest_entry = None
+        # Imtiyoz va taqiq kirishdagi raqam bo'yicha
+        car = await aget_car_policy(
+            latest_entry.number_plate if latest_entry else number_plate
+        )
+
+        if latest_entry and timezone.now() - latest_entry.entry_time <= timedelta(
+            minutes=MIN_TIME_BETWEEN_ENTRIES
+        ):
+            await notify(
+                "🚫 Avtomobil oldin kiritilgan",
+                f"Avtomobil {number_plate} oldin kiritilgan!",
+                "warning",
+            )
+            return JsonResponse(
+                {
+                    "status": "error",
+                    "message": f"Avtomobil {number_plate} oldin kiritilgan!",
+                }
+            )
+
+        if latest_entry is None:
+            await notify(
+                "🚫 Avtomobil bilan kirish bo'lmagan",
+                f"Avtomobil {number_plate} bilan kirish bo'lmagan!{closest}",
+                "error",
+            )
+            return JsonResponse(
+                {"error": "Avtomobil bilan kirish bo'lmagan"}, status=404
+            )
+
+        if car and car.is_blocked:
+            await notify(
+                "🚫 Bloklangan avtomobil",
+                f"Avtomobil {number_plate} bloklangan! Chiqish taqiqlanadi.",
+                "error",
+            )
+            return JsonResponse(
+                {
+                    "status": "error",
+                    "message": f"Bu avtomobilga taqiq qo'shilgan! {number_plate}",
+                }
+            )
+
+        latest_entry.exit_time = current_time
+        visits_today = (
+            await VehicleEntry.objects.filter(
+                number_plate=latest_entry.number_plate,
+                entry_time__gte=start_datetime,
+                entry_time__lte=end_datetime,
+            ).acount()
+            if car and car.is_special_taxi
+            else 1
+        )
+        latest_entry.total_amount = tariff.price_exit(latest_entry, car, visits_today)
+        timestamp = current_time.strftime("%Y%m%d_%H%M%S")
+        latest_entry.exit_image = await store_image(
+            "exit_image", event.image, f"{number_plate}_{timestamp}.jpg"
+        )
+        closed = False
+        try:
+            closed = await close_entry(latest_entry)
+        finally:
+            if not closed:
+                # Yozuv saqlanmadi - rasm hech kimga kerak emas
+                await sync_to_async(discard_image)(
+                    "exit_image", latest_entry.exit_image.name
+                )
+        if not closed:
+            # Ikkinchi kamera shu sessiyani hozirgina yopdi
+            return JsonResponse(
+                {"error": "Avtomobil bilan kirish bo'lmagan"}, status=404
+            )
+
+        if confidence < 1:
+            await notify(
+                "🔎 Raqam taxminan aniqlandi",
+                f"Kamera {number_plate} o'qidi, {latest_entry.number_plate} "
+                f"sifatida chiqarildi ({confidence:.0%})",
+                "warning",
+            )
+        return JsonResponse(
+            {
+                "status": "ok",
+                "number_plate": number_plate,
+                "matched_plate": latest_entry.number_plate,
+                "match_confidence": round(confidence, 3),
+                "amount": latest_entry.total_amount,
+            }
+        )
+    except Exception as e:
+        logger.exception("Camera exit push failed")
+        return JsonResponse({"error": str(e)}, status=500)
@@ -0,0 +1,51 @@
+import os
+
+BOUNDARY = "MIME_boundary"
+
+ANPR_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<EventNotificationAlert version="2.0" xmlns="http://www.hikvision.com/ver20/XMLSchema">
+<ipAddress>192.168.1.64</ipAddress>
+<channelID>1</channelID>
+<dateTime>2025-07-18T12:00:00+05:00</dateTime>
+<eventType>ANPR</eventType>
+<ANPR>
+<country>UZ</country>
+<licensePlate>{plate}</licensePlate>
+<confidenceLevel>98</confidenceLevel>
+<direction>{direction}</direction>
+</ANPR>
+</EventNotificationAlert>"""
+
+
+def fake_jpeg(size):
+    """Random bytes wrapped in JPEG SOI/EOI markers"""
+    return b"\xff\xd8\xff\xe0" + os.urandom(max(size - 6, 0)) + b"\xff\xd9"
+
+
+def build_anpr_payload(plate, image=None, image_size=200_000, direction="forward"):
+    """Return (content_type, body) shaped like a Hikvision ANPR push"""
+    image = image if image is not None else fake_jpeg(image_size)
+    xml = ANPR_XML.format(plate=plate, direction=direction).encode()
+    delimiter = f"--{BOUNDARY}".encode()
+    body = b"".join(
+        [
+            delimiter,
+            b"\r\n",
+            b'Content-Disposition: form-data; name="anpr.xml"; filename="anpr.xml"\r\n',
+            b"Content-Type: text/xml\r\n",
+            f"Content-Length: {len(xml)}\r\n\r\n".encode(),
+            xml,
+            b"\r\n",
+            delimiter,
+            b"\r\n",
+            b'Content-Disposition: form-data; name="licensePlatePicture.jpg"; '
+            b'filename="licensePlatePicture.jpg"\r\n',
+            b"Content-Type: image/jpeg\r\n",
+            f"Content-Length: {len(image)}\r\n\r\n".encode(),
+            image,
+            b"\r\n",
+            delimiter,
+            b"--\r\n",
+        ]
+    )
+    return f"multipart/form-data; boundary={BOUNDARY}", body
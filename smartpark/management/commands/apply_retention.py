@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from smartpark.retention import archive_tier, downscale_tier
+
+
+class Command(BaseCommand):
+    help = (
+        "Downscale camera photos older than IMAGE_RETENTION['full_days'] and "
+        "pack those older than ['archive_days'] into per-day tar archives"
+    )
+
+    def add_arguments(self, parser):
+        retention = settings.IMAGE_RETENTION
+        parser.add_argument("--full-days", type=int, default=retention["full_days"])
+        parser.add_argument(
+            "--archive-days", type=int, default=retention["archive_days"]
+        )
+        parser.add_argument(
+            "--max-dimension", type=int, default=retention["max_dimension"]
+        )
+        parser.add_argument("--quality", type=int, default=retention["quality"])
+        parser.add_argument(
+            "--skip-downscale", action="store_true", help="Only pack archives"
+        )
+        parser.add_argument(
+            "--skip-archive", action="store_true", help="Only downscale"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be processed without touching files or rows",
+        )
+
+    def handle(self, *args, **options):
+        if options["archive_days"] < options["full_days"]:
+            raise CommandError("--archive-days must not be less than --full-days")
+        now = timezone.now()
+        full_before = now - timedelta(days=options["full_days"])
+        archive_before = now - timedelta(days=options["archive_days"])
+        prefix = "[dry run] " if options["dry_run"] else ""
+
+        # Avval arxiv: kichraytirish arxivga tushadigan rasmlarga vaqt sarflamasin
+        if not options["skip_archive"]:
+            stats = archive_tier(archive_before, options["dry_run"])
+            self.stdout.write(prefix + stats.report())
+        if not options["skip_downscale"]:
+            stats = downscale_tier(
+                full_before,
+                archive_before,
+                options["max_dimension"],
+                options["quality"],
+                options["dry_run"],
+            )
+            self.stdout.write(prefix + stats.report())
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from smartpark.models import VehicleEntry
+from smartpark.thumbnails import generate_thumbnails
+
+
+def missing(field):
+    return Q(**{f"{field}__isnull": True}) | Q(**{field: ""})
+
+
+class Command(BaseCommand):
+    help = "Render thumbnails for entries whose photos do not have one yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None)
+
+    def handle(self, *args, **options):
+        entries = VehicleEntry.objects.filter(
+            (~missing("entry_image") & missing("entry_thumbnail"))
+            | (~missing("exit_image") & missing("exit_thumbnail"))
+        ).order_by("-entry_time")
+        if options["limit"]:
+            entries = entries[: options["limit"]]
+
+        processed = rendered = 0
+        for entry in entries.iterator(chunk_size=500):
+            rendered += len(generate_thumbnails(entry))
+            processed += 1
+            if processed % 500 == 0:
+                self.stdout.write(f"{processed} entries, {rendered} thumbnails")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rendered {rendered} thumbnail(s) for {processed} entrie(s)"
+            )
+        )
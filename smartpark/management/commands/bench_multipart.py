@@ -0,0 +1,74 @@
+import re
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from smartpark.multipart import read_anpr_event
+
+from ._anpr_payload import build_anpr_payload, fake_jpeg
+
+
+def legacy_parse(request):
+    """The request.body based extraction the ingest views used before"""
+    content_type = request.headers.get("Content-Type", "")
+    body_bytes = request.body
+    body_str = body_bytes.decode("utf-8", errors="ignore")
+    match = re.search(r"<licensePlate>(.*?)</licensePlate>", body_str)
+    number_plate = match.group(1) if match else None
+    boundary = content_type.split("boundary=")[-1]
+    image_data = None
+    for part in body_bytes.split(boundary.encode()):
+        if b"Content-Type: image/jpeg" in part:
+            image_data = part.split(b"\r\n\r\n", 1)[-1].rsplit(b"\r\n", 1)[0]
+            break
+    return number_plate, image_data
+
+
+def streaming_parse(request):
+    event = read_anpr_event(request)
+    return event.number_plate, event.image
+
+
+class Command(BaseCommand):
+    help = "Compare bytes copied and parse time per ANPR event for both parsers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=200)
+        parser.add_argument("--image-kb", type=int, default=2048)
+
+    def handle(self, *args, **options):
+        image = fake_jpeg(options["image_kb"] * 1024)
+        content_type, body = build_anpr_payload("01A123BC", image=image)
+        factory = RequestFactory()
+
+        def make_request():
+            return factory.generic(
+                "POST", "/receive-entry/", body, content_type=content_type
+            )
+
+        self.stdout.write(
+            f"payload: {len(body) / 1024:.0f} KiB, events: {options['events']}"
+        )
+        for label, parse in (("legacy", legacy_parse), ("streaming", streaming_parse)):
+            plate, image_data = parse(make_request())
+            assert plate == "01A123BC" and bytes(image_data) == image
+
+            requests = [make_request() for _ in range(options["events"])]
+            started = time.perf_counter()
+            for request in requests:
+                parse(request)
+            elapsed = (time.perf_counter() - started) / options["events"]
+
+            request = make_request()
+            tracemalloc.start()
+            parse(request)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            self.stdout.write(
+                f"{label:>10}: {elapsed * 1000:8.3f} ms/event, "
+                f"peak allocated {peak / 1024:8.0f} KiB "
+                f"({peak / len(body):.2f}x payload)"
+            )
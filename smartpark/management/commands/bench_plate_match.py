@@ -0,0 +1,113 @@
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from smartpark.management.commands.loadtest_ingest import percentile
+from smartpark.plate_match import CONFUSABLE_GROUPS, PlateIndex
+
+LETTERS = string.ascii_uppercase
+DIGITS = string.digits
+
+
+def random_plate():
+    # O'zbekiston formati: 01A123BC yoki 01123ABC
+    region = f"{random.randint(1, 95):02d}"
+    if random.random() < 0.7:
+        return (
+            region
+            + random.choice(LETTERS)
+            + "".join(random.choices(DIGITS, k=3))
+            + "".join(random.choices(LETTERS, k=2))
+        )
+    return (
+        region
+        + "".join(random.choices(DIGITS, k=3))
+        + "".join(random.choices(LETTERS, k=3))
+    )
+
+
+def misread(plate, kind):
+    """The plate as a camera might read it: a look-alike swap or any wrong character"""
+    positions = list(range(len(plate)))
+    random.shuffle(positions)
+    if kind == "confusable":
+        for position in positions:
+            group = next((g for g in CONFUSABLE_GROUPS if plate[position] in g), None)
+            if group:
+                swap = random.choice([c for c in group if c != plate[position]])
+                return plate[:position] + swap + plate[position + 1 :]
+        return plate
+    position = positions[0]
+    swap = random.choice([c for c in LETTERS + DIGITS if c != plate[position]])
+    return plate[:position] + swap + plate[position + 1 :]
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill a plate index with synthetic cars and time best_match() for "
+        "misread plates; reports latency and how often the right car wins"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--inside", type=int, default=5000)
+        parser.add_argument("--queries", type=int, default=2000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--max-p99-ms",
+            type=float,
+            default=None,
+            help="Fail if the p99 lookup latency is above this",
+        )
+
+    def handle(self, *args, **options):
+        random.seed(options["seed"])
+        plates = set()
+        while len(plates) < options["inside"]:
+            plates.add(random_plate())
+        plates = sorted(plates)
+
+        index = PlateIndex()
+        started = time.perf_counter()
+        index.replace((plate, entry_id) for entry_id, plate in enumerate(plates))
+        self.stdout.write(
+            f"{len(index)} plates indexed in "
+            f"{(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+
+        self.stdout.write(
+            f"{'read':<12} {'p50 ms':>8} {'p99 ms':>8} {'right':>7} "
+            f"{'wrong':>7} {'none':>7} {'mean conf':>10}"
+        )
+        worst_p99 = 0.0
+        for kind in ("exact", "confusable", "any"):
+            timings = []
+            right = wrong = none = 0
+            confidences = []
+            for _ in range(options["queries"]):
+                plate = random.choice(plates)
+                read = plate if kind == "exact" else misread(plate, kind)
+                started = time.perf_counter()
+                match = index.best_match(read)
+                timings.append(time.perf_counter() - started)
+                if match is None:
+                    none += 1
+                    continue
+                confidences.append(match.confidence)
+                if match.plate_key == plate:
+                    right += 1
+                else:
+                    wrong += 1
+            timings.sort()
+            p99 = percentile(timings, 0.99) * 1000
+            worst_p99 = max(worst_p99, p99)
+            mean = sum(confidences) / len(confidences) if confidences else 0
+            self.stdout.write(
+                f"{kind:<12} {percentile(timings, 0.5) * 1000:>8.3f} {p99:>8.3f} "
+                f"{right:>7} {wrong:>7} {none:>7} {mean:>10.3f}"
+            )
+
+        limit = options["max_p99_ms"]
+        if limit is not None and worst_p99 > limit:
+            raise CommandError(f"p99 lookup {worst_p99:.3f} ms is above {limit} ms")
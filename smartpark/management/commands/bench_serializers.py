@@ -0,0 +1,107 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from smartpark.management.commands.check_query_plans import seed_entries
+from smartpark.models import VehicleEntry
+from smartpark.serializers import (
+    ENTRY_ROW,
+    UNPAID_ROW,
+    compile_serializer,
+    dumps,
+    orjson,
+)
+
+
+def legacy_entry_dict(entry):
+    """The per-instance builder signals.py and views.py used before serializers.py"""
+    return {
+        "id": entry.id,
+        "number_plate": entry.number_plate,
+        "entry_time": entry.entry_time.strftime("%H:%M"),
+        "exit_time": entry.exit_time.strftime("%H:%M") if entry.exit_time else None,
+        "total_amount": entry.total_amount or 0,
+        "is_paid": entry.is_paid,
+        "entry_image": entry.entry_image.url if entry.entry_image else None,
+        "exit_image": entry.exit_image.url if entry.exit_image else None,
+        "entry_thumbnail": entry.entry_thumbnail.url if entry.entry_thumbnail else None,
+        "exit_thumbnail": entry.exit_thumbnail.url if entry.exit_thumbnail else None,
+        "status": "inside"
+        if not entry.exit_time
+        else ("paid" if entry.is_paid else "unpaid"),
+    }
+
+
+def legacy_unpaid_dict(entry):
+    return {
+        "id": entry.id,
+        "number_plate": entry.number_plate,
+        "entry_time": entry.entry_time.strftime("%H:%M"),
+        "exit_time": entry.exit_time.strftime("%H:%M"),
+        "total_amount": entry.total_amount or 0,
+        "duration_hours": (entry.exit_time - entry.entry_time).total_seconds() / 3600,
+    }
+
+
+def best_of(repeat, func):
+    """Return (best seconds, last result)"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the legacy instance-based entry dicts with the compiled "
+        "values_list serializers, end to end from query to JSON bytes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        self.stdout.write(f"JSON encoder: {'orjson' if orjson else 'json'}")
+
+        with transaction.atomic():
+            seed_entries(rows, days=1)
+            entries = VehicleEntry.objects.order_by("-entry_time", "-id")[:rows]
+            unpaid = VehicleEntry.objects.filter(
+                is_paid=False, exit_time__isnull=False
+            ).order_by("-exit_time")[:rows]
+
+            cases = [
+                ("entries", entries, legacy_entry_dict, ENTRY_ROW),
+                ("unpaid", unpaid, legacy_unpaid_dict, UNPAID_ROW),
+            ]
+            for name, queryset, legacy, fields in cases:
+                serializer = compile_serializer(fields)
+                old_time, old_body = best_of(
+                    repeat,
+                    lambda: json.dumps(
+                        # .all(): natija keshidan emas, har safar bazadan
+                        [legacy(entry) for entry in queryset.all()]
+                    ).encode(),
+                )
+                new_time, new_body = best_of(
+                    repeat, lambda: dumps(serializer.rows(queryset))
+                )
+                if json.loads(old_body) != json.loads(new_body):
+                    raise CommandError(f"{name}: serializer output differs from legacy")
+
+                count = len(json.loads(new_body))
+                self.stdout.write(
+                    f"{name:8} {count} rows  "
+                    f"legacy {old_time * 1000:8.1f} ms ({count / old_time:9.0f} rows/s)  "
+                    f"compiled {new_time * 1000:8.1f} ms ({count / new_time:9.0f} rows/s)  "
+                    f"x{old_time / new_time:.1f}"
+                )
+
+            transaction.set_rollback(True)
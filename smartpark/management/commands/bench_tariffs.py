@@ -0,0 +1,113 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from smartpark import tariffs
+from smartpark.models import VehicleEntry
+from smartpark.tariffs import Tariff
+
+
+def legacy_amount(entry_time, exit_time, hour_price):
+    """VehicleEntry.calculate_amount as it was before the tariff engine"""
+    if not exit_time:
+        return 0
+    hours = (exit_time - entry_time).total_seconds() / 3600
+    hours = max(1, round(hours + 0.5))
+    return int(hours * hour_price)
+
+
+def synthetic_month(days, per_day):
+    """Sessions spread over the last `days` days, some of them on whole hours"""
+    now = timezone.now().replace(second=0, microsecond=0)
+    sessions = []
+    for _ in range(days * per_day):
+        entry_time = now - timedelta(minutes=random.randint(0, days * 1440))
+        if random.random() < 0.1:
+            # Aniq soatlar - yaxlitlash chegarasi
+            stay = timedelta(hours=random.randint(0, 30))
+        else:
+            stay = timedelta(seconds=random.randint(60, 30 * 3600))
+        sessions.append((entry_time, entry_time + stay))
+    return sessions
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+class Command(BaseCommand):
+    help = (
+        "Price a month of parking sessions with the legacy hourly rule, the "
+        "tariff engine one session at a time and the batch price_many()"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30)
+        parser.add_argument("--per-day", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument(
+            "--from-db",
+            action="store_true",
+            help="Use the finished sessions of the last --days days instead",
+        )
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        if options["from_db"]:
+            since = timezone.now() - timedelta(days=options["days"])
+            sessions = list(
+                VehicleEntry.objects.filter(
+                    entry_time__gte=since, exit_time__isnull=False
+                ).values_list("entry_time", "exit_time")
+            )
+        else:
+            sessions = synthetic_month(options["days"], options["per_day"])
+        if not sessions:
+            raise CommandError("No sessions to price")
+
+        default = Tariff.from_settings()
+        hour_price = default.day_rate
+        rule_sets = {
+            "default": default,
+            # Kunduz/tun narxi, 15 daqiqa bepul va kunlik chegara
+            "day/night+cap": Tariff(
+                day_rate=hour_price,
+                night_rate=hour_price // 2,
+                grace_minutes=15,
+                daily_cap=hour_price * 10,
+            ),
+        }
+        self.stdout.write(
+            f"{len(sessions)} sessions, batch backend: "
+            f"{'numpy' if tariffs.numpy is not None else 'python'}"
+        )
+
+        legacy_time, expected = best_of(
+            options["repeat"],
+            lambda: [legacy_amount(*session, hour_price) for session in sessions],
+        )
+        self.stdout.write(f"{'legacy':<24} {legacy_time * 1000:>9.1f} ms")
+        for name, tariff in rule_sets.items():
+            single_time, single = best_of(
+                options["repeat"], lambda: [tariff.price(*s) for s in sessions]
+            )
+            batch_time, batch = best_of(
+                options["repeat"], lambda: tariff.price_many(sessions)
+            )
+            if single != batch:
+                raise CommandError(f"{name}: price() and price_many() disagree")
+            if name == "default" and single != expected:
+                raise CommandError("default tariff differs from the legacy rule")
+            self.stdout.write(
+                f"{name + ' price()':<24} {single_time * 1000:>9.1f} ms\n"
+                f"{name + ' price_many()':<24} {batch_time * 1000:>9.1f} ms "
+                f"(x{single_time / batch_time:.1f} vs price()), total {sum(batch)}"
+            )
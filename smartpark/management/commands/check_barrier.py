@@ -0,0 +1,75 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from smartpark.barier_control import BarrierController
+
+
+class Command(BaseCommand):
+    help = (
+        "Exercise the barrier controller: open with auto-close, re-open to "
+        "extend the deadline, then close. Use --fake to run against a pty "
+        "that emulates the relay board."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fake", action="store_true")
+        parser.add_argument("--port", default=None)
+        parser.add_argument("--close-after", type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        if options["fake"]:
+            from smartpark.barier_fake import FakeBarrierDevice
+
+            with FakeBarrierDevice() as device:
+                controller = BarrierController(device.port, settle_seconds=0)
+                self._check_fake(controller, device, options["close_after"])
+                controller.stop()
+            return
+
+        controller = BarrierController(
+            options["port"] or settings.BARRIER_PORT,
+            settings.BARRIER_BAUDRATE,
+            settle_seconds=settings.BARRIER_SETTLE_SECONDS,
+        )
+        started = time.monotonic()
+        controller.open_barrier(close_after=options["close_after"])
+        self.stdout.write(
+            f"open_barrier returned in {(time.monotonic() - started) * 1000:.2f} ms"
+        )
+        time.sleep(settings.BARRIER_SETTLE_SECONDS + options["close_after"] + 1)
+        controller.stop()
+
+    def _check_fake(self, controller, device, close_after):
+        controller.start()
+        time.sleep(0.2)  # port ochilishini kutamiz
+
+        started = time.monotonic()
+        controller.open_barrier(close_after=close_after)
+        returned = time.monotonic() - started
+        if not device.wait_for(1):
+            raise CommandError("Open command never reached the device")
+        opened = device.received[0][0] - started
+        self.stdout.write(
+            f"open_barrier returned in {returned * 1000:.2f} ms, "
+            f"device saw it after {opened * 1000:.1f} ms"
+        )
+
+        # Ikkinchi ochish yopish muddatini suradi
+        time.sleep(close_after / 2)
+        controller.open_barrier(close_after=close_after)
+        if not device.wait_for(3, timeout=close_after * 3):
+            raise CommandError(f"Auto-close did not arrive: {device.received}")
+        commands = [command for _, command in device.received]
+        if commands != [b"O", b"O", b"C"]:
+            raise CommandError(f"Unexpected command sequence: {commands}")
+        held = device.received[2][0] - device.received[1][0]
+        self.stdout.write(f"auto-close after {held:.2f} s (expected {close_after})")
+        if abs(held - close_after) > 0.25:
+            raise CommandError("Auto-close deadline was not honoured")
+
+        controller.close_barrier()
+        if not device.wait_for(4) or device.is_open:
+            raise CommandError("Explicit close did not reach the device")
+        self.stdout.write(self.style.SUCCESS("Barrier controller OK"))
@@ -0,0 +1,139 @@
+import random
+import re
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from smartpark.models import VehicleEntry
+
+SEQ_SCAN_PATTERNS = {
+    "postgresql": r"Seq Scan on {table}\b",
+    # SQLite: "SCAN vehicle_entries" (USING INDEX bo'lmasa - to'liq skan)
+    "sqlite": r"\bSCAN {table}\b(?! USING)",
+}
+
+
+def seed_entries(rows, days, batch_size=10_000):
+    """Insert synthetic entries spread over the last `days` days"""
+    now = timezone.now()
+    plates = [f"{i:02d}A{i % 1000:03d}AA" for i in range(max(rows // 20, 1))]
+    batch = []
+    for i in range(rows):
+        entry_time = now - timedelta(seconds=random.randint(0, days * 86400))
+        exited = random.random() < 0.98
+        batch.append(
+            VehicleEntry(
+                number_plate=random.choice(plates),
+                entry_time=entry_time,
+                exit_time=entry_time + timedelta(minutes=random.randint(5, 600))
+                if exited
+                else None,
+                entry_image="entries/seed.jpg",
+                total_amount=5000 if exited else None,
+                is_paid=exited and random.random() < 0.9,
+            )
+        )
+        if len(batch) >= batch_size:
+            VehicleEntry.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        VehicleEntry.objects.bulk_create(batch)
+    return plates
+
+
+def hot_queries(plate, day):
+    """The VehicleEntry lookups made by views.py, consumers.py and signals.py"""
+    start_datetime = datetime.combine(day, datetime.min.time())
+    end_datetime = datetime.combine(day, datetime.max.time())
+    if settings.USE_TZ:
+        start_datetime = timezone.make_aware(start_datetime)
+        end_datetime = timezone.make_aware(end_datetime)
+    day_entries = VehicleEntry.objects.filter(
+        entry_time__gte=start_datetime, entry_time__lte=end_datetime
+    )
+    unpaid = day_entries.filter(is_paid=False, exit_time__isnull=False).order_by(
+        "-exit_time"
+    )
+    # entries.entries_page: (entry_time, id) keyset, kamayish tartibida
+    listing = day_entries.order_by("-entry_time", "-id")
+    cursor = Q(entry_time__lt=end_datetime) | Q(entry_time=end_datetime, id__lt=1)
+    return {
+        # views.receive_exit (kirish/chiqish sessiyasi open_sessions jadvalida)
+        "special_taxi_count": day_entries.filter(number_plate=plate),
+        # views.get_vehicle_entries, HomeConsumer.get_vehicle_entries
+        "entries": listing,
+        "entries_next_page": listing.filter(cursor),
+        "entries_plate_search": listing.filter(number_plate__icontains=plate[:4]),
+        "entries_paid": listing.filter(is_paid=True),
+        "entries_unpaid": listing.filter(is_paid=False, exit_time__isnull=False),
+        "entries_inside": listing.filter(exit_time__isnull=True),
+        "entries_exited": listing.filter(exit_time__isnull=False),
+        # entries.unpaid_entries
+        "unpaid_entries": unpaid,
+        # entries.latest_unpaid_entry
+        "latest_unpaid": unpaid[:1],
+    }
+
+
+def seq_scan_regex():
+    """Regex matching a full scan of vehicle_entries, or None for other backends"""
+    pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+    if pattern is None:
+        return None
+    return re.compile(pattern.format(table=re.escape(VehicleEntry._meta.db_table)))
+
+
+def explain_hot_queries(plate, day):
+    """Yield (name, plan, is_seq_scan) for every hot query"""
+    seq_scan = seq_scan_regex()
+    for name, queryset in hot_queries(plate, day).items():
+        plan = queryset.explain()
+        yield name, plan, bool(seq_scan.search(plan))
+
+
+def analyze_entries():
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {VehicleEntry._meta.db_table}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed VehicleEntry rows in a rolled-back transaction and fail if any "
+        "hot query plan falls back to a sequential scan"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--days", type=int, default=365)
+
+    def handle(self, *args, **options):
+        if seq_scan_regex() is None:
+            raise CommandError(f"Unsupported database backend: {connection.vendor}")
+
+        failures = []
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['rows']} entries...")
+            plates = seed_entries(options["rows"], options["days"])
+            analyze_entries()
+
+            day = timezone.now().date()
+            for name, plan, is_seq_scan in explain_hot_queries(
+                random.choice(plates), day
+            ):
+                if is_seq_scan:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f"SEQ SCAN  {name}"))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"ok        {name}"))
+                if options["verbosity"] > 1 or is_seq_scan:
+                    self.stdout.write(f"    {plan.replace(chr(10), chr(10) + '    ')}")
+
+            # Sinov ma'lumotlari bazada qolmasin
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f"Sequential scan in: {', '.join(failures)}")
@@ -0,0 +1,59 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from smartpark.reports import (
+    FORMATS,
+    REPORTS,
+    ReportError,
+    filename,
+    get_report,
+    parse_range,
+    report_chunks,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a date-range report of vehicle entries to a file, streamed "
+        "through the same encoder as /api/reports/<report>/"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("report", choices=list(REPORTS))
+        parser.add_argument("--start", help="First day, YYYY-MM-DD (default today)")
+        parser.add_argument("--end", help="Last day, YYYY-MM-DD (default --start)")
+        parser.add_argument("--format", choices=list(FORMATS), default="csv")
+        parser.add_argument(
+            "--output", help="File path (default <report>_<days>.<ext>)"
+        )
+        parser.add_argument(
+            "--trace-memory",
+            action="store_true",
+            help="Report the peak Python heap while streaming (slower)",
+        )
+
+    def handle(self, *args, **options):
+        file_format = options["format"]
+        try:
+            report = get_report(options["report"], file_format)
+            first, last = parse_range(options["start"], options["end"])
+        except ReportError as e:
+            raise CommandError(str(e))
+        path = options["output"] or filename(report, first, last, file_format)
+
+        if options["trace_memory"]:
+            tracemalloc.start()
+        started = time.perf_counter()
+        size = 0
+        with open(path, "wb") as output:
+            for chunk in report_chunks(report, first, last, file_format):
+                output.write(chunk)
+                size += len(chunk)
+        elapsed = time.perf_counter() - started
+        message = f"Wrote {size / 1e6:.1f} MB to {path} in {elapsed:.2f}s"
+        if options["trace_memory"]:
+            message += f", peak heap {tracemalloc.get_traced_memory()[1] / 1e6:.1f} MB"
+            tracemalloc.stop()
+        self.stdout.write(message)
@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from smartpark.car_registry import (
+    CHUNK_SIZE,
+    ImportFormatError,
+    export_csv,
+    export_xlsx,
+    import_cars,
+    parse_cars,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk upsert the Cars registry from a CSV/XLSX file, or export it with --export"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help=".csv or .xlsx file")
+        parser.add_argument(
+            "--export",
+            action="store_true",
+            help="Write the registry to the file instead of importing it",
+        )
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument(
+            "--skip-invalid",
+            action="store_true",
+            help="Import the valid rows even if some rows have errors",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            if options["export"]:
+                self.export(path)
+                return
+            started = time.perf_counter()
+            with open(path, "rb") as file:
+                cars, errors = parse_cars(read_rows(file, path))
+        except (ImportFormatError, OSError, UnicodeDecodeError) as e:
+            raise CommandError(str(e))
+
+        for error in errors:
+            self.stderr.write(f"row {error['row']}: {error['error']}")
+        if errors and not options["skip_invalid"]:
+            raise CommandError(
+                f"{len(errors)} invalid rows, nothing imported (use --skip-invalid)"
+            )
+        if options["dry_run"]:
+            self.stdout.write(f"{len(cars)} valid rows, {len(errors)} invalid")
+            return
+
+        summary = import_cars(cars, options["chunk_size"])
+        self.stdout.write(
+            f"created {summary['created']}, updated {summary['updated']}, "
+            f"skipped {len(errors)} in {time.perf_counter() - started:.2f}s"
+        )
+
+    def export(self, path):
+        if path.lower().endswith(".xlsx"):
+            with open(path, "wb") as output:
+                export_xlsx(output)
+        else:
+            with open(path, "w", newline="", encoding="utf-8") as output:
+                export_csv(output)
+        self.stdout.write(f"Exported to {path}")
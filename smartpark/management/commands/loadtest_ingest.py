@@ -0,0 +1,138 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ._anpr_payload import build_anpr_payload, fake_jpeg
+
+ENDPOINTS = {
+    "sync": "/receive-entry/",
+    "async": "/receive-entry/async/",
+}
+
+
+async def post(host, port, path, content_type, body):
+    """Minimal HTTP/1.1 POST over a fresh connection, returns the status code"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(
+            (
+                f"POST {path} HTTP/1.1\r\n"
+                f"Host: {host}:{port}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode("latin-1")
+        )
+        writer.write(body)
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def run_lane(lane, run_id, target, image, deadline, timeout, results):
+    host, port, path = target
+    sequence = 0
+    while time.monotonic() < deadline:
+        # Har bir so'rov yangi raqam - "oldin kiritilgan" tekshiruviga tushmaydi
+        plate = f"LT{run_id}{lane:03d}{sequence:05d}"
+        sequence += 1
+        content_type, body = build_anpr_payload(plate, image=image)
+        started = time.perf_counter()
+        try:
+            status = await asyncio.wait_for(
+                post(host, port, path, content_type, body), timeout
+            )
+        except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+            status = None
+        results.append((time.perf_counter() - started, status))
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Push synthetic camera events at a running server from N concurrent "
+        "lanes and compare the sync and async ingest endpoints. Every request "
+        "creates a VehicleEntry, so point it at a disposable database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument(
+            "--lanes", default="1,10,25,50", help="Comma separated lane counts"
+        )
+        parser.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument("--image-kb", type=int, default=200)
+        parser.add_argument("--timeout", type=float, default=30.0)
+        parser.add_argument(
+            "--slo-ms",
+            type=float,
+            default=500.0,
+            help="p95 latency a lane count must stay under to count as served",
+        )
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme != "http" or not url.hostname:
+            raise CommandError("--url must be a plain http:// address")
+        try:
+            lane_counts = [int(value) for value in options["lanes"].split(",")]
+        except ValueError:
+            raise CommandError("--lanes must be a comma separated list of integers")
+        modes = ["sync", "async"] if options["mode"] == "both" else [options["mode"]]
+        image = fake_jpeg(options["image_kb"] * 1024)
+
+        self.stdout.write(
+            f"{'mode':<6} {'lanes':>5} {'req/s':>8} {'p50 ms':>8} "
+            f"{'p95 ms':>8} {'p99 ms':>8} {'errors':>7}"
+        )
+        served = {}
+        for mode in modes:
+            target = (url.hostname, url.port or 80, ENDPOINTS[mode])
+            for lanes in lane_counts:
+                results = []
+                run_id = f"{int(time.time()) % 1000:03d}"
+                deadline = time.monotonic() + options["duration"]
+                started = time.monotonic()
+                asyncio.run(
+                    self._run(lanes, run_id, target, image, deadline, options, results)
+                )
+                elapsed = time.monotonic() - started
+
+                latencies = sorted(duration * 1000 for duration, _ in results)
+                errors = sum(1 for _, status in results if status != 200)
+                p95 = percentile(latencies, 0.95)
+                self.stdout.write(
+                    f"{mode:<6} {lanes:>5} {len(results) / elapsed:>8.1f} "
+                    f"{statistics.median(latencies) if latencies else 0:>8.1f} "
+                    f"{p95:>8.1f} {percentile(latencies, 0.99):>8.1f} {errors:>7}"
+                )
+                if p95 <= options["slo_ms"] and not errors:
+                    served[mode] = max(served.get(mode, 0), lanes)
+
+        for mode in modes:
+            self.stdout.write(
+                f"{mode}: {served.get(mode, 0)} lane(s) served within "
+                f"p95 {options['slo_ms']:.0f} ms"
+            )
+
+    async def _run(self, lanes, run_id, target, image, deadline, options, results):
+        await asyncio.gather(
+            *(
+                run_lane(
+                    lane, run_id, target, image, deadline, options["timeout"], results
+                )
+                for lane in range(lanes)
+            )
+        )
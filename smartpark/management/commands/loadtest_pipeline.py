@@ -0,0 +1,361 @@
+import asyncio
+import contextvars
+import json
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+from io import BytesIO
+
+from channels.db import database_sync_to_async
+from channels.layers import DEFAULT_CHANNEL_LAYER, InMemoryChannelLayer, channel_layers
+from channels.testing import HttpCommunicator, WebsocketCommunicator
+from django.core.management.base import BaseCommand, CommandError
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from PIL import Image
+
+from config.settings import MIN_TIME_BETWEEN_ENTRIES
+from smartpark import event_log
+from smartpark.models import VehicleEntry
+from smartpark.publisher import publisher
+from smartpark.snapshots import snapshot_cache
+
+from ._anpr_payload import build_anpr_payload
+from .loadtest_ingest import percentile
+
+ENDPOINTS = {
+    "sync": ("/receive-entry/", "/receive-exit/"),
+    "async": ("/receive-entry/async/", "/receive-exit/async/"),
+}
+# Dashboard ulanganda home.html yuboradigan so'rovlar
+INITIAL_REQUESTS = ("get_statistics", "get_vehicle_entries", "get_latest_unpaid_entry")
+# Baseline bilan solishtirishda ruxsat etilmaydigan o'sish (toleranssiz)
+COUNT_METRICS = ("errors", "undelivered")
+
+# So'rov qaysi qismdan kelgani: ingest, broadcast, dashboard yoki harness
+phase = contextvars.ContextVar("loadtest_phase", default="other")
+
+
+class QueryCounter:
+    """Execute wrapper that counts queries per phase on every DB connection"""
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.counts[phase.get()] += 1
+        return execute(sql, params, many, context)
+
+    def install(self, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+def tag_phases(application):
+    """ASGI wrapper: camera pushes count as ingest, sockets as dashboard"""
+
+    async def app(scope, receive, send):
+        phase.set("ingest" if scope["type"] == "http" else "dashboard")
+        return await application(scope, receive, send)
+
+    return app
+
+
+def camera_jpeg(width=1280, height=720):
+    """A decodable frame, so thumbnail rendering is part of the load"""
+    buffer = BytesIO()
+    Image.effect_noise((width, height), 32).convert("RGB").save(
+        buffer, "JPEG", quality=85
+    )
+    return buffer.getvalue()
+
+
+def summary(values):
+    values = sorted(value * 1000 for value in values)
+    return {
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+    }
+
+
+async def post_event(application, path, plate, image, timeout):
+    """POST one ANPR push through the ASGI app, True if the view accepted it"""
+    content_type, body = build_anpr_payload(plate, image=image)
+    communicator = HttpCommunicator(
+        application,
+        "POST",
+        path,
+        body=body,
+        headers=[(b"content-type", content_type.encode("latin-1"))],
+    )
+    try:
+        response = await communicator.get_response(timeout)
+        # Django javobdan keyin ham uzilishni kutadi - ilovani to'liq yakunlaymiz
+        await communicator.send_input({"type": "http.disconnect"})
+        await communicator.wait(timeout)
+    except asyncio.TimeoutError:
+        return False
+    if response["status"] != 200:
+        return False
+    return json.loads(response["body"]).get("status") == "ok"
+
+
+@database_sync_to_async
+def backdate_entry(plate):
+    # Chiqish "oldin kiritilgan" tekshiruviga tushmasligi uchun
+    VehicleEntry.objects.filter(number_plate=plate, exit_time__isnull=True).update(
+        entry_time=F("entry_time") - timedelta(minutes=MIN_TIME_BETWEEN_ENTRIES + 1)
+    )
+
+
+async def read_frames(client, sent_at, delays):
+    """Match model_update frames to the push that caused them"""
+    while True:
+        text = await client.receive_from(timeout=3600)
+        # Statistika va boshqa kadrlarni dekodlash shart emas
+        if "model_update" not in text:
+            continue
+        frame = json.loads(text)
+        if frame.get("type") != "model_update":
+            continue
+        started = sent_at.get((frame["number_plate"], frame["action"]))
+        if started is not None:
+            delays.append(time.perf_counter() - started)
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay camera entry/exit pushes at a fixed rate through the ASGI app "
+        "in this process while N dashboard sockets listen, then report ingest "
+        "and broadcast delivery latency and DB queries per event. Entries "
+        "are written to the configured database and removed afterwards "
+        "unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rate", type=float, default=20.0, help="Entry pushes per second"
+        )
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument(
+            "--exit-ratio",
+            type=float,
+            default=0.8,
+            help="Share of entered vehicles that also leave during the run",
+        )
+        parser.add_argument(
+            "--dwell", type=float, default=1.0, help="Seconds between entry and exit"
+        )
+        parser.add_argument("--clients", type=int, default=20)
+        parser.add_argument("--mode", choices=list(ENDPOINTS), default="sync")
+        parser.add_argument(
+            "--layer",
+            choices=["memory", "settings"],
+            default="memory",
+            help="memory: in-process channel layer and event log; "
+            "settings: the configured CHANNEL_LAYERS (e.g. local Redis)",
+        )
+        parser.add_argument("--timeout", type=float, default=30.0)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--keep", action="store_true")
+        parser.add_argument("--baseline", help="JSON file to compare against")
+        parser.add_argument("--save-baseline", help="Write this run's metrics here")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed relative growth of a metric over the baseline",
+        )
+
+    def handle(self, *args, **options):
+        if options["rate"] <= 0 or options["duration"] <= 0:
+            raise CommandError("--rate and --duration must be positive")
+        baseline = None
+        if options["baseline"]:
+            try:
+                with open(options["baseline"]) as handle:
+                    baseline = json.load(handle)
+            except (OSError, ValueError) as error:
+                raise CommandError(f"Cannot read baseline: {error}")
+
+        if options["layer"] == "memory":
+            channel_layers.set(DEFAULT_CHANNEL_LAYER, InMemoryChannelLayer())
+            event_log.event_log = event_log.MemoryEventLog()
+        random.seed(options["seed"])
+
+        counter = QueryCounter()
+        connection_created.connect(counter.install, weak=False)
+        run_id = f"{int(time.time()) % 1000:03d}"
+        try:
+            results = asyncio.run(self._run(run_id, options))
+        finally:
+            connection_created.disconnect(counter.install)
+            if not options["keep"]:
+                VehicleEntry.objects.filter(
+                    number_plate__startswith=f"LP{run_id}"
+                ).delete()
+
+        metrics = self._report(results, counter.counts, options)
+        config = {
+            key: options[key]
+            for key in ("rate", "duration", "exit_ratio", "clients", "mode", "layer")
+        }
+        if options["save_baseline"]:
+            with open(options["save_baseline"], "w") as handle:
+                json.dump({"config": config, "metrics": metrics}, handle, indent=2)
+            self.stdout.write(f"baseline written to {options['save_baseline']}")
+        if baseline is not None:
+            self._gate(config, metrics, baseline, options["tolerance"])
+
+    async def _run(self, run_id, options):
+        from config.asgi import application
+
+        # Fon vazifalarini o'zimiz boshqaramiz, shuning uchun middleware ichidagi ilova
+        app = tag_phases(application.app)
+        entry_path, exit_path = ENDPOINTS[options["mode"]]
+        image = camera_jpeg()
+        results = {"entry": [], "exit": [], "delays": [], "sent_at": {}}
+
+        async def run_publisher():
+            phase.set("broadcast")
+            await publisher.run()
+
+        publisher_task = asyncio.create_task(run_publisher())
+        clients = [
+            WebsocketCommunicator(app, "/ws/home/") for _ in range(options["clients"])
+        ]
+        for client in clients:
+            connected, _ = await client.connect(options["timeout"])
+            if not connected:
+                raise CommandError("Dashboard socket was rejected")
+            await client.receive_json_from(options["timeout"])
+            for request in INITIAL_REQUESTS:
+                await client.send_json_to({"type": request})
+            for _ in INITIAL_REQUESTS:
+                await client.receive_json_from(options["timeout"])
+        readers = [
+            asyncio.create_task(
+                read_frames(client, results["sent_at"], results["delays"])
+            )
+            for client in clients
+        ]
+
+        async def vehicle(plate):
+            results["sent_at"][(plate, "created")] = started = time.perf_counter()
+            ok = await post_event(app, entry_path, plate, image, options["timeout"])
+            results["entry"].append((time.perf_counter() - started, ok))
+            if not ok:
+                # Rad etilgan hodisa uchun kadr kutilmaydi
+                del results["sent_at"][(plate, "created")]
+                return
+            if random.random() >= options["exit_ratio"]:
+                return
+            await asyncio.sleep(options["dwell"])
+            phase.set("harness")
+            await backdate_entry(plate)
+            results["sent_at"][(plate, "updated")] = started = time.perf_counter()
+            ok = await post_event(app, exit_path, plate, image, options["timeout"])
+            results["exit"].append((time.perf_counter() - started, ok))
+            if not ok:
+                del results["sent_at"][(plate, "updated")]
+
+        # Ochiq tsikl: javob kechiksa ham keyingi kamera o'z vaqtida yuboradi
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        vehicles = []
+        for number in range(int(options["rate"] * options["duration"])):
+            await asyncio.sleep(
+                max(0, started + number / options["rate"] - loop.time())
+            )
+            vehicles.append(asyncio.create_task(vehicle(f"LP{run_id}{number:05d}")))
+        await asyncio.gather(*vehicles)
+
+        # Oxirgi paketlar yetib borishi uchun qisqa kutish
+        expected = len(results["sent_at"]) * len(clients)
+        waited = loop.time()
+        while len(results["delays"]) < expected and loop.time() - waited < 5:
+            await asyncio.sleep(0.05)
+
+        for task in [*readers, publisher_task]:
+            task.cancel()
+        await asyncio.gather(*readers, publisher_task, return_exceptions=True)
+        for client in clients:
+            await client.disconnect()
+        results["expected"] = expected
+        return results
+
+    def _report(self, results, queries, options):
+        events = len(results["entry"]) + len(results["exit"])
+        errors = sum(1 for _, ok in results["entry"] + results["exit"] if not ok)
+        entry = summary(duration for duration, _ in results["entry"])
+        exit_ = summary(duration for duration, _ in results["exit"])
+        delivery = summary(results["delays"])
+        undelivered = results["expected"] - len(results["delays"])
+
+        self.stdout.write(
+            f"{options['mode']} ingest, {options['layer']} layer, "
+            f"{options['clients']} dashboards, {options['rate']:g} entries/s "
+            f"for {options['duration']:g}s"
+        )
+        self.stdout.write(
+            f"{'':<10} {'count':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        )
+        for label, count, stats in (
+            ("entry", len(results["entry"]), entry),
+            ("exit", len(results["exit"]), exit_),
+            ("delivery", len(results["delays"]), delivery),
+        ):
+            self.stdout.write(
+                f"{label:<10} {count:>7} {stats['p50']:>8.1f} "
+                f"{stats['p95']:>8.1f} {stats['p99']:>8.1f}"
+            )
+        self.stdout.write(
+            f"errors: {errors}, undelivered frames: {undelivered} "
+            f"of {results['expected']}"
+        )
+        per_event = {
+            name: queries[name] / events if events else 0.0
+            for name in ("ingest", "broadcast")
+        }
+        self.stdout.write(
+            f"queries: ingest {queries['ingest']} ({per_event['ingest']:.1f}/event), "
+            f"broadcast {queries['broadcast']} ({per_event['broadcast']:.1f}/event), "
+            f"dashboard {queries['dashboard']}, thumbnails/other {queries['other']}"
+        )
+        self.stdout.write(
+            f"publisher: sent {publisher.sent}, coalesced {publisher.coalesced}, "
+            f"dropped {publisher.dropped}; snapshot cache: hits "
+            f"{snapshot_cache.hits}, misses {snapshot_cache.misses}, "
+            f"shared {snapshot_cache.shared}"
+        )
+        return {
+            "entry_p95_ms": entry["p95"],
+            "entry_p99_ms": entry["p99"],
+            "exit_p95_ms": exit_["p95"],
+            "exit_p99_ms": exit_["p99"],
+            "delivery_p95_ms": delivery["p95"],
+            "delivery_p99_ms": delivery["p99"],
+            "ingest_queries_per_event": per_event["ingest"],
+            "broadcast_queries_per_event": per_event["broadcast"],
+            "errors": errors,
+            "undelivered": undelivered,
+        }
+
+    def _gate(self, config, metrics, baseline, tolerance):
+        if baseline.get("config") != config:
+            self.stderr.write(
+                f"warning: baseline was recorded with {baseline.get('config')}"
+            )
+        regressions = []
+        for name, previous in baseline.get("metrics", {}).items():
+            current = metrics.get(name)
+            if current is None:
+                continue
+            limit = previous if name in COUNT_METRICS else previous * (1 + tolerance)
+            if current > limit:
+                regressions.append(f"{name}: {current:.1f} > {limit:.1f}")
+        if regressions:
+            raise CommandError("Regressed against baseline: " + "; ".join(regressions))
+        self.stdout.write(f"within {tolerance:.0%} of baseline")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from smartpark.statistics import rebuild_daily_statistics
+
+
+class Command(BaseCommand):
+    help = "Recompute DailyStatistics counters from VehicleEntry rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Rebuild a single day (YYYY-MM-DD)")
+        parser.add_argument("--from", dest="start", help="First day (YYYY-MM-DD)")
+        parser.add_argument("--to", dest="end", help="Last day (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        start = options["date"] or options["start"]
+        end = options["date"] or options["end"]
+        try:
+            start = parse_date(start) if start else None
+            end = parse_date(end) if end else None
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        with transaction.atomic():
+            rebuilt = rebuild_daily_statistics(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} day(s)"))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from smartpark.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute HourlyRollup rows from VehicleEntry rows (backfill); "
+        "each entry is counted under the car class stored when it entered"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Rebuild a single day (YYYY-MM-DD)")
+        parser.add_argument("--from", dest="start", help="First day (YYYY-MM-DD)")
+        parser.add_argument("--to", dest="end", help="Last day (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        start = options["date"] or options["start"]
+        end = options["date"] or options["end"]
+        try:
+            start = parse_date(start) if start else None
+            end = parse_date(end) if end else None
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            rebuilt = rebuild_rollups(start, end)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {rebuilt} hourly row(s) in "
+                f"{time.perf_counter() - started:.2f}s"
+            )
+        )
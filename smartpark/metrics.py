@@ -0,0 +1,276 @@
+"""
+Per-process metrics for HTTP requests and dashboard WebSocket messages.
+
+A request or message is measured inside measure(): DB queries (through a
+connection execute wrapper), file-storage writes and channel-layer sends
+made while handling it are added to its Sample, including work done in
+sync_to_async threads. Values are exposed in the Prometheus text format
+by the /metrics view; each worker process reports its own numbers.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+from .serializers import dumps_text
+
+slow_logger = logging.getLogger("smartpark.slow")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        if not values and not self.labels:
+            values = [((), 0)]
+        for key, value in sorted(values):
+            yield f"{self.name}{_labels(self.labels, key)} {_number(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # kalit -> [har bir bucket soni..., sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * len(self.buckets) + [0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[index] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(row)) for key, row in self._values.items()]
+        for key, row in sorted(values):
+            for bound, count in zip(self.buckets, row):
+                labels = _labels(self.labels, key, f'le="{_number(bound)}"')
+                yield f"{self.name}_bucket{labels} {count}"
+            labels = _labels(self.labels, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {row[-1]}"
+            yield f"{self.name}_sum{_labels(self.labels, key)} {_number(row[-2])}"
+            yield f"{self.name}_count{_labels(self.labels, key)} {row[-1]}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labels=()):
+        metric = Counter(name, documentation, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, func):
+        """Register func() -> [(name, kind, documentation, value)], read at scrape time"""
+        self._collectors.append(func)
+        return func
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for collect in self._collectors:
+            for name, kind, documentation, value in collect():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "smartpark_http_requests_total", "HTTP requests", ("route", "method", "status")
+)
+http_seconds = registry.histogram(
+    "smartpark_http_request_seconds", "HTTP request latency", ("route",)
+)
+http_queries = registry.histogram(
+    "smartpark_http_db_queries",
+    "DB queries per HTTP request",
+    ("route",),
+    QUERY_BUCKETS,
+)
+ws_messages = registry.counter(
+    "smartpark_ws_messages_total", "Dashboard WebSocket messages handled", ("type",)
+)
+ws_seconds = registry.histogram(
+    "smartpark_ws_message_seconds", "Dashboard WebSocket message latency", ("type",)
+)
+ws_queries = registry.histogram(
+    "smartpark_ws_db_queries",
+    "DB queries per WebSocket message",
+    ("type",),
+    QUERY_BUCKETS,
+)
+# Har bir qism (db, storage, channel) uchun so'rov/xabar ichida sarflangan vaqt
+part_seconds = registry.counter(
+    "smartpark_part_seconds_total",
+    "Time spent in DB queries, storage writes and channel-layer sends",
+    ("source", "name", "part"),
+)
+channel_send_seconds = registry.histogram(
+    "smartpark_channel_send_seconds", "Channel-layer group_send latency", ("topic",)
+)
+
+PARTS = ("db", "storage", "channel")
+
+
+class Sample:
+    __slots__ = ("queries", "db", "storage", "channel", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.storage = 0.0
+        self.channel = 0.0
+        self.seconds = 0.0
+
+
+_current = contextvars.ContextVar("smartpark_metrics_sample", default=None)
+
+
+@contextmanager
+def measure():
+    """Collect everything done inside the block into a new Sample"""
+    sample = Sample()
+    token = _current.set(sample)
+    started = time.perf_counter()
+    try:
+        yield sample
+    finally:
+        sample.seconds = time.perf_counter() - started
+        _current.reset(token)
+
+
+@contextmanager
+def timed(part, histogram=None, **labels):
+    """Add the block's duration to the current Sample (and histogram, if given)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        sample = _current.get()
+        if sample is not None:
+            setattr(sample, part, getattr(sample, part) + elapsed)
+        if histogram is not None:
+            histogram.observe(elapsed, **labels)
+
+
+def _query_timer(execute, sql, params, many, context):
+    sample = _current.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.queries += 1
+        sample.db += time.perf_counter() - started
+
+
+def install_query_timer(connection, **kwargs):
+    if _query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_timer)
+
+
+connection_created.connect(install_query_timer)
+
+
+def _record(source, name, sample, **fields):
+    for part in PARTS:
+        part_seconds.inc(getattr(sample, part), source=source, name=name, part=part)
+    threshold = getattr(settings, f"SLOW_{source.upper()}_SECONDS", None)
+    if threshold is not None and sample.seconds >= threshold:
+        slow_logger.warning(
+            dumps_text(
+                {
+                    "event": f"slow_{source}",
+                    source: name,
+                    **fields,
+                    "seconds": round(sample.seconds, 4),
+                    "queries": sample.queries,
+                    "db_seconds": round(sample.db, 4),
+                    "storage_seconds": round(sample.storage, 4),
+                    "channel_seconds": round(sample.channel, 4),
+                }
+            )
+        )
+
+
+def record_request(request, response, sample):
+    match = request.resolver_match
+    # Marshrut shabloni - yozuv ID lari yorliq sonini oshirmaydi
+    route = "/" + match.route if match else "unmatched"
+    http_requests.inc(route=route, method=request.method, status=response.status_code)
+    http_seconds.observe(sample.seconds, route=route)
+    http_queries.observe(sample.queries, route=route)
+    _record(
+        "request", route, sample, method=request.method, status=response.status_code
+    )
+
+
+def record_message(message_type, sample):
+    ws_messages.inc(type=message_type)
+    ws_seconds.observe(sample.seconds, type=message_type)
+    ws_queries.observe(sample.queries, type=message_type)
+    _record("message", message_type, sample)
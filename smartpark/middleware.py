@@ -0,0 +1,26 @@
+from asgiref.sync import iscoroutinefunction
+from django.utils.decorators import sync_and_async_middleware
+
+from .metrics import measure, record_request
+
+
+@sync_and_async_middleware
+def request_metrics_middleware(get_response):
+    """Record latency, DB queries and storage/channel time for every request"""
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            with measure() as sample:
+                response = await get_response(request)
+            record_request(request, response, sample)
+            return response
+
+    else:
+
+        def middleware(request):
+            with measure() as sample:
+                response = get_response(request)
+            record_request(request, response, sample)
+            return response
+
+    return middleware
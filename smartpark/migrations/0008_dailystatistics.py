@@ -0,0 +1,84 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:52
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_statistics(apps, schema_editor):
+    VehicleEntry = apps.get_model("smartpark", "VehicleEntry")
+    DailyStatistics = apps.get_model("smartpark", "DailyStatistics")
+    counts = (
+        VehicleEntry.objects.annotate(day=TruncDate("entry_time"))
+        .values("day")
+        .annotate(
+            total_entries=Count("id"),
+            total_exits=Count("id", filter=Q(exit_time__isnull=False)),
+            unpaid_entries=Count(
+                "id", filter=Q(is_paid=False, exit_time__isnull=False)
+            ),
+        )
+        .order_by("day")
+    )
+    DailyStatistics.objects.bulk_create(
+        DailyStatistics(
+            date=row["day"],
+            total_entries=row["total_entries"],
+            total_exits=row["total_exits"],
+            unpaid_entries=row["unpaid_entries"],
+        )
+        for row in counts
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("smartpark", "0007_remove_vehicleentry_is_deleted"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyStatistics",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(unique=True)),
+                ("total_entries", models.IntegerField(default=0)),
+                ("total_exits", models.IntegerField(default=0)),
+                ("unpaid_entries", models.IntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Daily Statistics",
+                "verbose_name_plural": "Daily Statistics",
+                "db_table": "daily_statistics",
+            },
+        ),
+        migrations.AddField(
+            model_name="cars",
+            name="license_file",
+            field=models.FileField(
+                blank=True,
+                help_text="Litsenziya fayli (maxsus taksi uchun)",
+                null=True,
+                upload_to="licenses/",
+            ),
+        ),
+        migrations.AddField(
+            model_name="cars",
+            name="position",
+            field=models.CharField(
+                blank=True,
+                help_text="Lavozim (bepul avtomobillar uchun)",
+                max_length=100,
+                null=True,
+            ),
+        ),
+        migrations.RunPython(backfill_daily_statistics, migrations.RunPython.noop),
+    ]
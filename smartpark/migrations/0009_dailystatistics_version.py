@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("smartpark", "0008_dailystatistics"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dailystatistics",
+            name="version",
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("smartpark", "0009_dailystatistics_version"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="vehicleentry",
+            index=models.Index(
+                condition=models.Q(("exit_time__isnull", True)),
+                fields=["number_plate"],
+                name="vehicle_entry_open_plate_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vehicleentry",
+            index=models.Index(
+                fields=["number_plate", "-entry_time"],
+                name="vehicle_entry_plate_time_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vehicleentry",
+            index=models.Index(fields=["-entry_time"], name="vehicle_entry_time_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="vehicleentry",
+            index=models.Index(
+                condition=models.Q(("exit_time__isnull", False), ("is_paid", False)),
+                fields=["entry_time", "-exit_time"],
+                name="vehicle_entry_unpaid_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("smartpark", "0010_vehicleentry_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vehicleentry",
+            name="entry_thumbnail",
+            field=models.ImageField(
+                blank=True, null=True, upload_to="thumbnails/entries/"
+            ),
+        ),
+        migrations.AddField(
+            model_name="vehicleentry",
+            name="exit_thumbnail",
+            field=models.ImageField(
+                blank=True, null=True, upload_to="thumbnails/exits/"
+            ),
+        ),
+    ]
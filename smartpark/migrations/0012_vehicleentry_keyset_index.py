@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("smartpark", "0011_vehicleentry_thumbnails"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="vehicleentry",
+            name="vehicle_entry_time_idx",
+        ),
+        migrations.AddIndex(
+            model_name="vehicleentry",
+            index=models.Index(
+                fields=["-entry_time", "-id"], name="vehicle_entry_time_id_idx"
+            ),
+        ),
+    ]
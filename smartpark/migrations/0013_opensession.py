@@ -0,0 +1,70 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:40
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_open_sessions(apps, schema_editor):
+    VehicleEntry = apps.get_model("smartpark", "VehicleEntry")
+    OpenSession = apps.get_model("smartpark", "OpenSession")
+    sessions = {}
+    # Bir raqamga bir nechta ochiq kirish bo'lsa, eng oxirgisi sessiya bo'ladi
+    rows = (
+        VehicleEntry.objects.filter(exit_time__isnull=True)
+        .order_by("-entry_time", "-id")
+        .values_list("id", "number_plate")
+    )
+    for entry_id, number_plate in rows.iterator():
+        key = re.sub(r"[^0-9A-Z]", "", number_plate.upper())
+        sessions.setdefault(key, entry_id)
+    OpenSession.objects.bulk_create(
+        [
+            OpenSession(plate_key=key, entry_id=entry_id)
+            for key, entry_id in sessions.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("smartpark", "0012_vehicleentry_keyset_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OpenSession",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("plate_key", models.CharField(max_length=15, unique=True)),
+                (
+                    "entry",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="open_session",
+                        to="smartpark.vehicleentry",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Open Session",
+                "verbose_name_plural": "Open Sessions",
+                "db_table": "open_sessions",
+            },
+        ),
+        migrations.RunPython(fill_open_sessions, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="vehicleentry",
+            name="vehicle_entry_open_plate_idx",
+        ),
+    ]
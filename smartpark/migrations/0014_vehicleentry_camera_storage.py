@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:42
+
+import smartpark.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("smartpark", "0013_opensession"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="vehicleentry",
+            name="entry_image",
+            field=models.ImageField(
+                storage=smartpark.storage.camera_storage, upload_to="entries/"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="vehicleentry",
+            name="exit_image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=smartpark.storage.camera_storage,
+                upload_to="exits/",
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("smartpark", "0014_vehicleentry_camera_storage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vehicleentry",
+            name="is_disputed",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:46
+
+import re
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+# open_sessions.plate_key bilan bir xil; migratsiya ilova kodiga bog'lanmaydi
+NOT_PLATE_CHARS = re.compile(r"[^0-9A-Z]")
+
+
+def normalize_plates(apps, schema_editor):
+    """
+    Store every plate in plate_key form, merging cars that become equal.
+
+    The import upserts on the normalized plate, so '01 a 123 bc' and
+    '01A123BC' must already be one row when the unique key is added.
+    """
+    Cars = apps.get_model("smartpark", "Cars")
+    groups = defaultdict(list)
+    for car in Cars.objects.order_by("id"):
+        key = NOT_PLATE_CHARS.sub("", car.number_plate.upper()) or car.number_plate
+        groups[key].append(car)
+    for key, rows in groups.items():
+        # plate_cache bilan bir xil: eng kichik id qoladi, birortasi bloklangan bo'lsa - bloklangan
+        keep = rows[0]
+        if len(rows) == 1 and keep.number_plate == key:
+            continue
+        keep.number_plate = key
+        keep.is_blocked = any(row.is_blocked for row in rows)
+        if not keep.license_file:
+            keep.license_file = next(
+                (row.license_file for row in rows if row.license_file),
+                keep.license_file,
+            )
+        Cars.objects.filter(id__in=[row.id for row in rows[1:]]).delete()
+        keep.save()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("smartpark", "0015_vehicleentry_is_disputed"),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_plates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="cars",
+            name="number_plate",
+            field=models.CharField(max_length=15, unique=True),
+        ),
+    ]
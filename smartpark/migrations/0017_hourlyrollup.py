@@ -0,0 +1,54 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("smartpark", "0016_cars_unique_number_plate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HourlyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hour", models.DateTimeField()),
+                (
+                    "car_class",
+                    models.CharField(
+                        choices=[
+                            ("free", "Free"),
+                            ("special_taxi", "Special Taxi"),
+                            ("normal", "Normal"),
+                        ],
+                        max_length=12,
+                    ),
+                ),
+                ("entries", models.IntegerField(default=0)),
+                ("exits", models.IntegerField(default=0)),
+                ("revenue", models.BigIntegerField(default=0)),
+                ("paid_revenue", models.BigIntegerField(default=0)),
+                ("occupied_seconds", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Hourly Rollup",
+                "verbose_name_plural": "Hourly Rollups",
+                "db_table": "hourly_rollups",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("hour", "car_class"),
+                        name="hourly_rollup_hour_class_uniq",
+                    )
+                ],
+            },
+        ),
+    ]
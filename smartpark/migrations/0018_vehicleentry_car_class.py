@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:17
+
+from django.db import migrations, models
+
+
+def classify_entries(apps, schema_editor):
+    """
+    Backfill the class of existing entries from the current Cars table.
+
+    The class a car had at the time was never recorded, so this is the
+    same guess the rollups made so far; new entries store their own.
+    """
+    Cars = apps.get_model("smartpark", "Cars")
+    VehicleEntry = apps.get_model("smartpark", "VehicleEntry")
+    # rollups.car_class bilan bir xil: bepul taksidan ustun
+    for car_class, filters in (
+        ("special_taxi", {"is_special_taxi": True}),
+        ("free", {"is_free": True}),
+    ):
+        plates = Cars.objects.filter(**filters).values("number_plate")
+        VehicleEntry.objects.filter(number_plate__in=plates).update(car_class=car_class)
+    VehicleEntry.objects.filter(car_class="").update(car_class="normal")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("smartpark", "0017_hourlyrollup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vehicleentry",
+            name="car_class",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("free", "Free"),
+                    ("special_taxi", "Special Taxi"),
+                    ("normal", "Normal"),
+                ],
+                max_length=12,
+            ),
+        ),
+        migrations.RunPython(classify_entries, migrations.RunPython.noop),
+    ]
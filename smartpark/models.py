@@ -2,6 +2,9 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 
+from .storage import camera_storage
+from .tariffs import tariff
+
 
 class Role(models.TextChoices):
     OPERATOR = "operator"
@@ -21,14 +24,76 @@ class CustomUser(AbstractUser):
         verbose_name_plural = "Custom Users"
 
 
+class CarClass(models.TextChoices):
+    FREE = "free"
+    SPECIAL_TAXI = "special_taxi"
+    NORMAL = "normal"
+
+
+# Signallar o'tishni aniqlash uchun shu maydonlarning oldingi qiymatini saqlaydi
+TRACKED_FIELDS = (
+    "entry_time",
+    "exit_time",
+    "is_paid",
+    "total_amount",
+    "car_class",
+    "number_plate",
+)
+
+
 class VehicleEntry(models.Model):
     number_plate = models.CharField(max_length=15)
     entry_time = models.DateTimeField(default=timezone.now)
     exit_time = models.DateTimeField(blank=True, null=True)
-    entry_image = models.ImageField(upload_to="entries/")
-    exit_image = models.ImageField(upload_to="exits/", blank=True, null=True)
+    entry_image = models.ImageField(upload_to="entries/", storage=camera_storage)
+    exit_image = models.ImageField(
+        upload_to="exits/", storage=camera_storage, blank=True, null=True
+    )
+    # Dashboard uchun siqilgan nusxalar, asl rasmlar dalil sifatida saqlanadi
+    entry_thumbnail = models.ImageField(
+        upload_to="thumbnails/entries/", blank=True, null=True
+    )
+    exit_thumbnail = models.ImageField(
+        upload_to="thumbnails/exits/", blank=True, null=True
+    )
     total_amount = models.IntegerField(blank=True, null=True)
     is_paid = models.BooleanField(default=False)
+    # E'tirozli kirish rasmlari retention (kichraytirish, arxiv) dan ozod
+    is_disputed = models.BooleanField(default=False)
+    # Kirish paytidagi toifa: Cars keyin o'zgarsa ham rollup'lar shu toifada qoladi
+    car_class = models.CharField(max_length=12, choices=CarClass.choices, blank=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Keep the loaded state so signals can tell which transition happened
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def tracked_state(self):
+        """Return (entry_time, exit_time, is_paid) as last loaded or saved"""
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None or not {"entry_time", "exit_time", "is_paid"} <= set(
+            loaded
+        ):
+            return None
+        return loaded["entry_time"], loaded["exit_time"], loaded["is_paid"]
+
+    def load_tracked_state(self):
+        """Read tracked fields that were not loaded (.only(), bare instance) from the row"""
+        loaded = getattr(self, "_loaded_values", None) or {}
+        missing = [name for name in TRACKED_FIELDS if name not in loaded]
+        if not missing or self.pk is None:
+            return
+        row = type(self)._base_manager.filter(pk=self.pk).values(*missing).first()
+        if row is not None:
+            self._loaded_values = {**loaded, **row}
+            # Kechiktirilgan maydonlar o'zgarmagan - har biri uchun alohida so'rov bo'lmasin
+            for name, value in row.items():
+                self.__dict__.setdefault(name, value)
+
+    def current_state(self):
+        return self.entry_time, self.exit_time, self.is_paid
 
     def __str__(self):
         # Ensure timezone-aware formatting
@@ -37,25 +102,7 @@ class VehicleEntry(models.Model):
 
     def calculate_amount(self):
         """Calculate parking fee based on time spent"""
-        if not self.exit_time:
-            return 0
-
-        from config.settings import HOUR_PRICE
-
-        # Ensure both times are timezone-aware
-        entry_time = self.entry_time
-        exit_time = self.exit_time
-
-        duration = exit_time - entry_time
-        hours = duration.total_seconds() / 3600
-
-        # Round up to the nearest hour for billing
-        hours = max(1, round(hours + 0.5))  # At least 1 hour, round up
-
-        # Calculate total amount using HOUR_PRICE
-        total_amount = int(hours * HOUR_PRICE)
-
-        return total_amount
+        return tariff.price(self.entry_time, self.exit_time)
 
     def mark_as_paid(self):
         """Mark this entry as paid"""
@@ -66,10 +113,100 @@ class VehicleEntry(models.Model):
         db_table = "vehicle_entries"
         verbose_name = "Vehicle Entry"
         verbose_name_plural = "Vehicle Entries"
+        indexes = [
+            # Maxsus taksining bugungi tashriflari
+            models.Index(
+                fields=["number_plate", "-entry_time"],
+                name="vehicle_entry_plate_time_idx",
+            ),
+            # Kunlik ro'yxatlar, (entry_time, id) bo'yicha keyset sahifalash
+            models.Index(
+                fields=["-entry_time", "-id"], name="vehicle_entry_time_id_idx"
+            ),
+            # To'lanmagan chiqishlar (unpaid sahifasi, latest unpaid)
+            models.Index(
+                fields=["entry_time", "-exit_time"],
+                condition=models.Q(is_paid=False, exit_time__isnull=False),
+                name="vehicle_entry_unpaid_idx",
+            ),
+        ]
+
+
+class OpenSession(models.Model):
+    """A vehicle that is inside right now; the row is deleted when it exits"""
+
+    # Normallashtirilgan raqam (open_sessions.plate_key), ichkarida bitta sessiya
+    plate_key = models.CharField(max_length=15, unique=True)
+    entry = models.OneToOneField(
+        VehicleEntry, on_delete=models.CASCADE, related_name="open_session"
+    )
+
+    def __str__(self):
+        return self.plate_key
+
+    class Meta:
+        db_table = "open_sessions"
+        verbose_name = "Open Session"
+        verbose_name_plural = "Open Sessions"
+
+
+class DailyStatistics(models.Model):
+    """Counters for one day of VehicleEntry rows, maintained by signals"""
+
+    date = models.DateField(unique=True)
+    total_entries = models.IntegerField(default=0)
+    total_exits = models.IntegerField(default=0)
+    unpaid_entries = models.IntegerField(default=0)
+    # Har bir o'zgarishda oshadi - dashboard delta ketma-ketligi raqami
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.date}: {self.total_entries}/{self.total_exits}"
+
+    def as_dict(self):
+        return {
+            "total_entries": self.total_entries,
+            "total_exits": self.total_exits,
+            "total_inside": self.total_entries - self.total_exits,
+            "unpaid_entries": self.unpaid_entries,
+        }
+
+    class Meta:
+        db_table = "daily_statistics"
+        verbose_name = "Daily Statistics"
+        verbose_name_plural = "Daily Statistics"
+
+
+class HourlyRollup(models.Model):
+    """Counters for one local hour and car class, maintained by signals"""
+
+    # Mahalliy soat boshi
+    hour = models.DateTimeField()
+    car_class = models.CharField(max_length=12, choices=CarClass.choices)
+    entries = models.IntegerField(default=0)
+    exits = models.IntegerField(default=0)
+    # Shu soatda chiqqanlarga hisoblangan summa va uning to'langan qismi
+    revenue = models.BigIntegerField(default=0)
+    paid_revenue = models.BigIntegerField(default=0)
+    # Yopilgan sessiyalarning shu soatdagi turish vaqti (o'rtacha bandlik = /3600)
+    occupied_seconds = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.hour:%Y-%m-%d %H:00} {self.car_class}: {self.entries}/{self.exits}"
+
+    class Meta:
+        db_table = "hourly_rollups"
+        verbose_name = "Hourly Rollup"
+        verbose_name_plural = "Hourly Rollups"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["hour", "car_class"], name="hourly_rollup_hour_class_uniq"
+            ),
+        ]
 
 
 class Cars(models.Model):
-    number_plate = models.CharField(max_length=15)
+    number_plate = models.CharField(max_length=15, unique=True)
     is_free = models.BooleanField(default=False)
     is_special_taxi = models.BooleanField(default=False)
     is_blocked = models.BooleanField(default=False)
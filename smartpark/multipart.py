@@ -0,0 +1,236 @@
+import io
+
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig
+from django.core.files.base import File
+from django.utils.http import parse_header_parameters
+
+READ_CHUNK_SIZE = 64 * 1024
+
+PLATE_OPEN_TAG = b"<licensePlate>"
+PLATE_CLOSE_TAG = b"</licensePlate>"
+
+
+class Part:
+    """One multipart section, stored as offsets into the parser buffer"""
+
+    __slots__ = ("headers", "start", "end")
+
+    def __init__(self, headers, start, end):
+        self.headers = headers
+        self.start = start
+        self.end = end
+
+    @property
+    def content_type(self):
+        return self.headers.get("content-type", "")
+
+
+class MultipartParser:
+    """
+    Hikvision ANPR multipart so'rovini bitta bufer ichida bo'laklab tahlil qiladi.
+
+    Chunks are copied once into a preallocated buffer; part boundaries are
+    located as data arrives and bodies are handed out as memoryviews.
+    """
+
+    def __init__(self, boundary, size_hint=0):
+        # Without a boundary the body is buffered as-is and only searched
+        self.delimiter = b"--" + boundary if boundary else None
+        self.parts = []
+        self._buffer = bytearray(size_hint)
+        self._length = 0
+        self._scan_from = 0
+        self._delimiters = []
+        self._closed = False
+
+    @property
+    def bytes_buffered(self):
+        return self._length
+
+    def feed(self, chunk):
+        end = self._length + len(chunk)
+        if end <= len(self._buffer):
+            self._buffer[self._length : end] = chunk
+        else:
+            # Content-Length yo'q yoki noto'g'ri - buferni kengaytiramiz
+            self._buffer[self._length :] = chunk
+        self._length = end
+        self._scan()
+
+    def close(self):
+        """Stop accepting data, flush an unterminated last part and trim the buffer"""
+        if not self._closed:
+            del self._buffer[self._length :]
+            self._closed = True
+            if self._delimiters:
+                last = self._delimiters[-1] + len(self.delimiter)
+                # Yopuvchi "--boundary--" kelmagan bo'lsa, oxirgi qism ham olinadi
+                if self._buffer[last : last + 2] != b"--":
+                    self._add_part(self._delimiters[-1], self._length)
+
+    def view(self, part):
+        return memoryview(self._buffer)[part.start : part.end]
+
+    def find_part(self, content_type):
+        for part in self.parts:
+            if part.content_type.startswith(content_type):
+                return part
+        return None
+
+    def find_plate(self):
+        """Return the first <licensePlate> value outside of image parts"""
+        sections = [
+            (part.start, part.end)
+            for part in self.parts
+            if not part.content_type.startswith("image/")
+        ]
+        if not self._delimiters:
+            # Boundary topilmadi - butun tanadan qidiramiz
+            sections = [(0, self._length)]
+        for start, end in sections:
+            open_at = self._buffer.find(PLATE_OPEN_TAG, start, end)
+            if open_at < 0:
+                continue
+            value_start = open_at + len(PLATE_OPEN_TAG)
+            close_at = self._buffer.find(PLATE_CLOSE_TAG, value_start, end)
+            if close_at < 0:
+                continue
+            value = bytes(self._buffer[value_start:close_at])
+            return value.decode("utf-8", errors="ignore")
+        return None
+
+    def _scan(self):
+        if self.delimiter is None:
+            return
+        while True:
+            found = self._buffer.find(self.delimiter, self._scan_from, self._length)
+            if found < 0:
+                # Keep a tail overlap so a delimiter split across chunks is found
+                self._scan_from = max(
+                    self._scan_from, self._length - len(self.delimiter) + 1
+                )
+                return
+            if self._delimiters:
+                self._add_part(self._delimiters[-1], found)
+            self._delimiters.append(found)
+            self._scan_from = found + len(self.delimiter)
+
+    def _add_part(self, previous, current):
+        buffer = self._buffer
+        line_end = buffer.find(b"\r\n", previous + len(self.delimiter), current)
+        if line_end < 0:
+            return
+        headers_start = line_end + 2
+        headers_end = buffer.find(b"\r\n\r\n", headers_start, current)
+        if headers_end < 0:
+            return
+        body_end = current
+        if buffer[body_end - 2 : body_end] == b"\r\n":
+            body_end -= 2
+        self.parts.append(
+            Part(
+                parse_part_headers(bytes(buffer[headers_start:headers_end])),
+                headers_end + 4,
+                max(body_end, headers_end + 4),
+            )
+        )
+
+
+def parse_part_headers(raw):
+    headers = {}
+    for line in raw.decode("latin-1").split("\r\n"):
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+class ANPREvent:
+    """Plate number and JPEG extracted from a camera push"""
+
+    def __init__(self, parser, boundary):
+        self.parser = parser
+        self.boundary = boundary
+        self.number_plate = parser.find_plate()
+        image_part = parser.find_part("image/jpeg") if boundary else None
+        self.image = parser.view(image_part) if image_part else None
+
+
+def read_anpr_event(request, chunk_size=READ_CHUNK_SIZE):
+    """Read the request stream once and parse it without touching request.body"""
+    content_type = request.headers.get("Content-Type", "")
+    _, params = parse_header_parameters(content_type)
+    boundary = params.get("boundary", "").encode("latin-1") or None
+
+    try:
+        content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        content_length = 0
+    if (
+        settings.DATA_UPLOAD_MAX_MEMORY_SIZE is not None
+        and content_length > settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+    ):
+        raise RequestDataTooBig(
+            "Request body exceeded settings.DATA_UPLOAD_MAX_MEMORY_SIZE."
+        )
+
+    # Boundary bo'lmasa ham raqamni qidirish uchun tanani o'qiymiz
+    parser = MultipartParser(boundary, size_hint=content_length)
+    while True:
+        chunk = request.read(chunk_size)
+        if not chunk:
+            break
+        parser.feed(chunk)
+    parser.close()
+    return ANPREvent(parser, boundary)
+
+
+class MemoryViewFile(File):
+    """File wrapper that streams a memoryview to storage one chunk at a time"""
+
+    def __init__(self, view, name):
+        super().__init__(None, name)
+        self.view = view
+        self.size = len(view)
+
+    def __bool__(self):
+        return True
+
+    def open(self, mode=None):
+        self.seek(0)
+        return self
+
+    def close(self):
+        pass
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.tell()
+        elif whence == io.SEEK_END:
+            offset += self.size
+        elif whence != io.SEEK_SET:
+            raise ValueError(f"invalid whence ({whence})")
+        if offset < 0:
+            raise ValueError(f"negative seek position {offset}")
+        self._position = offset
+        return offset
+
+    def tell(self):
+        return getattr(self, "_position", 0)
+
+    def read(self, size=-1):
+        position = min(self.tell(), self.size)
+        end = self.size if size is None or size < 0 else position + size
+        self._position = min(end, self.size)
+        return bytes(self.view[position : self._position])
+
+    def chunks(self, chunk_size=None):
+        # Bir vaqtda faqat bitta bo'lak nusxalanadi, butun rasm emas
+        chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        self.seek(0)
+        for start in range(0, self.size, chunk_size):
+            yield bytes(self.view[start : start + chunk_size])
+
+    def multiple_chunks(self, chunk_size=None):
+        return self.size > (chunk_size or self.DEFAULT_CHUNK_SIZE)
@@ -0,0 +1,225 @@
+"""
+Registry of the vehicles that are inside the parking right now.
+
+Every open VehicleEntry has one OpenSession row keyed by the normalized
+plate. The unique key makes a second entry for the same car fail in the
+database even when two cameras fire at once, and closing a session is a
+single DELETE that only one exit push can win. Lookups do not depend on
+the entry date, so a car parked over midnight exits like any other.
+
+The plate -> entry id map is mirrored in Redis (or in process memory when
+no Redis is configured) so that the common case, a car that is not
+inside, needs no query. The mirror is only a hint: a miss is confirmed by
+the unique key on insert and a hit is checked against the database.
+
+When an exit read has no exact session, match_open_entry() falls back to
+the fuzzy plate index in plate_match.py and reports how confident the
+match is.
+"""
+
+import logging
+import re
+import threading
+
+import redis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .models import OpenSession, VehicleEntry
+from .plate_match import load_open_plates, open_plates
+
+logger = logging.getLogger(__name__)
+
+MIRROR_KEY = "smartpark:open_sessions"
+
+_NOT_PLATE_CHARS = re.compile(r"[^0-9A-Z]")
+
+
+def plate_key(number_plate):
+    """'01 a 123 bc' and '01A123BC' are the same car"""
+    return _NOT_PLATE_CHARS.sub("", number_plate.upper())
+
+
+class AlreadyInside(Exception):
+    pass
+
+
+class MemoryMirror:
+    """Per-process map for runserver and setups without Redis"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def set(self, key, entry_id):
+        with self._lock:
+            self._entries[key] = entry_id
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class RedisMirror:
+    """Map shared by all workers, kept in one Redis hash"""
+
+    def __init__(self, url):
+        # Redis sekinlashsa kamera so'rovi kutib qolmasin - bazaga qaytamiz
+        self._redis = redis.from_url(
+            url, socket_timeout=0.5, socket_connect_timeout=0.5
+        )
+
+    def get(self, key):
+        try:
+            value = self._redis.hget(MIRROR_KEY, key)
+        except redis.RedisError:
+            logger.exception("Cannot read the open sessions mirror")
+            return None
+        return None if value is None else int(value)
+
+    def set(self, key, entry_id):
+        try:
+            self._redis.hset(MIRROR_KEY, key, entry_id)
+        except redis.RedisError:
+            logger.exception("Cannot update the open sessions mirror")
+
+    def discard(self, key):
+        try:
+            self._redis.hdel(MIRROR_KEY, key)
+        except redis.RedisError:
+            logger.exception("Cannot update the open sessions mirror")
+
+
+def _build_mirror():
+    url = getattr(settings, "OPEN_SESSIONS_REDIS_URL", "")
+    if url:
+        return RedisMirror(url)
+    return MemoryMirror()
+
+
+mirror = _build_mirror()
+
+
+def _remember(key, entry_id):
+    mirror.set(key, entry_id)
+    open_plates.add(key, entry_id)
+
+
+def _forget(key):
+    mirror.discard(key)
+    open_plates.discard(key)
+
+
+def is_inside(number_plate):
+    """Whether the plate has an open session; a mirror miss is trusted"""
+    key = plate_key(number_plate)
+    if mirror.get(key) is None:
+        # Xato bo'lsa ham open_session() dagi unique kalit ushlaydi
+        return False
+    if OpenSession.objects.filter(plate_key=key).exists():
+        return True
+    _forget(key)
+    return False
+
+
+def open_session(**fields):
+    """Create the VehicleEntry and its OpenSession, or raise AlreadyInside"""
+    key = plate_key(fields["number_plate"])
+    try:
+        with transaction.atomic():
+            entry = VehicleEntry.objects.create(**fields)
+            try:
+                OpenSession.objects.create(plate_key=key, entry=entry)
+            except IntegrityError:
+                # Blok tashqarisiga chiqqan xato kirish yozuvini ham bekor qiladi
+                raise AlreadyInside(fields["number_plate"]) from None
+    except AlreadyInside:
+        discard_image("entry_image", entry.entry_image.name)
+        raise
+    transaction.on_commit(lambda: _remember(key, entry.id))
+    return entry
+
+
+def discard_image(field_name, name):
+    """Delete the photo of an entry that was not saved unless another entry uses it"""
+    # Bir xil rasm (kamera qayta yuborsa) bitta faylni bo'lishadi
+    if (
+        not name
+        or VehicleEntry.objects.filter(
+            Q(entry_image=name) | Q(exit_image=name)
+        ).exists()
+    ):
+        return
+    try:
+        VehicleEntry._meta.get_field(field_name).storage.delete(name)
+    except OSError:
+        logger.warning("Could not delete orphaned image %s", name, exc_info=True)
+
+
+def find_open_entry(number_plate):
+    """The entry of the car's open session, whichever day it started on"""
+    key = plate_key(number_plate)
+    entry_id = mirror.get(key)
+    if entry_id is not None:
+        entry = VehicleEntry.objects.filter(pk=entry_id, exit_time__isnull=True).first()
+        if entry is not None and plate_key(entry.number_plate) == key:
+            return entry
+    session = OpenSession.objects.select_related("entry").filter(plate_key=key).first()
+    if session is None:
+        if entry_id is not None:
+            _forget(key)
+        return None
+    _remember(key, session.entry_id)
+    return session.entry
+
+
+def close_session(entry):
+    """Drop the entry's open session; False if another exit already closed it"""
+    deleted, _ = OpenSession.objects.filter(entry_id=entry.id).delete()
+    # signals.py shu belgiga qarab sessiyani ikkinchi marta o'chirmaydi
+    entry._session_closed = True
+    key = plate_key(entry.number_plate)
+    transaction.on_commit(lambda: _forget(key))
+    return bool(deleted)
+
+
+def match_open_entry(number_plate):
+    """
+    (entry, confidence) of the open session that best fits the read plate.
+
+    An exact match has confidence 1.0; otherwise the closest plate inside
+    is returned with its plate_match confidence, or (None, 0.0).
+    """
+    entry = find_open_entry(number_plate)
+    if entry is not None:
+        return entry, 1.0
+    match = load_open_plates().best_match(plate_key(number_plate))
+    if match is None:
+        return None, 0.0
+    session = (
+        OpenSession.objects.select_related("entry")
+        .filter(plate_key=match.plate_key)
+        .first()
+    )
+    if session is None:
+        # Boshqa worker yopgan sessiya - indeksdan olib tashlaymiz
+        open_plates.discard(match.plate_key)
+        return None, 0.0
+    return session.entry, match.confidence
+
+
+async def ais_inside(number_plate):
+    return await sync_to_async(is_inside)(number_plate)
+
+
+async def aopen_session(**fields):
+    return await sync_to_async(open_session)(**fields)
+
+
+async def amatch_open_entry(number_plate):
+    return await sync_to_async(match_open_entry)(number_plate)
@@ -0,0 +1,85 @@
+import asyncio
+import itertools
+import logging
+from collections import OrderedDict
+
+from .metrics import registry
+from .serializers import dumps_text
+
+logger = logging.getLogger(__name__)
+
+# Bitta mijoz uchun navbatdagi kadrlar chegarasi
+OUTBOX_SIZE = 200
+# Shu oyna ichida kelgan snapshotlar bir-birini almashtiradi
+COALESCE_WINDOW_SECONDS = 0.05
+RESYNC_KEY = "resync"
+
+outbox_dropped = registry.counter(
+    "smartpark_outbox_dropped_frames_total",
+    "Frames dropped from full dashboard outboxes before a resync",
+)
+
+
+class Outbox:
+    """
+    Bounded send queue for one WebSocket connection.
+
+    Channel-layer handlers only enqueue, so the consumer keeps draining its
+    channel however slow the socket is and a slow tablet never fills its
+    channel-layer capacity. A frame sent with a key replaces the queued
+    frame with the same key (a superseded snapshot). When the queue is full
+    it is cleared and the client is asked to resync from a fresh snapshot.
+    """
+
+    def __init__(self, send, maxsize=OUTBOX_SIZE, window=COALESCE_WINDOW_SECONDS):
+        self._send = send
+        self._frames = OrderedDict()
+        self._keys = itertools.count()
+        self._ready = asyncio.Event()
+        self._task = None
+        self.maxsize = maxsize
+        self.window = window
+        self.sent = 0
+        self.superseded = 0
+        self.overflowed = 0
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def put(self, text, key=None):
+        """Queue a ready JSON frame; never blocks"""
+        if key is not None and key in self._frames:
+            del self._frames[key]
+            self.superseded += 1
+        elif len(self._frames) >= self.maxsize:
+            dropped = len(self._frames)
+            self.overflowed += dropped
+            outbox_dropped.inc(dropped)
+            self._frames.clear()
+            self._frames[RESYNC_KEY] = dumps_text({"type": RESYNC_KEY})
+            logger.warning(
+                "Outbox full, dropped %d frames and asked for resync", dropped
+            )
+        if key is None:
+            key = next(self._keys)
+        self._frames[key] = text
+        self._ready.set()
+
+    async def _run(self):
+        while True:
+            await self._ready.wait()
+            await asyncio.sleep(self.window)
+            self._ready.clear()
+            while self._frames:
+                _, text = self._frames.popitem(last=False)
+                await self._send(text_data=text)
+                self.sent += 1
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from .background import register_worker_task
+from .open_sessions import plate_key
+from .publisher import publish
+
+INVALIDATION_GROUP = "plate_cache"
+INVALIDATION_MESSAGE = "plate_cache.invalidate"
+
+# Fan-out xabari yo'qolsa ham kesh shu vaqtdan keyin yangilanadi
+MAX_AGE_SECONDS = 300
+
+WORKER_ID = uuid.uuid4().hex
+
+CarPolicy = namedtuple("CarPolicy", ["is_free", "is_special_taxi", "is_blocked"])
+
+
+class PlatePolicyCache:
+    """
+    Per-worker read-through cache of the Cars table keyed by number plate.
+
+    The whole table is loaded on the first miss, so a plate that is absent
+    from the cache is simply not registered and needs no query. Cars rows
+    are stored as open_sessions.plate_key, so lookups are normalized the
+    same way and a spaced or lowercase camera read still finds its car.
+    """
+
+    def __init__(self):
+        self._policies = None
+        self._loaded_at = 0.0
+        # Har bir invalidate() da oshadi; o'qish davomida o'zgarsa natija keshlanmaydi
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, number_plate):
+        policies = self._fresh_policies()
+        if policies is None:
+            policies = self._load()
+        return policies.get(plate_key(number_plate))
+
+    async def aget(self, number_plate):
+        """Like get(), but only leaves the event loop when the table must be reloaded"""
+        policies = self._fresh_policies()
+        if policies is None:
+            policies = await sync_to_async(self._load)()
+        return policies.get(plate_key(number_plate))
+
+    def _fresh_policies(self):
+        policies = self._policies
+        if policies is None or time.monotonic() - self._loaded_at > MAX_AGE_SECONDS:
+            return None
+        return policies
+
+    def invalidate(self):
+        self._generation += 1
+        self._policies = None
+
+    def _load(self):
+        with self._lock:
+            if (
+                self._policies is not None
+                and time.monotonic() - self._loaded_at <= MAX_AGE_SECONDS
+            ):
+                return self._policies
+            generation = self._generation
+            policies = self._read_table()
+            if generation == self._generation:
+                self._policies = policies
+                self._loaded_at = time.monotonic()
+            return policies
+
+    def _read_table(self):
+        from .models import Cars
+
+        rows = Cars.objects.values_list(
+            "number_plate", "is_free", "is_special_taxi", "is_blocked"
+        )
+        return {number_plate: CarPolicy(*flags) for number_plate, *flags in rows}
+
+
+plate_cache = PlatePolicyCache()
+
+
+def get_car_policy(number_plate):
+    """Return the CarPolicy for a plate, or None if it is not in the Cars table"""
+    return plate_cache.get(number_plate)
+
+
+async def aget_car_policy(number_plate):
+    return await plate_cache.aget(number_plate)
+
+
+def invalidate_plate_cache():
+    """Drop this worker's cache and the other workers' once the change commits"""
+    # Commit'dan oldin tozalansa, boshqa thread eski qatorlarni qayta keshlab qo'yadi
+    transaction.on_commit(plate_cache.invalidate)
+    publish(
+        INVALIDATION_GROUP,
+        {"type": INVALIDATION_MESSAGE, "origin": WORKER_ID},
+        coalesce_key=INVALIDATION_MESSAGE,
+    )
+
+
+@register_worker_task
+async def listen_for_invalidations():
+    """Drop the local cache whenever another worker changes the Cars table"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    channel = await channel_layer.new_channel()
+    while True:
+        # Guruh a'zoligi muddati tugamasligi uchun vaqti-vaqti bilan yangilaymiz
+        await channel_layer.group_add(INVALIDATION_GROUP, channel)
+        try:
+            message = await asyncio.wait_for(channel_layer.receive(channel), 3600)
+        except asyncio.TimeoutError:
+            continue
+        if message.get("type") == INVALIDATION_MESSAGE:
+            if message.get("origin") != WORKER_ID:
+                plate_cache.invalidate()
@@ -0,0 +1,172 @@
+"""
+Fuzzy matching of ANPR reads against the plates of vehicles inside.
+
+Cameras confuse look-alike characters (O/0, B/8, I/1, ...), so an exit
+read can differ from the entry read. Plates are compared with an edit
+distance where swapping look-alikes is cheap, and confidence is
+1 - distance / plate length: a single O/0 swap in an 8-character plate
+scores 0.97, an arbitrary wrong character 0.875.
+
+Candidates come from a bigram index over plates with look-alikes folded
+to one character, so only plates that share most of their bigrams with
+the read are scored, even with thousands of cars inside. The index is
+per worker: it is updated on commit by open_sessions and reloaded from
+the open_sessions table when it gets old, so it also sees sessions opened
+by other workers.
+"""
+
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+# Bir-biriga o'xshash belgilar; har guruh birinchi belgiga keltiriladi
+CONFUSABLE_GROUPS = ("0ODQ", "1IL", "2Z", "5S", "6G", "8B")
+CONFUSABLE_COST = 0.25
+
+# Boshqa worker ochgan sessiyalar shu vaqtdan kechiktirmay ko'rinadi
+MAX_AGE_SECONDS = 30
+MAX_CANDIDATES = 20
+
+_FOLD = {char: group[0] for group in CONFUSABLE_GROUPS for char in group}
+
+PlateMatch = namedtuple("PlateMatch", ["plate_key", "entry_id", "confidence"])
+
+
+def fold(key):
+    """Plate key with look-alike characters replaced by one of them"""
+    return "".join(_FOLD.get(char, char) for char in key)
+
+
+def bigrams(folded):
+    # Chetlardagi belgilar ham hisobga olinishi uchun ^ va $ qo'shiladi
+    padded = f"^{folded}$"
+    return {padded[i : i + 2] for i in range(len(padded) - 1)}
+
+
+def distance(a, b):
+    """Edit distance where a look-alike substitution costs CONFUSABLE_COST"""
+    previous = [float(j) for j in range(len(b) + 1)]
+    for i, char_a in enumerate(a, 1):
+        current = [float(i)]
+        folded_a = _FOLD.get(char_a, char_a)
+        for j, char_b in enumerate(b, 1):
+            if char_a == char_b:
+                cost = 0.0
+            elif folded_a == _FOLD.get(char_b, char_b):
+                cost = CONFUSABLE_COST
+            else:
+                cost = 1.0
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            )
+        previous = current
+    return previous[-1]
+
+
+def confidence(a, b):
+    longest = max(len(a), len(b))
+    if not longest:
+        return 0.0
+    return max(0.0, 1 - distance(a, b) / longest)
+
+
+class PlateIndex:
+    """Bigram index of open session plate keys -> entry ids"""
+
+    def __init__(self):
+        self._entries = {}
+        self._grams = defaultdict(set)
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, key, entry_id):
+        with self._lock:
+            self._add(key, entry_id)
+
+    def discard(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def replace(self, rows):
+        """Rebuild the index from (plate_key, entry_id) rows"""
+        rows = list(rows)
+        with self._lock:
+            self._entries = {}
+            self._grams = defaultdict(set)
+            for key, entry_id in rows:
+                self._add(key, entry_id)
+            self._loaded_at = time.monotonic()
+
+    def _add(self, key, entry_id):
+        self._entries[key] = entry_id
+        for gram in bigrams(fold(key)):
+            self._grams[gram].add(key)
+
+    def _discard(self, key):
+        if self._entries.pop(key, None) is None:
+            return
+        for gram in bigrams(fold(key)):
+            keys = self._grams.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._grams[gram]
+
+    def is_stale(self):
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at > MAX_AGE_SECONDS
+        )
+
+    def best_match(self, key):
+        """
+        The closest indexed plate as a PlateMatch, or None.
+
+        When two plates are equally close the read cannot tell them apart
+        and the confidence is halved, so the exit flow does not pick one.
+        """
+        if not key:
+            return None
+        grams = bigrams(fold(key))
+        shared = defaultdict(int)
+        with self._lock:
+            if key in self._entries:
+                return PlateMatch(key, self._entries[key], 1.0)
+            for gram in grams:
+                for candidate in self._grams.get(gram, ()):
+                    shared[candidate] += 1
+            # Bitta xato belgi ko'pi bilan ikkita bigramni buzadi
+            minimum = max(1, len(grams) - 4)
+            candidates = sorted(
+                (count, candidate)
+                for candidate, count in shared.items()
+                if count >= minimum
+            )[-MAX_CANDIDATES:]
+            scored = sorted(
+                (
+                    (confidence(key, candidate), candidate)
+                    for _, candidate in candidates
+                ),
+                reverse=True,
+            )
+            if not scored:
+                return None
+            score, best = scored[0]
+            if len(scored) > 1 and scored[1][0] == score:
+                score /= 2
+            return PlateMatch(best, self._entries[best], score)
+
+
+open_plates = PlateIndex()
+
+
+def load_open_plates():
+    """Reload the index from the open_sessions table if it is old"""
+    from .models import OpenSession
+
+    if open_plates.is_stale():
+        open_plates.replace(OpenSession.objects.values_list("plate_key", "entry_id"))
+    return open_plates
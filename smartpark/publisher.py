@@ -0,0 +1,143 @@
+import asyncio
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from .background import register_worker_task
+from .event_log import record_event
+from .metrics import channel_send_seconds, registry, timed
+
+logger = logging.getLogger(__name__)
+
+# Kamera so'rovlari navbatga qo'yadi, shu oyna ichidagilar bitta paketda ketadi
+BATCH_WINDOW_SECONDS = 0.05
+MAX_QUEUE_SIZE = 10_000
+SEND_TIMEOUT_SECONDS = 5
+
+
+class BroadcastPublisher:
+    """
+    Sends channel-layer group messages from a per-worker asyncio task.
+
+    Request threads only enqueue after commit, so neither the camera
+    response nor the surrounding transaction waits on Redis. A message can
+    be a dict or a zero-argument callable that builds one; callables run
+    in the publisher, after coalescing, so repeated triggers for the same
+    coalesce_key cost a single query.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._queue = None
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def publish(self, group, message, coalesce_key=None):
+        """Queue a message to be sent once the current transaction commits"""
+        transaction.on_commit(lambda: self._enqueue((group, message, coalesce_key)))
+
+    async def apublish(self, group, message, coalesce_key=None):
+        """Queue a message from async code that has no open transaction"""
+        item = (group, message, coalesce_key)
+        if self._loop is asyncio.get_running_loop():
+            self._put(item)
+        else:
+            await self._send_batch([item])
+
+    def _enqueue(self, item):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            # Worker tsikli yo'q (management buyruq, WSGI) - darhol yuboramiz
+            async_to_sync(self._send_batch)([item])
+            return
+        loop.call_soon_threadsafe(self._put, item)
+
+    def _put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("Broadcast queue full, dropping %s message", item[0])
+
+    async def run(self):
+        self._queue = asyncio.Queue(MAX_QUEUE_SIZE)
+        self._loop = asyncio.get_running_loop()
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                await asyncio.sleep(BATCH_WINDOW_SECONDS)
+                while not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                await self._send_batch(batch)
+        finally:
+            self._loop = None
+
+    def _coalesce(self, batch):
+        last_index = {}
+        for index, (_, _, key) in enumerate(batch):
+            if key is not None:
+                last_index[key] = index
+        kept = [
+            item
+            for index, item in enumerate(batch)
+            if item[2] is None or last_index[item[2]] == index
+        ]
+        self.coalesced += len(batch) - len(kept)
+        return kept
+
+    async def _send_batch(self, batch):
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        for group, message, _ in self._coalesce(batch):
+            try:
+                if callable(message):
+                    message = await database_sync_to_async(message)()
+                    if message is None:
+                        continue
+                message = await record_event(group, message)
+                # entries.2025-07-18 -> entries: sana yorliq sonini oshirmasin
+                with timed("channel", channel_send_seconds, topic=group.split(".")[0]):
+                    await asyncio.wait_for(
+                        channel_layer.group_send(group, message), SEND_TIMEOUT_SECONDS
+                    )
+                self.sent += 1
+            except Exception:
+                self.dropped += 1
+                logger.exception("Failed to broadcast %s message", group)
+
+
+publisher = BroadcastPublisher()
+
+
+@registry.collector
+def publisher_metrics():
+    return [
+        (
+            "smartpark_broadcast_sent_total",
+            "counter",
+            "Broadcasts sent",
+            publisher.sent,
+        ),
+        (
+            "smartpark_broadcast_dropped_total",
+            "counter",
+            "Broadcasts dropped (queue full or send failed)",
+            publisher.dropped,
+        ),
+        (
+            "smartpark_broadcast_coalesced_total",
+            "counter",
+            "Broadcasts replaced by a newer one with the same key",
+            publisher.coalesced,
+        ),
+    ]
+
+
+publish = publisher.publish
+apublish = publisher.apublish
+register_worker_task(publisher.run)
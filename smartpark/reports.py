@@ -0,0 +1,314 @@
+"""
+Date-range report exports of VehicleEntry history.
+
+Every report is read with .iterator(chunk_size=...), which on PostgreSQL is
+a server-side cursor, and encoded chunk by chunk: CSV lines are joined
+into ~64 KB pieces, Parquet and Arrow are written one record batch at a
+time into a sink that is drained after each batch. Memory stays flat no
+matter how many days are requested. Parquet and Arrow are written with
+pyarrow; an install without it still serves CSV.
+
+Days are local days of entry_time, like DailyStatistics, so a revenue row
+matches the dashboard's counters for the same day.
+"""
+
+import csv
+from datetime import date, datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import VehicleEntry
+from .statistics import local_date
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # ixtiyoriy, bo'lmasa faqat CSV
+    pyarrow = None
+
+CURSOR_CHUNK_SIZE = 2000
+CSV_CHUNK_BYTES = 64 * 1024
+BATCH_ROWS = 20000
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+
+class ReportError(ValueError):
+    pass
+
+
+def parse_range(start_str, end_str):
+    """(first_day, last_day) from YYYY-MM-DD strings; end defaults to start"""
+    first = last = local_date(timezone.now())
+    try:
+        if start_str:
+            first = last = datetime.strptime(start_str, "%Y-%m-%d").date()
+        if end_str:
+            last = datetime.strptime(end_str, "%Y-%m-%d").date()
+    except ValueError:
+        raise ReportError("start and end must be YYYY-MM-DD")
+    if last < first:
+        raise ReportError("end must not be before start")
+    return first, last
+
+
+def _bounds(first, last):
+    start = datetime.combine(first, datetime.min.time())
+    end = datetime.combine(last + timedelta(days=1), datetime.min.time())
+    if settings.USE_TZ:
+        start, end = timezone.make_aware(start), timezone.make_aware(end)
+    return start, end
+
+
+def _entries(first, last):
+    start, end = _bounds(first, last)
+    return VehicleEntry.objects.filter(entry_time__gte=start, entry_time__lt=end)
+
+
+class Report:
+    """A named query and its (column, kind) layout"""
+
+    def __init__(self, name, columns, queryset):
+        self.name = name
+        self.columns = columns
+        self.queryset = queryset
+
+    @property
+    def header(self):
+        return [name for name, _ in self.columns]
+
+    def rows(self, first, last):
+        rows = self.queryset(first, last).values_list(*self.header)
+        return rows.iterator(chunk_size=CURSOR_CHUNK_SIZE)
+
+
+ENTRY_COLUMNS = (
+    ("id", "int"),
+    ("number_plate", "str"),
+    ("entry_time", "datetime"),
+    ("exit_time", "datetime"),
+    ("total_amount", "int"),
+    ("is_paid", "bool"),
+    ("is_disputed", "bool"),
+)
+
+
+def entries_report(first, last):
+    return _entries(first, last).order_by("entry_time", "id")
+
+
+def unpaid_report(first, last):
+    # unpaid_entries() bilan bir xil: chiqib ketgan, lekin to'lanmagan
+    entries = _entries(first, last).filter(is_paid=False, exit_time__isnull=False)
+    return entries.order_by("entry_time", "id")
+
+
+def revenue_report(first, last):
+    paid = Q(is_paid=True)
+    unpaid = Q(is_paid=False, exit_time__isnull=False)
+    return (
+        _entries(first, last)
+        .annotate(day=TruncDate("entry_time"))
+        .values("day")
+        .annotate(
+            entries=Count("id"),
+            exits=Count("id", filter=Q(exit_time__isnull=False)),
+            paid_exits=Count("id", filter=paid),
+            paid_amount=Coalesce(Sum("total_amount", filter=paid), 0),
+            unpaid_exits=Count("id", filter=unpaid),
+            unpaid_amount=Coalesce(Sum("total_amount", filter=unpaid), 0),
+        )
+        .order_by("day")
+    )
+
+
+REPORTS = {
+    "entries": Report("entries", ENTRY_COLUMNS, entries_report),
+    "unpaid": Report(
+        "unpaid",
+        tuple(column for column in ENTRY_COLUMNS if column[0] != "is_paid"),
+        unpaid_report,
+    ),
+    "revenue": Report(
+        "revenue",
+        (
+            ("day", "date"),
+            ("entries", "int"),
+            ("exits", "int"),
+            ("paid_exits", "int"),
+            ("paid_amount", "int"),
+            ("unpaid_exits", "int"),
+            ("unpaid_amount", "int"),
+        ),
+        revenue_report,
+    ),
+}
+
+
+def get_report(name, file_format):
+    """Validate the request up front; the streams below are lazy"""
+    if name not in REPORTS:
+        raise ReportError(f"report must be one of {', '.join(REPORTS)}")
+    if file_format not in FORMATS:
+        raise ReportError(f"format must be one of {', '.join(FORMATS)}")
+    if file_format != "csv" and pyarrow is None:
+        raise ReportError(f"{file_format} export needs pyarrow; use format=csv")
+    return REPORTS[name]
+
+
+def filename(report, first, last, file_format):
+    days = first.isoformat() if first == last else f"{first}_{last}"
+    return f"{report.name}_{days}.{FORMATS[file_format][1]}"
+
+
+def _local(value):
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        return timezone.localtime(value).replace(tzinfo=None)
+    return value
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, datetime):
+        return _local(value).isoformat(sep=" ", timespec="seconds")
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+class _Echo:
+    """csv.writer target that hands each line back instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def csv_chunks(report, rows):
+    writer = csv.writer(_Echo())
+    lines = [writer.writerow(report.header)]
+    size = 0
+    for row in rows:
+        line = writer.writerow([_csv_cell(value) for value in row])
+        lines.append(line)
+        size += len(line)
+        if size >= CSV_CHUNK_BYTES:
+            yield "".join(lines).encode()
+            lines = []
+            size = 0
+    if lines:
+        yield "".join(lines).encode()
+
+
+class _Drain:
+    """Write-only file for pyarrow; drain() returns what was written since"""
+
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def _arrow_schema(report):
+    # Vaqtlar mahalliy, zonasiz: CSV va dashboard bilan bir xil ko'rinadi
+    kinds = {
+        "int": pyarrow.int64(),
+        "str": pyarrow.string(),
+        "bool": pyarrow.bool_(),
+        "date": pyarrow.date32(),
+        "datetime": pyarrow.timestamp("s"),
+    }
+    return pyarrow.schema([(name, kinds[kind]) for name, kind in report.columns])
+
+
+def _batches(report, rows, schema):
+    columns = [[] for _ in report.columns]
+    for row in rows:
+        for column, value in zip(columns, row):
+            column.append(_local(value))
+        if len(columns[0]) >= BATCH_ROWS:
+            yield pyarrow.RecordBatch.from_arrays(columns, schema=schema)
+            columns = [[] for _ in report.columns]
+    if columns[0]:
+        yield pyarrow.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def arrow_chunks(report, rows, file_format):
+    schema = _arrow_schema(report)
+    sink = _Drain()
+    output = pyarrow.PythonFile(sink, mode="w")
+    if file_format == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(output, schema)
+    else:
+        writer = pyarrow.ipc.new_stream(output, schema)
+    try:
+        for batch in _batches(report, rows, schema):
+            # Parquet'da har bir batch alohida row group
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    data = sink.drain()
+    if data:
+        yield data
+
+
+def report_chunks(report, first, last, file_format):
+    """Lazily encoded bytes of the report"""
+    rows = report.rows(first, last)
+    if file_format == "csv":
+        return csv_chunks(report, rows)
+    return arrow_chunks(report, rows, file_format)
+
+
+async def aiter_chunks(chunks):
+    """
+    Serve a sync chunk generator under ASGI without buffering it.
+
+    Django would otherwise collect a sync iterator into a list before the
+    first byte is sent. Each chunk is pulled on the thread-sensitive
+    executor, so the server-side cursor stays on its own connection.
+    """
+    next_chunk = sync_to_async(next)
+    try:
+        while True:
+            chunk = await next_chunk(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
@@ -0,0 +1,300 @@
+"""
+Retention tiers for camera photos.
+
+Photos of entries older than `full_days` are downscaled: the smaller JPEG
+is stored under its own content hash, the rows are repointed to it and
+the original is removed. Photos of entries older than `archive_days` are packed into one uncompressed tar
+per entry day under MEDIA_ROOT/archive/, next to a JSON index of member
+offsets, and the rows are repointed to "archive/<day>/<original name>".
+read_archived() serves such a name with a memory-mapped read of its byte
+range, so an archived photo is still one open() and one slice away.
+
+Photos of open, unpaid or disputed entries are never touched, and neither
+are files shared with such an entry (ContentAddressedStorage stores
+identical uploads once). A closed entry with nothing to pay (a free car)
+counts as settled.
+"""
+
+import io
+import json
+import mmap
+import os
+import tarfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from .models import VehicleEntry
+from .storage import camera_storage
+
+ARCHIVE_DIR = "archive"
+IMAGE_FIELDS = ("entry_image", "exit_image")
+UPDATE_BATCH = 500
+
+
+# Faqat yopilgan, to'langan (yoki to'lovsiz) va e'tiroz bildirilmagan kirishlar
+RETAINABLE = Q(exit_time__isnull=False, is_disputed=False) & (
+    Q(is_paid=True) | Q(total_amount=0)
+)
+
+
+def exempt_entries():
+    """Entries whose photos are kept as they are"""
+    return VehicleEntry.objects.exclude(RETAINABLE)
+
+
+def protected_names():
+    names = set()
+    for row in exempt_entries().values_list(*IMAGE_FIELDS):
+        names.update(name for name in row if name)
+    return names
+
+
+def day_bounds(day):
+    start = datetime.combine(day, datetime.min.time())
+    if settings.USE_TZ:
+        start = timezone.make_aware(start)
+    return start, start + timedelta(days=1)
+
+
+def archive_paths(day):
+    base = os.path.join(settings.MEDIA_ROOT, ARCHIVE_DIR, day.isoformat())
+    return base + ".tar", base + ".idx.json"
+
+
+def archived_name(day, name):
+    return f"{ARCHIVE_DIR}/{day.isoformat()}/{name}"
+
+
+def is_archived(name):
+    return name.startswith(ARCHIVE_DIR + "/")
+
+
+@lru_cache(maxsize=32)
+def _load_index(index_path, mtime):
+    with open(index_path) as index_file:
+        return json.load(index_file)
+
+
+def read_archived(name):
+    """Bytes of an archived photo, or None if it is not in its day's archive"""
+    parts = name.split("/", 2)
+    if len(parts) != 3 or parts[0] != ARCHIVE_DIR:
+        return None
+    try:
+        day = datetime.strptime(parts[1], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+    tar_path, index_path = archive_paths(day)
+    try:
+        index = _load_index(index_path, os.stat(index_path).st_mtime_ns)
+        location = index.get(parts[2])
+        if location is None:
+            return None
+        offset, size = location
+        with open(tar_path, "rb") as tar_file:
+            with mmap.mmap(tar_file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                return view[offset : offset + size]
+    except FileNotFoundError:
+        return None
+
+
+class TierStats:
+    """Files and bytes processed by one tier, for the throughput report"""
+
+    def __init__(self, name):
+        self.name = name
+        self.files = 0
+        self.skipped = 0
+        self.missing = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+
+    def report(self):
+        seconds = max(self.seconds, 1e-9)
+        return (
+            f"{self.name}: {self.files} files ({self.skipped} already done, "
+            f"{self.missing} missing), {self.bytes_in / 1e6:.1f} MB -> "
+            f"{self.bytes_out / 1e6:.1f} MB in {self.seconds:.1f}s, "
+            f"{self.files / seconds:.1f} files/s, "
+            f"{self.bytes_in / 1e6 / seconds:.1f} MB/s"
+        )
+
+
+def downscale_image(path, max_dimension, quality):
+    """The JPEG re-encoded to fit max_dimension, or None if it already fits"""
+    with Image.open(path) as image:
+        if max(image.size) <= max_dimension:
+            return None
+        image.draft("RGB", (max_dimension, max_dimension))
+        image = image.convert("RGB")
+        image.thumbnail((max_dimension, max_dimension))
+        output = io.BytesIO()
+        image.save(output, "JPEG", quality=quality, optimize=True)
+    return output.getvalue()
+
+
+def downscale_file(storage, name, max_dimension, quality):
+    """Replace a photo with its downscaled copy; (old, new) size or None if small"""
+    path = storage.path(name)
+    data = downscale_image(path, max_dimension, quality)
+    if data is None:
+        return None
+    old_size = os.path.getsize(path)
+    # Nom tarkib xeshi: joyida qayta yozilsa nom tarkibga mos kelmay qoladi
+    new_name = storage.save_beside(name, ContentFile(data, name=name))
+    with transaction.atomic():
+        for field in IMAGE_FIELDS:
+            VehicleEntry.objects.filter(RETAINABLE, **{field: name}).update(
+                **{field: new_name}
+            )
+    referenced = Q()
+    for field in IMAGE_FIELDS:
+        referenced |= Q(**{field: name})
+    if new_name != name and not VehicleEntry.objects.filter(referenced).exists():
+        storage.delete(name)
+    return old_size, len(data)
+
+
+def _day_names(start, end, protected):
+    names = set()
+    rows = VehicleEntry.objects.filter(
+        RETAINABLE, entry_time__gte=start, entry_time__lt=end
+    ).values_list(*IMAGE_FIELDS)
+    for row in rows.iterator():
+        names.update(name for name in row if name and not is_archived(name))
+    return sorted(names - protected)
+
+
+def _days(start, end):
+    """Local days of the entries in [start, end) that still have loose photos"""
+    loose = Q()
+    for field in IMAGE_FIELDS:
+        loose |= Q(**{f"{field}__gt": ""}) & ~Q(
+            **{f"{field}__startswith": ARCHIVE_DIR + "/"}
+        )
+    entries = VehicleEntry.objects.filter(RETAINABLE, loose, entry_time__lt=end)
+    if start is not None:
+        entries = entries.filter(entry_time__gte=start)
+    first = entries.order_by("entry_time").values_list("entry_time", flat=True).first()
+    if first is None:
+        return
+    day = timezone.localtime(first).date() if timezone.is_aware(first) else first.date()
+    while True:
+        bounds = day_bounds(day)
+        if bounds[0] >= end:
+            return
+        yield day, bounds
+        day += timedelta(days=1)
+
+
+def downscale_tier(full_before, archive_before, max_dimension, quality, dry_run):
+    stats = TierStats("downscale")
+    storage = camera_storage()
+    protected = protected_names()
+    started = time.perf_counter()
+    for _, (start, end) in _days(archive_before, full_before):
+        start = max(start, archive_before)
+        for name in _day_names(start, min(end, full_before), protected):
+            path = storage.path(name)
+            try:
+                if dry_run:
+                    with Image.open(path) as image:
+                        small = max(image.size) <= max_dimension
+                    result = None if small else (os.path.getsize(path), 0)
+                else:
+                    result = downscale_file(storage, name, max_dimension, quality)
+            except FileNotFoundError:
+                stats.missing += 1
+                continue
+            except (OSError, UnidentifiedImageError):
+                stats.skipped += 1
+                continue
+            if result is None:
+                stats.skipped += 1
+                continue
+            stats.files += 1
+            stats.bytes_in += result[0]
+            stats.bytes_out += result[1]
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+def _write_index(tar_path, index_path):
+    with tarfile.open(tar_path) as tar:
+        index = {member.name: [member.offset_data, member.size] for member in tar}
+    temp_path = f"{index_path}.{uuid.uuid4().hex}"
+    with open(temp_path, "w") as index_file:
+        json.dump(index, index_file)
+    os.replace(temp_path, index_path)
+
+
+def _repoint(day, names):
+    prefix = archived_name(day, "")
+    with transaction.atomic():
+        for start in range(0, len(names), UPDATE_BATCH):
+            batch = names[start : start + UPDATE_BATCH]
+            for field in IMAGE_FIELDS:
+                VehicleEntry.objects.filter(**{f"{field}__in": batch}).update(
+                    **{field: Concat(Value(prefix), F(field))}
+                )
+
+
+def archive_day(day, names, stats, dry_run):
+    storage = camera_storage()
+    tar_path, index_path = archive_paths(day)
+    packed = []
+    if not dry_run:
+        os.makedirs(os.path.dirname(tar_path), exist_ok=True)
+    # Tar siqilmagan: har bir rasm arxiv ichida uzluksiz bayt oralig'i
+    tar = None if dry_run else tarfile.open(tar_path, "a")
+    try:
+        existing = set() if tar is None else set(tar.getnames())
+        for name in names:
+            path = storage.path(name)
+            try:
+                size = os.path.getsize(path)
+            except FileNotFoundError:
+                stats.missing += 1
+                continue
+            if tar is not None and name not in existing:
+                tar.add(path, arcname=name, recursive=False)
+                existing.add(name)
+            packed.append(name)
+            stats.files += 1
+            stats.bytes_in += size
+            stats.bytes_out += size
+    finally:
+        if tar is not None:
+            tar.close()
+    if dry_run or not packed:
+        return
+    with open(tar_path, "rb") as tar_file:
+        os.fsync(tar_file.fileno())
+    _write_index(tar_path, index_path)
+    _repoint(day, packed)
+    # Baza yangi nomlarni ko'rsatgandan keyingina asl fayllar o'chiriladi
+    for name in packed:
+        storage.delete(name)
+
+
+def archive_tier(archive_before, dry_run):
+    stats = TierStats("archive")
+    protected = protected_names()
+    started = time.perf_counter()
+    for day, (start, end) in _days(None, archive_before):
+        names = _day_names(start, min(end, archive_before), protected)
+        if names:
+            archive_day(day, names, stats, dry_run)
+    stats.seconds = time.perf_counter() - started
+    return stats
@@ -0,0 +1,408 @@
+"""
+Hourly occupancy and revenue rollups.
+
+HourlyRollup keeps one row per local hour and car class with the entries
+that started in the hour, the exits and amounts billed in it, and the
+seconds closed sessions spent parked in it. Like DailyStatistics the rows
+follow the VehicleEntry signals: the old state of a saved entry is
+subtracted and the new one added inside the same transaction. A car's
+class is stored on its entry when the entry is created, so the signals
+and rebuild_rollups() both keep history under the class the car had then.
+
+Vehicles still inside are not stored as parked time; their seconds are
+added when the rollups are read, from the few open sessions, so nothing
+has to be rewritten every hour while a car stands.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max, Min, Q, Sum
+from django.db.models.functions import ExtractHour, Trunc
+from django.utils import timezone
+
+from .models import CarClass, HourlyRollup, OpenSession, VehicleEntry
+from .plate_cache import get_car_policy
+from .statistics import local_date
+
+HOUR = timedelta(hours=1)
+ROLLUP_FIELDS = ("entry_time", "exit_time", "is_paid", "total_amount", "car_class")
+COUNTERS = ("entries", "exits", "revenue", "paid_revenue", "occupied_seconds")
+PERIODS = ("day", "week", "month")
+MAX_HOURLY_DAYS = 92
+BATCH_SIZE = 1000
+
+
+def car_class(number_plate):
+    """Class of a car by the current Cars table; entries store it on creation"""
+    policy = get_car_policy(number_plate)
+    if policy is not None and policy.is_free:
+        return CarClass.FREE
+    if policy is not None and policy.is_special_taxi:
+        return CarClass.SPECIAL_TAXI
+    return CarClass.NORMAL
+
+
+def floor_hour(value):
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(day):
+    start = datetime.combine(day, datetime.min.time())
+    return timezone.make_aware(start) if settings.USE_TZ else start
+
+
+def hours_between(start, end):
+    hour = floor_hour(start)
+    while hour < end:
+        yield hour
+        hour += HOUR
+
+
+def _parked(entry_time, exit_time, points):
+    """
+    Add the partial first and last hours of a stay to points and return the
+    [start, end) range of its full hours, or None.
+    """
+    if exit_time <= entry_time:
+        return None
+    first, last = floor_hour(entry_time), floor_hour(exit_time)
+    if first == last:
+        points[first][4] += int((exit_time - entry_time).total_seconds())
+        return None
+    points[first][4] += int((first + HOUR - entry_time).total_seconds())
+    points[last][4] += int((exit_time - last).total_seconds())
+    if first + HOUR < last:
+        return first + HOUR, last
+    return None
+
+
+def _contribution(state):
+    """({hour: counters}, full_hours) of one rollup_state()"""
+    entry_time, exit_time, is_paid, total_amount = state[:4]
+    points = defaultdict(lambda: [0, 0, 0, 0, 0])
+    points[floor_hour(entry_time)][0] += 1
+    if exit_time is None:
+        return points, None
+    amount = total_amount or 0
+    counters = points[floor_hour(exit_time)]
+    counters[1] += 1
+    counters[2] += amount
+    counters[3] += amount if is_paid else 0
+    return points, _parked(entry_time, exit_time, points)
+
+
+def rollup_state(values):
+    """(entry_time, exit_time, is_paid, total_amount, car_class) from loaded values"""
+    try:
+        return tuple(values[name] for name in ROLLUP_FIELDS)
+    except KeyError:
+        return None
+
+
+def entry_rollup_state(entry):
+    return tuple(getattr(entry, name) for name in ROLLUP_FIELDS)
+
+
+def record_rollup_transition(old_state, new_state):
+    """
+    Apply the difference between two states of one entry.
+
+    Either state may be None for a created or deleted entry. Each state is
+    counted under its own car class. Hours whose counters do not move are
+    not touched, so a payment updates one row.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0, 0, 0])
+    ranges = []
+    for state, sign in ((old_state, -1), (new_state, 1)):
+        if state is None:
+            continue
+        car = state[4]
+        points, full = _contribution(state)
+        for hour, counters in points.items():
+            for index, count in enumerate(counters):
+                deltas[hour, car][index] += sign * count
+        if full is not None:
+            ranges.append((full, car, sign))
+    # To'lov yoki summa o'zgarsa turish oralig'i o'zgarmaydi
+    if len(ranges) == 2 and ranges[0][:2] == ranges[1][:2]:
+        ranges = []
+    deltas = {key: counters for key, counters in deltas.items() if any(counters)}
+    if not deltas and not ranges:
+        return
+
+    keys = set(deltas)
+    for (start, end), car, _ in ranges:
+        keys.update((hour, car) for hour in hours_between(start, end))
+    HourlyRollup.objects.bulk_create(
+        [HourlyRollup(hour=hour, car_class=car) for hour, car in sorted(keys)],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    # Qatorlar doim bir xil tartibda qulflanadi - parallel chiqishlar deadlock bermaydi
+    for hour, car in sorted(deltas):
+        HourlyRollup.objects.filter(hour=hour, car_class=car).update(
+            **{
+                name: F(name) + count
+                for name, count in zip(COUNTERS, deltas[hour, car])
+                if count
+            }
+        )
+    for (start, end), car, sign in ranges:
+        HourlyRollup.objects.filter(
+            car_class=car, hour__gte=start, hour__lt=end
+        ).update(occupied_seconds=F("occupied_seconds") + sign * 3600)
+
+
+def _entry_class(number_plate, stored):
+    # Signalsiz (bulk_create) yozilgan qatorlarda toifa bo'sh qoladi
+    return stored or car_class(number_plate)
+
+
+def _rebuild_hours(entries, start_time, end_time):
+    """Every hour of the range; an open end is taken from the entries' span"""
+    if start_time is None or end_time is None:
+        bounds = entries.aggregate(
+            first=Min("entry_time"),
+            last_entry=Max("entry_time"),
+            last_exit=Max("exit_time"),
+        )
+        if bounds["first"] is None:
+            return []
+        start_time = start_time or bounds["first"]
+        last = max(filter(None, (bounds["last_entry"], bounds["last_exit"])))
+        end_time = end_time or floor_hour(last) + HOUR
+    return list(hours_between(start_time, end_time))
+
+
+def rebuild_rollups(start=None, end=None):
+    """
+    Recompute the rollups of local days [start, end] from VehicleEntry rows.
+
+    Rows are upserted in place instead of deleted and recreated. Every hour
+    and class of the range is created first and locked with SELECT ... FOR
+    UPDATE before the entries are read, so a signal that changes a row in
+    the meantime either commits before the read (and is counted by it) or
+    waits for the rebuild and adds its delta on top.
+    """
+    with transaction.atomic():
+        start_time = day_start(start) if start else None
+        end_time = day_start(end + timedelta(days=1)) if end else None
+        entries = VehicleEntry.objects.all()
+        rows = HourlyRollup.objects.all()
+        if start_time:
+            # Oraliqdan oldin kirib, ichida chiqqanlar ham turish vaqti beradi
+            entries = entries.filter(
+                Q(entry_time__gte=start_time) | Q(exit_time__gte=start_time)
+            )
+            rows = rows.filter(hour__gte=start_time)
+        if end_time:
+            entries = entries.filter(entry_time__lt=end_time)
+            rows = rows.filter(hour__lt=end_time)
+
+        hours = _rebuild_hours(entries, start_time, end_time)
+        HourlyRollup.objects.bulk_create(
+            (
+                HourlyRollup(hour=hour, car_class=car)
+                for hour in hours
+                for car in CarClass
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        current = {
+            (hour, car): (pk, counters)
+            for pk, hour, car, *counters in rows.select_for_update()
+            .order_by("hour", "car_class")
+            .values_list("pk", "hour", "car_class", *COUNTERS)
+            .iterator(chunk_size=BATCH_SIZE)
+        }
+
+        totals = defaultdict(lambda: [0, 0, 0, 0, 0])
+        columns = ("number_plate",) + ROLLUP_FIELDS
+        for number_plate, *state in entries.values_list(*columns).iterator(
+            chunk_size=BATCH_SIZE
+        ):
+            car = _entry_class(number_plate, state[4])
+            points, full = _contribution(state)
+            if full is not None:
+                for hour in hours_between(*full):
+                    points[hour][4] += 3600
+            for hour, counters in points.items():
+                if start_time and hour < start_time or end_time and hour >= end_time:
+                    continue
+                total = totals[hour, car]
+                for index, count in enumerate(counters):
+                    total[index] += count
+
+        changed = []
+        for key, (pk, counters) in current.items():
+            # Yozuvi qolmagan soatlar nolga tushadi, qator o'chirilmaydi
+            total = totals.get(key, [0] * len(COUNTERS))
+            if counters != total:
+                changed.append(HourlyRollup(pk=pk, **dict(zip(COUNTERS, total))))
+        HourlyRollup.objects.bulk_update(changed, COUNTERS, batch_size=BATCH_SIZE)
+        return len(totals)
+
+
+def _open_seconds(start, end, now):
+    """{(hour, car_class): seconds} parked in [start, end) by vehicles still inside"""
+    seconds = defaultdict(int)
+    end = min(end, now)
+    sessions = OpenSession.objects.filter(entry__entry_time__lt=end).values_list(
+        "entry__number_plate", "entry__entry_time", "entry__car_class"
+    )
+    for number_plate, entry_time, stored in sessions:
+        car = _entry_class(number_plate, stored)
+        points = defaultdict(lambda: [0, 0, 0, 0, 0])
+        full = _parked(max(entry_time, start), end, points)
+        for hour, counters in points.items():
+            seconds[hour, car] += counters[4]
+        if full is not None:
+            for hour in hours_between(*full):
+                seconds[hour, car] += 3600
+    return seconds
+
+
+def _empty():
+    return {name: 0 for name in COUNTERS}
+
+
+def _finish(bucket, hours):
+    """Turn occupied_seconds into average vehicles over `hours` hours"""
+    seconds = bucket.pop("occupied_seconds")
+    bucket["occupancy"] = round(seconds / 3600 / hours, 2) if hours else 0
+    return bucket
+
+
+def _bucket_start(hour, period):
+    day = local_date(hour)
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _bounds(first, last):
+    return day_start(first), day_start(last + timedelta(days=1))
+
+
+def hourly(first, last):
+    """One row per local hour of [first, last] with totals and a per-class split"""
+    if (last - first).days >= MAX_HOURLY_DAYS:
+        raise ValueError(f"hourly range is limited to {MAX_HOURLY_DAYS} days")
+    start, end = _bounds(first, last)
+    series = {
+        hour: {"total": _empty(), "classes": {}} for hour in hours_between(start, end)
+    }
+    rows = HourlyRollup.objects.filter(hour__gte=start, hour__lt=end).values_list(
+        "hour", "car_class", *COUNTERS
+    )
+    for hour, car, *counters in rows:
+        if not any(counters):
+            # rebuild_rollups oralig'idagi bo'sh qatorlar
+            continue
+        # Aware vaqtlar zonadan qat'i nazar teng, localtime shart emas
+        item = series[hour]
+        item["classes"][car] = dict(zip(COUNTERS, counters))
+    for (hour, car), seconds in _open_seconds(start, end, timezone.now()).items():
+        item = series[hour]
+        item["classes"].setdefault(car, _empty())["occupied_seconds"] += seconds
+
+    result = []
+    for hour, item in series.items():
+        total = item["total"]
+        for counters in item["classes"].values():
+            for name in COUNTERS:
+                total[name] += counters[name]
+            _finish(counters, 1)
+        result.append(
+            {"hour": hour.isoformat(), **_finish(total, 1), "classes": item["classes"]}
+        )
+    return result
+
+
+def summary(first, last, period="day"):
+    """Day, week or month buckets of [first, last], each split by car class"""
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+    start, end = _bounds(first, last)
+    now = timezone.now()
+    rows = (
+        HourlyRollup.objects.filter(hour__gte=start, hour__lt=end)
+        .annotate(bucket=Trunc("hour", period))
+        .values("bucket", "car_class")
+        .annotate(**{name: Sum(name) for name in COUNTERS})
+        .order_by("bucket")
+    )
+    buckets = defaultdict(lambda: defaultdict(_empty))
+    for row in rows:
+        if not any(row[name] for name in COUNTERS):
+            continue
+        counters = buckets[local_date(row["bucket"])][row["car_class"]]
+        for name in COUNTERS:
+            counters[name] += row[name]
+    for (hour, car), seconds in _open_seconds(start, end, now).items():
+        buckets[_bucket_start(hour, period)][car]["occupied_seconds"] += seconds
+
+    result = []
+    for bucket in sorted(buckets):
+        # O'rtacha bandlik faqat o'tgan soatlar bo'yicha (joriy oy hali tugamagan)
+        bucket_end = min(end, now, _next_bucket(bucket, period))
+        hours = max((bucket_end - max(start, day_start(bucket))) / HOUR, 0)
+        total = _empty()
+        classes = {}
+        for car, counters in buckets[bucket].items():
+            for name in COUNTERS:
+                total[name] += counters[name]
+            classes[car] = _finish(dict(counters), hours)
+        result.append(
+            {"period": bucket.isoformat(), **_finish(total, hours), "classes": classes}
+        )
+    return result
+
+
+def _next_bucket(day, period):
+    if period == "week":
+        return day_start(day + timedelta(days=7))
+    if period == "month":
+        return day_start((day.replace(day=28) + timedelta(days=4)).replace(day=1))
+    return day_start(day + timedelta(days=1))
+
+
+def peak_hours(first, last):
+    """Average entries, exits and occupancy per hour of the day over [first, last]"""
+    start, end = _bounds(first, last)
+    days = (last - first).days + 1
+    rows = (
+        HourlyRollup.objects.filter(hour__gte=start, hour__lt=end)
+        .annotate(hour_of_day=ExtractHour("hour"))
+        .values("hour_of_day")
+        .annotate(**{name: Sum(name) for name in COUNTERS})
+    )
+    hours = {hour: _empty() for hour in range(24)}
+    for row in rows:
+        for name in COUNTERS:
+            hours[row["hour_of_day"]][name] += row[name]
+    for (hour, _), seconds in _open_seconds(start, end, timezone.now()).items():
+        hours[hour.hour]["occupied_seconds"] += seconds
+
+    result = []
+    for hour, counters in hours.items():
+        average = {
+            name: round(count / days, 2)
+            for name, count in counters.items()
+            if name != "occupied_seconds"
+        }
+        average["occupancy"] = round(counters["occupied_seconds"] / 3600 / days, 2)
+        result.append({"hour": hour, **average})
+    return {
+        "hours": result,
+        "peak_occupancy_hour": max(result, key=lambda row: row["occupancy"])["hour"],
+        "peak_entry_hour": max(result, key=lambda row: row["entries"])["hour"],
+    }
@@ -0,0 +1,194 @@
+"""
+VehicleEntry serializers shared by the HTTP views, the WebSocket consumers
+and the broadcast signals.
+
+A serializer is compiled once per field list: it knows which columns to
+select with .values_list() and turns each row tuple into a dict with a
+generated function, so no model instances are built for list payloads.
+"""
+
+import json
+from functools import lru_cache
+
+from django.core.files.storage import FileSystemStorage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.fields.files import FieldFile
+from django.http import HttpResponse
+from django.utils.encoding import filepath_to_uri
+
+try:
+    import orjson
+except ImportError:  # ixtiyoriy tezkor kodlovchi, bo'lmasa json ishlatiladi
+    orjson = None
+
+
+def _time(value):
+    # strftime("%H:%M") bilan bir xil natija, lekin ancha tez
+    return f"{value.hour:02d}:{value.minute:02d}" if value else None
+
+
+@lru_cache(maxsize=None)
+def _field_storage(field_name):
+    # models -> storage -> metrics -> serializers: model import vaqtida emas
+    from .models import VehicleEntry
+
+    return VehicleEntry._meta.get_field(field_name).storage
+
+
+def _file_url(field_name):
+    """Formatter for a VehicleEntry file column that uses the field's own storage"""
+
+    def url(name):
+        if not name:
+            return None
+        # Kamera rasmlari va thumbnail'lar turli storage'larda bo'lishi mumkin
+        storage = _field_storage(field_name)
+        if not isinstance(storage, FileSystemStorage):
+            return storage.url(name)
+        # Nisbiy yo'l uchun urljoin bilan bir xil, har bir qatorda chaqirilgani uchun
+        return storage.base_url + filepath_to_uri(name).lstrip("/")
+
+    return url
+
+
+def _amount(value):
+    return value or 0
+
+
+def _status(exit_time, is_paid):
+    if not exit_time:
+        return "inside"
+    return "paid" if is_paid else "unpaid"
+
+
+def _duration_hours(entry_time, exit_time):
+    return (exit_time - entry_time).total_seconds() / 3600 if exit_time else 0
+
+
+# Javob maydoni -> (kerakli ustunlar, formatlovchi)
+ENTRY_FIELDS = {
+    "id": (("id",), None),
+    "number_plate": (("number_plate",), None),
+    "entry_time": (("entry_time",), _time),
+    "exit_time": (("exit_time",), _time),
+    "total_amount": (("total_amount",), _amount),
+    "is_paid": (("is_paid",), None),
+    "entry_image": (("entry_image",), _file_url("entry_image")),
+    "exit_image": (("exit_image",), _file_url("exit_image")),
+    "entry_thumbnail": (("entry_thumbnail",), _file_url("entry_thumbnail")),
+    "exit_thumbnail": (("exit_thumbnail",), _file_url("exit_thumbnail")),
+    "status": (("exit_time", "is_paid"), _status),
+    "duration_hours": (("entry_time", "exit_time"), _duration_hours),
+}
+
+# Dashboard jadvali qatori va model_update deltasi
+ENTRY_ROW = (
+    "id",
+    "number_plate",
+    "entry_time",
+    "exit_time",
+    "total_amount",
+    "is_paid",
+    "entry_image",
+    "exit_image",
+    "entry_thumbnail",
+    "exit_thumbnail",
+    "status",
+)
+# To'lanmagan yozuvlar ro'yxati
+UNPAID_ROW = (
+    "id",
+    "number_plate",
+    "entry_time",
+    "exit_time",
+    "total_amount",
+    "duration_hours",
+)
+# Oxirgi to'lanmagan yozuv paneli
+LATEST_UNPAID_ROW = UNPAID_ROW + (
+    "entry_image",
+    "exit_image",
+    "entry_thumbnail",
+    "exit_thumbnail",
+)
+RECEIPT_ROW = (
+    "id",
+    "number_plate",
+    "entry_time",
+    "exit_time",
+    "total_amount",
+    "is_paid",
+    "duration_hours",
+)
+
+
+class EntrySerializer:
+    def __init__(self, fields, columns, serialize):
+        self.fields = fields
+        self.columns = columns
+        self.serialize = serialize
+
+    def rows(self, queryset):
+        """Serialize every row of a VehicleEntry queryset"""
+        serialize = self.serialize
+        return [serialize(row) for row in queryset.values_list(*self.columns)]
+
+    def first(self, queryset):
+        """Serialize the first row of the queryset, or None"""
+        rows = self.rows(queryset[:1])
+        return rows[0] if rows else None
+
+    def instance(self, entry):
+        """Serialize an already loaded VehicleEntry (e.g. in a post_save signal)"""
+        row = []
+        for column in self.columns:
+            value = getattr(entry, column)
+            if isinstance(value, FieldFile):
+                value = value.name
+            row.append(value)
+        return self.serialize(row)
+
+
+@lru_cache(maxsize=None)
+def _compile(fields):
+    columns = []
+    for field in fields:
+        for column in ENTRY_FIELDS[field][0]:
+            if column not in columns:
+                columns.append(column)
+
+    namespace = {}
+    items = []
+    for i, field in enumerate(fields):
+        source, formatter = ENTRY_FIELDS[field]
+        args = ", ".join(f"row[{columns.index(column)}]" for column in source)
+        if formatter is None:
+            items.append(f"{field!r}: {args}")
+        else:
+            namespace[f"format_{i}"] = formatter
+            items.append(f"{field!r}: format_{i}({args})")
+    # Bitta dict literal: maydonlar bo'yicha sikl va kalit qidiruvisiz
+    exec(f"def serialize(row):\n    return {{{', '.join(items)}}}\n", namespace)
+    return EntrySerializer(fields, tuple(columns), namespace["serialize"])
+
+
+def compile_serializer(fields):
+    """Return the cached serializer for this field list"""
+    return _compile(tuple(fields))
+
+
+def dumps(data):
+    """Encode data as JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data, default=DjangoJSONEncoder().default)
+    return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+def dumps_text(data):
+    """JSON as str, for WebSocket text frames"""
+    return dumps(data).decode()
+
+
+def json_response(data, status=200):
+    """JsonResponse equivalent that encodes through dumps()"""
+    return HttpResponse(dumps(data), content_type="application/json", status=status)
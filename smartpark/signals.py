@@ -1,227 +1,175 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
 from django.dispatch import receiver
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-from .models import VehicleEntry, Cars
+from .models import TRACKED_FIELDS, VehicleEntry, Cars
+from .plate_cache import invalidate_plate_cache
+from .open_sessions import close_session
+from .entries import latest_unpaid_entry
+from .publisher import publish
+from .serializers import ENTRY_ROW, compile_serializer, dumps_text
+from .topics import CARS, UNPAID, entries_group, stats_group
+from .thumbnails import THUMBNAIL_FIELDS, missing_thumbnails, schedule_thumbnails
+from .rollups import (
+    car_class,
+    entry_rollup_state,
+    record_rollup_transition,
+    rollup_state,
+)
+from .statistics import (
+    get_daily_snapshot,
+    record_transition,
+)
 from django.utils import timezone
-from datetime import datetime
 
 
-@receiver(post_save, sender=VehicleEntry)
-def vehicle_entry_updated(sender, instance, created, **kwargs):
-    """Send WebSocket update when VehicleEntry is created or updated"""
-    channel_layer = get_channel_layer()
-
-    # Get statistics for today using timezone-aware datetime range
+def latest_unpaid_message():
+    """Build the latest_unpaid_entry_update message for today"""
     today = timezone.now().date()
-    start_datetime = timezone.make_aware(datetime.combine(today, datetime.min.time()))
-    end_datetime = timezone.make_aware(datetime.combine(today, datetime.max.time()))
-
-    today_entries = VehicleEntry.objects.filter(
-        entry_time__gte=start_datetime, entry_time__lte=end_datetime
-    )
-    total_entries = today_entries.count()
-    total_exits = today_entries.filter(exit_time__isnull=False).count()
-    total_inside = total_entries - total_exits
-    unpaid_entries = today_entries.filter(
-        is_paid=False, exit_time__isnull=False
-    ).count()
-
-    # Prepare statistics data
-    stats_data = {
-        "total_entries": total_entries,
-        "total_exits": total_exits,
-        "total_inside": total_inside,
-        "unpaid_entries": unpaid_entries,
+    # Versiya ma'lumotdan oldin o'qiladi, snapshot keshi shunga tayanadi
+    _, seq = get_daily_snapshot(today)
+    data = latest_unpaid_entry(today)
+    return {
+        "type": "latest_unpaid_entry_update",
+        "date": today.isoformat(),
+        "seq": seq,
+        # Bir marta kodlanadi, har bir mijozga tayyor matn yuboriladi
+        "text": dumps_text({"type": "latest_unpaid_entry_update", "data": data}),
     }
 
-    # Get all vehicle entries using timezone-aware datetime range (not just 10)
-    entries = VehicleEntry.objects.filter(
-        entry_time__gte=start_datetime, entry_time__lte=end_datetime
-    ).order_by("-entry_time")
-    entries_data = []
 
-    for entry in entries:
-        entries_data.append(
+def model_update_message(day, seq, stats_data, entry, action, instance):
+    """broadcast_update event with the model_update frame already encoded"""
+    return {
+        "type": "broadcast_update",
+        "date": day.isoformat(),
+        "seq": seq,
+        "text": dumps_text(
             {
-                "id": entry.id,
-                "number_plate": entry.number_plate,
-                "entry_time": entry.entry_time.strftime("%H:%M"),
-                "exit_time": entry.exit_time.strftime("%H:%M")
-                if entry.exit_time
-                else None,
-                "total_amount": entry.total_amount or 0,
-                "is_paid": entry.is_paid,
-                "entry_image": entry.entry_image.url if entry.entry_image else None,
-                "exit_image": entry.exit_image.url if entry.exit_image else None,
-                "status": "inside"
-                if not entry.exit_time
-                else ("paid" if entry.is_paid else "unpaid"),
+                "type": "model_update",
+                "date": day.isoformat(),
+                "seq": seq,
+                "statistics": stats_data,
+                "entry": entry,
+                "action": action,
+                "entry_id": instance.id,
+                "number_plate": instance.number_plate,
             }
-        )
+        ),
+    }
+
+
+def publish_day_update(day, seq, stats_data, entry, action, instance):
+    """Send the entry delta to the day's entries topic and counters to its stats topic"""
+    publish(
+        entries_group(day),
+        model_update_message(day, seq, stats_data, entry, action, instance),
+    )
+    publish(
+        stats_group(day),
+        {
+            "type": "broadcast_statistics",
+            "date": day.isoformat(),
+            "seq": seq,
+            "text": dumps_text(
+                {
+                    "type": "statistics_update",
+                    "data": stats_data,
+                    "date": day.isoformat(),
+                    "seq": seq,
+                }
+            ),
+        },
+    )
+
+
+@receiver(pre_save, sender=VehicleEntry)
+@receiver(pre_delete, sender=VehicleEntry)
+def vehicle_entry_changing(sender, instance, **kwargs):
+    """Make sure the old state is known before the row changes"""
+    # Qo'lda yig'ilgan (pk bilan) nusxa ham _state.adding bo'ladi
+    instance.load_tracked_state()
+    loaded = getattr(instance, "_loaded_values", {})
+    if not loaded.get("car_class", True):
+        # Signalsiz (bulk_create) yozilgan qator - rebuild_rollups kabi hozirgi toifa
+        loaded["car_class"] = car_class(instance.number_plate)
+    if not instance.car_class:
+        # Toifa kirish paytida bir marta aniqlanadi, keyin Cars o'zgarsa ham saqlanadi
+        instance.car_class = loaded.get("car_class") or car_class(instance.number_plate)
+
+
+@receiver(post_save, sender=VehicleEntry)
+def vehicle_entry_updated(sender, instance, created, update_fields=None, **kwargs):
+    """Send WebSocket update when VehicleEntry is created or updated"""
+    # Kunlik hisoblagichlarni shu tranzaksiya ichida yangilaymiz
+    # Holat pre_save da bazadan to'ldiriladi; u ham bo'lmasa qator yangi edi
+    old_state = None if created else instance.tracked_state()
+    day = record_transition(old_state, instance.current_state())
+    # Soatlik rollup ham shu tranzaksiyada, summa bilan birga
+    old_rollup = (
+        None if created else rollup_state(getattr(instance, "_loaded_values", {}))
+    )
+    record_rollup_transition(old_rollup, entry_rollup_state(instance))
+    if (
+        not created
+        and instance.exit_time
+        and (old_state is None or old_state[1] is None)
+        and not getattr(instance, "_session_closed", False)
+    ):
+        # Chiqish kameradan emas (admin, qo'lda) belgilangan - sessiyani ham yopamiz
+        close_session(instance)
+    instance._loaded_values = {name: getattr(instance, name) for name in TRACKED_FIELDS}
+    stats_data, seq = get_daily_snapshot(day)
 
     # Determine action type
     action = "created" if created else "updated"
     if not created and instance.is_paid:
         action = "payment_completed"
+    if update_fields and set(update_fields) <= set(THUMBNAIL_FIELDS.values()):
+        # Fon jarayoni thumbnail tayyorladi - faqat rasm URL lari o'zgardi
+        action = "thumbnail_ready"
+    elif missing_thumbnails(instance):
+        schedule_thumbnails(instance.id)
+
+    serializer = compile_serializer(ENTRY_ROW)
+    if action == "thumbnail_ready":
+        # Fon jarayonining nusxasi eskirgan bo'lishi mumkin (orada chiqish yoki
+        # to'lov bo'lgan) - qator bazadan qayta o'qiladi
+        entry_data = serializer.first(VehicleEntry.objects.filter(pk=instance.pk))
+    else:
+        entry_data = serializer.instance(instance)
+
+    # Faqat o'zgargan yozuv va yangi hisoblagichlar yuboriladi (delta)
+    publish_day_update(day, seq, stats_data, entry_data, action, instance)
 
-    # Broadcast update to all connected clients
-    async_to_sync(channel_layer.group_send)(
-        "home_updates",
-        {
-            "type": "broadcast_update",
-            "statistics": stats_data,
-            "vehicle_entries": entries_data,
-            "action": action,
-            "entry_id": instance.id,
-            "number_plate": instance.number_plate,
-        },
-    )
-    
     # Send latest unpaid entry update for unpaid entries page
-    if instance.exit_time and not instance.is_paid:
-        # Get the latest unpaid entry
-        latest_unpaid = (
-            VehicleEntry.objects.filter(
-                entry_time__gte=start_datetime,
-                entry_time__lte=end_datetime,
-                is_paid=False,
-                exit_time__isnull=False,
-            )
-            .order_by("-exit_time")
-            .first()
-        )
-        
-        if latest_unpaid:
-            latest_unpaid_data = {
-                "id": latest_unpaid.id,
-                "number_plate": latest_unpaid.number_plate,
-                "entry_time": latest_unpaid.entry_time.strftime("%H:%M"),
-                "exit_time": latest_unpaid.exit_time.strftime("%H:%M"),
-                "total_amount": latest_unpaid.total_amount or 0,
-                "duration_hours": (latest_unpaid.exit_time - latest_unpaid.entry_time).total_seconds() / 3600,
-                "entry_image": latest_unpaid.entry_image.url if latest_unpaid.entry_image else None,
-                "exit_image": latest_unpaid.exit_image.url if latest_unpaid.exit_image else None,
-            }
-        else:
-            latest_unpaid_data = None
-            
-        async_to_sync(channel_layer.group_send)(
-            "home_updates",
-            {
-                "type": "latest_unpaid_entry_update",
-                "data": latest_unpaid_data,
-            },
-        )
-    
-    # Handle when entry is marked as paid
-    if not created and instance.is_paid and instance.exit_time:
-        # Get the latest unpaid entry after this one was marked as paid
-        latest_unpaid = (
-            VehicleEntry.objects.filter(
-                entry_time__gte=start_datetime,
-                entry_time__lte=end_datetime,
-                is_paid=False,
-                exit_time__isnull=False,
-            )
-            .order_by("-exit_time")
-            .first()
-        )
-        
-        if latest_unpaid:
-            latest_unpaid_data = {
-                "id": latest_unpaid.id,
-                "number_plate": latest_unpaid.number_plate,
-                "entry_time": latest_unpaid.entry_time.strftime("%H:%M"),
-                "exit_time": latest_unpaid.exit_time.strftime("%H:%M"),
-                "total_amount": latest_unpaid.total_amount or 0,
-                "duration_hours": (latest_unpaid.exit_time - latest_unpaid.entry_time).total_seconds() / 3600,
-                "entry_image": latest_unpaid.entry_image.url if latest_unpaid.entry_image else None,
-                "exit_image": latest_unpaid.exit_image.url if latest_unpaid.exit_image else None,
-            }
-        else:
-            latest_unpaid_data = None
-            
-        async_to_sync(channel_layer.group_send)(
-            "home_updates",
-            {
-                "type": "latest_unpaid_entry_update",
-                "data": latest_unpaid_data,
-            },
+    if instance.exit_time and (not instance.is_paid or not created):
+        # Bir paketdagi bir nechta o'zgarish uchun bitta so'rov yetarli
+        publish(
+            UNPAID,
+            latest_unpaid_message,
+            coalesce_key="latest_unpaid_entry_update",
         )
 
 
 @receiver(post_delete, sender=VehicleEntry)
 def vehicle_entry_deleted(sender, instance, **kwargs):
     """Send WebSocket update when VehicleEntry is deleted"""
-    channel_layer = get_channel_layer()
-
-    # Get updated statistics for today using timezone-aware datetime range
-    today = timezone.now().date()
-    start_datetime = timezone.make_aware(datetime.combine(today, datetime.min.time()))
-    end_datetime = timezone.make_aware(datetime.combine(today, datetime.max.time()))
-
-    today_entries = VehicleEntry.objects.filter(
-        entry_time__gte=start_datetime, entry_time__lte=end_datetime
+    day = record_transition(instance.tracked_state() or instance.current_state(), None)
+    # pre_delete holatni bazadan to'ldirgan
+    record_rollup_transition(
+        rollup_state(getattr(instance, "_loaded_values", {}))
+        or entry_rollup_state(instance),
+        None,
     )
-    total_entries = today_entries.count()
-    total_exits = today_entries.filter(exit_time__isnull=False).count()
-    total_inside = total_entries - total_exits
-    unpaid_entries = today_entries.filter(
-        is_paid=False, exit_time__isnull=False
-    ).count()
-
-    # Prepare statistics data
-    stats_data = {
-        "total_entries": total_entries,
-        "total_exits": total_exits,
-        "total_inside": total_inside,
-        "unpaid_entries": unpaid_entries,
-    }
-
-    # Get latest vehicle entries using timezone-aware datetime range
-    entries = VehicleEntry.objects.filter(
-        entry_time__gte=start_datetime, entry_time__lte=end_datetime
-    ).order_by("-entry_time")[:10]
-    entries_data = []
-
-    for entry in entries:
-        entries_data.append(
-            {
-                "id": entry.id,
-                "number_plate": entry.number_plate,
-                "entry_time": entry.entry_time.strftime("%H:%M"),
-                "exit_time": entry.exit_time.strftime("%H:%M")
-                if entry.exit_time
-                else None,
-                "total_amount": entry.total_amount or 0,
-                "is_paid": entry.is_paid,
-                "entry_image": entry.entry_image.url if entry.entry_image else None,
-                "exit_image": entry.exit_image.url if entry.exit_image else None,
-                "status": "inside"
-                if not entry.exit_time
-                else ("paid" if entry.is_paid else "unpaid"),
-            }
-        )
+    stats_data, seq = get_daily_snapshot(day)
 
     # Send updates to all connected clients
-    async_to_sync(channel_layer.group_send)(
-        "home_updates",
-        {
-            "type": "broadcast_update",
-            "statistics": stats_data,
-            "vehicle_entries": entries_data,
-            "action": "deleted",
-            "entry_id": instance.id,
-            "number_plate": instance.number_plate,
-        },
-    )
+    publish_day_update(day, seq, stats_data, None, "deleted", instance)
 
 
 @receiver(post_save, sender=Cars)
 def car_updated(sender, instance, created, **kwargs):
     """Send WebSocket update when Cars is created or updated"""
-    channel_layer = get_channel_layer()
+    invalidate_plate_cache()
 
     # Prepare car data
     car_data = {
@@ -233,8 +181,8 @@ def car_updated(sender, instance, created, **kwargs):
     }
 
     # Send updates to all connected clients
-    async_to_sync(channel_layer.group_send)(
-        "home_updates",
+    publish(
+        CARS,
         {
             "type": "broadcast_car_update",
             "car": car_data,
@@ -246,11 +194,11 @@ def car_updated(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=Cars)
 def car_deleted(sender, instance, **kwargs):
     """Send WebSocket update when Cars is deleted"""
-    channel_layer = get_channel_layer()
+    invalidate_plate_cache()
 
     # Send updates to all connected clients
-    async_to_sync(channel_layer.group_send)(
-        "home_updates",
+    publish(
+        CARS,
         {
             "type": "broadcast_car_update",
             "car": {
@@ -0,0 +1,97 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from channels.db import database_sync_to_async
+
+from .metrics import registry
+
+# Kunlik versiya xabari yo'qolsa ham snapshot shu vaqtdan keyin qayta hisoblanadi
+MAX_AGE_SECONDS = 30
+MAX_ENTRIES = 256
+
+
+class SnapshotCache:
+    """
+    Per-worker cache of dashboard read results, shared by all consumers.
+
+    Every result belongs to a day and is stored with the day's version (the
+    DailyStatistics seq) that was current when it was computed. Consumers
+    advance the version from the broadcast_update events the VehicleEntry
+    signals send, so any change to a day makes its cached results stale.
+    Concurrent misses for the same key share a single computation.
+    """
+
+    def __init__(self, maxsize=MAX_ENTRIES, max_age=MAX_AGE_SECONDS):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self._results = OrderedDict()
+        self._versions = {}
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    def advance(self, day, seq):
+        """Record that `day` (YYYY-MM-DD) has reached version `seq`"""
+        if seq is not None and seq > self._versions.get(day, -1):
+            self._versions[day] = seq
+
+    def clear(self):
+        self._results.clear()
+        self._versions.clear()
+
+    async def get(self, key, day, compute):
+        """Return the cached result for key, calling compute() in a thread on a miss"""
+        version = self._versions.get(day)
+        cached = self._results.get(key)
+        if (
+            cached is not None
+            and cached[0] == version
+            and time.monotonic() - cached[1] <= self.max_age
+        ):
+            self._results.move_to_end(key)
+            self.hits += 1
+            return cached[2]
+
+        flight = (key, version)
+        task = self._inflight.get(flight)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(key, version, compute))
+            self._inflight[flight] = task
+            task.add_done_callback(lambda done: self._finish(flight, done))
+        else:
+            self.shared += 1
+        # Bitta mijoz uzilsa ham boshqalar kutayotgan hisob bekor bo'lmaydi
+        return await asyncio.shield(task)
+
+    async def _load(self, key, version, compute):
+        loaded_at = time.monotonic()
+        result = await database_sync_to_async(compute)()
+        self._results[key] = (version, loaded_at, result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+        return result
+
+    def _finish(self, flight, task):
+        self._inflight.pop(flight, None)
+        if not task.cancelled():
+            task.exception()  # hech kim kutmagan bo'lsa ham xato "ko'rilgan" bo'ladi
+
+
+snapshot_cache = SnapshotCache()
+
+
+@registry.collector
+def snapshot_metrics():
+    return [
+        (
+            f"smartpark_snapshot_cache_{name}_total",
+            "counter",
+            f"Dashboard snapshot cache {name}",
+            getattr(snapshot_cache, name),
+        )
+        for name in ("hits", "misses", "shared")
+    ]
@@ -0,0 +1,121 @@
+from collections import defaultdict
+from datetime import datetime
+
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyStatistics, VehicleEntry
+
+EMPTY_STATISTICS = {
+    "total_entries": 0,
+    "total_exits": 0,
+    "total_inside": 0,
+    "unpaid_entries": 0,
+}
+
+
+def local_date(value):
+    if timezone.is_aware(value):
+        return timezone.localtime(value).date()
+    return value.date()
+
+
+def parse_day(date_str):
+    """Parse YYYY-MM-DD, falling back to today like the dashboard endpoints"""
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return timezone.now().date()
+
+
+def get_daily_statistics(day):
+    """Read the maintained counters for one day"""
+    return get_daily_snapshot(day)[0]
+
+
+def get_daily_snapshot(day):
+    """Return (statistics, version) for one day"""
+    row = DailyStatistics.objects.filter(date=day).first()
+    if row is None:
+        return dict(EMPTY_STATISTICS), 0
+    return row.as_dict(), row.version
+
+
+def _contribution(state):
+    entry_time, exit_time, is_paid = state
+    exited = exit_time is not None
+    return local_date(entry_time), (1, int(exited), int(exited and not is_paid))
+
+
+def record_transition(old_state, new_state):
+    """
+    Apply the counter delta between two (entry_time, exit_time, is_paid) states.
+
+    Either state may be None for a created or deleted entry. Every touched
+    day gets its version bumped, even when the counters do not move, and the
+    entry's current day is returned. The update runs as F() expressions
+    inside the caller's transaction.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for state, sign in ((old_state, -1), (new_state, 1)):
+        if state is None:
+            continue
+        day, counts = _contribution(state)
+        for index, count in enumerate(counts):
+            deltas[day][index] += sign * count
+
+    for day, (entries, exits, unpaid) in deltas.items():
+        DailyStatistics.objects.get_or_create(date=day)
+        DailyStatistics.objects.filter(date=day).update(
+            total_entries=F("total_entries") + entries,
+            total_exits=F("total_exits") + exits,
+            unpaid_entries=F("unpaid_entries") + unpaid,
+            version=F("version") + 1,
+        )
+
+    return _contribution(new_state or old_state)[0]
+
+
+def rebuild_daily_statistics(start=None, end=None):
+    """Recompute counters from VehicleEntry rows, optionally for a date range"""
+    entries = VehicleEntry.objects.annotate(day=TruncDate("entry_time"))
+    rows = DailyStatistics.objects.all()
+    if start:
+        entries = entries.filter(day__gte=start)
+        rows = rows.filter(date__gte=start)
+    if end:
+        entries = entries.filter(day__lte=end)
+        rows = rows.filter(date__lte=end)
+
+    counts = (
+        entries.values("day")
+        .annotate(
+            total_entries=Count("id"),
+            total_exits=Count("id", filter=Q(exit_time__isnull=False)),
+            unpaid_entries=Count(
+                "id", filter=Q(is_paid=False, exit_time__isnull=False)
+            ),
+        )
+        .order_by("day")
+    )
+    rebuilt = 0
+    seen = set()
+    for row in counts:
+        values = {
+            "total_entries": row["total_entries"],
+            "total_exits": row["total_exits"],
+            "unpaid_entries": row["unpaid_entries"],
+        }
+        # Versiya oshadi, shunda ochiq dashboardlar snapshotni qayta so'raydi
+        DailyStatistics.objects.update_or_create(
+            date=row["day"],
+            defaults={**values, "version": F("version") + 1},
+            create_defaults=values,
+        )
+        seen.add(row["day"])
+        rebuilt += 1
+    rows.exclude(date__in=seen).update(
+        total_entries=0, total_exits=0, unpaid_entries=0, version=F("version") + 1
+    )
+    return rebuilt
@@ -0,0 +1,111 @@
+import hashlib
+import os
+import posixpath
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, storages
+from django.utils import timezone
+
+from .metrics import registry, timed
+
+camera_writes = registry.counter(
+    "smartpark_camera_image_writes_total",
+    "Camera images saved, by whether the content was already stored",
+    ("result",),
+)
+
+
+class TimedFileSystemStorage(FileSystemStorage):
+    """FileSystemStorage that adds write time to the current request's metrics"""
+
+    def _save(self, name, content):
+        with timed("storage"):
+            return super()._save(name, content)
+
+
+class ContentAddressedStorage(TimedFileSystemStorage):
+    """
+    Storage for camera photos named after their content.
+
+    "entries/01A123BC_20250717_135501.jpg" is stored as
+    "entries/2025/07/17/3f/3fa1...c2.jpg": the directory of the requested
+    name, the save date, the first two hex digits of the SHA-256 and the
+    digest itself. The file is written to a temp file in the date
+    directory and renamed into place, so readers never see a partial
+    image. A byte-identical image saved on the same day (a camera retry)
+    reuses the existing file, so several entries may share one file.
+    """
+
+    # 160 bit yetarli va nom ImageField max_length (100) ga sig'adi
+    digest_length = 40
+
+    def get_available_name(self, name, max_length=None):
+        # Yakuniy nom _save da tarkibdan chiqariladi, band nomlarni tekshirish shart emas
+        return name
+
+    def _save(self, name, content):
+        with timed("storage"):
+            return self._save_by_content(name, content)
+
+    def _date_dir(self, name):
+        today = timezone.localtime() if settings.USE_TZ else timezone.now()
+        return posixpath.join(posixpath.dirname(name), today.strftime("%Y/%m/%d"))
+
+    def save_beside(self, name, content):
+        """
+        Store new content for a stored file under its own hash name.
+
+        The new file goes to the date directory of `name`, so a rewritten
+        photo (retention downscaling) stays filed under the day it was
+        taken. The old file is left for the caller to remove.
+        """
+        parts = name.split("/")
+        # <papka>/YYYY/MM/DD/<xx>/<xesh>.jpg
+        if len(parts) >= 5 and parts[-1].startswith(parts[-2]):
+            date_dir = posixpath.dirname(posixpath.dirname(name))
+        else:
+            date_dir = self._date_dir(name)
+        with timed("storage"):
+            return self._store(date_dir, posixpath.splitext(name)[1].lower(), content)
+
+    def _save_by_content(self, name, content):
+        return self._store(
+            self._date_dir(name), posixpath.splitext(name)[1].lower(), content
+        )
+
+    def _store(self, date_dir, extension, content):
+        directory = self.path(date_dir)
+        os.makedirs(directory, exist_ok=True)
+
+        digest = hashlib.sha256()
+        # Bir fayl tizimida bo'lishi uchun vaqtinchalik fayl shu papkada
+        temp_path = os.path.join(directory, f".upload-{uuid.uuid4().hex}")
+        # mkstemp 0600 beradi, oddiy saqlash kabi umask bo'yicha ruxsat qoldiramiz
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            hexdigest = digest.hexdigest()[: self.digest_length]
+            stored_name = posixpath.join(date_dir, hexdigest[:2], hexdigest + extension)
+            path = self.path(stored_name)
+            if os.path.exists(path):
+                camera_writes.inc(result="duplicate")
+                return stored_name
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            # Bir xil tarkib bir vaqtda yozilsa ham natija bitta to'liq fayl
+            os.replace(temp_path, path)
+            camera_writes.inc(result="stored")
+            return stored_name
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def camera_storage():
+    """Storage for VehicleEntry photos, configured as STORAGES["camera"]"""
+    return storages["camera"]
@@ -0,0 +1,164 @@
+"""
+Parking tariffs.
+
+A Tariff prices a session from its entry and exit time: billable hours are
+rounded the way VehicleEntry.calculate_amount always did, every billed hour
+is charged at the day or night rate of the hour it starts in, and each
+24-hour block of a session can be capped. Free cars pay nothing; special
+taxis pay nothing either unless taxi_paid_visits opts in to charging their
+first visits of the day.
+
+price_many() prices thousands of sessions at once for re-billing and
+reports. It uses numpy when it is installed and gives the same result as
+price() either way.
+"""
+
+from datetime import datetime
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+
+try:
+    import numpy
+except ImportError:  # ixtiyoriy, bo'lmasa oddiy Python tsikli ishlatiladi
+    numpy = None
+
+QUARTER_HOUR = 15 * 60
+
+
+@lru_cache(maxsize=8192)
+def _slot_hour(slot, zone):
+    return datetime.fromtimestamp(slot * QUARTER_HOUR, zone).hour
+
+
+def _local_hour(value, zone=None):
+    # USE_TZ=False bo'lsa vaqtlar allaqachon mahalliy
+    if timezone.is_naive(value):
+        return value.hour
+    # Zona siljishlari 15 daqiqaga karrali: chorak soat ichida mahalliy soat bir xil,
+    # shuning uchun bir oylik tarix uchun ham bir necha ming konvertatsiya yetadi
+    zone = zone or timezone.get_current_timezone()
+    return _slot_hour(int(value.timestamp() // QUARTER_HOUR), zone)
+
+
+class Tariff:
+    def __init__(
+        self,
+        day_rate,
+        night_rate=None,
+        night_start=22,
+        night_end=6,
+        grace_minutes=0,
+        min_hours=1,
+        daily_cap=None,
+        taxi_paid_visits=0,
+    ):
+        self.day_rate = day_rate
+        self.night_rate = day_rate if night_rate is None else night_rate
+        self.night_start = night_start
+        self.night_end = night_end
+        self.grace_seconds = grace_minutes * 60
+        self.min_hours = min_hours
+        self.daily_cap = daily_cap
+        self.taxi_paid_visits = taxi_paid_visits
+        # Kunduz va tun narxi bir xil bo'lsa, kirish soati ahamiyatsiz
+        self.uniform = self.night_rate == self.day_rate
+
+        # Soat boshlanishi bo'yicha narx, ikki kunlik jadvalning prefiks yig'indisi:
+        # hour..hour+n soatlar narxi = _prefix[hour + n] - _prefix[hour]
+        self._prefix = [0]
+        for hour in range(48):
+            self._prefix.append(self._prefix[-1] + self.hour_rate(hour % 24))
+
+    @classmethod
+    def from_settings(cls):
+        return cls(**settings.TARIFF)
+
+    def is_night(self, hour):
+        if self.night_start <= self.night_end:
+            return self.night_start <= hour < self.night_end
+        return hour >= self.night_start or hour < self.night_end
+
+    def hour_rate(self, hour):
+        return self.night_rate if self.is_night(hour) else self.day_rate
+
+    def start_hour(self, entry_time):
+        return 0 if self.uniform else _local_hour(entry_time)
+
+    def billable_hours(self, seconds):
+        # Eski hisob: round(h + 0.5) - Python round juftga yaxlitlaydi,
+        # shuning uchun aniq 2 soat 2, aniq 1 soat esa 2 soat bo'ladi
+        return max(self.min_hours, round(seconds / 3600 + 0.5))
+
+    def _charge(self, hour, hours):
+        days, rest = divmod(hours, 24)
+        day_charge = self._prefix[24]
+        rest_charge = self._prefix[hour + rest] - self._prefix[hour]
+        if self.daily_cap is not None:
+            day_charge = min(day_charge, self.daily_cap)
+            rest_charge = min(rest_charge, self.daily_cap)
+        return days * day_charge + rest_charge
+
+    def price(self, entry_time, exit_time):
+        """Amount for one session; 0 while the vehicle is still inside"""
+        if not exit_time:
+            return 0
+        seconds = (exit_time - entry_time).total_seconds()
+        # Eski hisobda bepul vaqt yo'q: 0 daqiqa ham 1 soat
+        if self.grace_seconds and seconds <= self.grace_seconds:
+            return 0
+        hours = self.billable_hours(seconds)
+        return int(self._charge(self.start_hour(entry_time), hours))
+
+    def price_exit(self, entry, car=None, visits_today=1):
+        """Amount for an entry leaving now, with the car's policy applied"""
+        if car is not None and car.is_free:
+            return 0
+        if car is not None and car.is_special_taxi:
+            # Maxsus taksi kunning birinchi tashriflari uchungina to'laydi
+            if visits_today > self.taxi_paid_visits:
+                return 0
+        return self.price(entry.entry_time, entry.exit_time)
+
+    def price_many(self, sessions):
+        """Amounts for (entry_time, exit_time) pairs, in the same order"""
+        if numpy is None:
+            return [self.price(*session) for session in sessions]
+        sessions = list(sessions)
+        count = len(sessions)
+        # Vaqt ayirmasi Python'da, qolgan hisob butun massiv ustida
+        seconds = numpy.fromiter(
+            ((end - start).total_seconds() if end else 0.0 for start, end in sessions),
+            dtype=float,
+            count=count,
+        )
+        inside = numpy.fromiter(
+            (not end for _, end in sessions), dtype=bool, count=count
+        )
+        if self.uniform:
+            start_hours = numpy.zeros(count, dtype=numpy.int64)
+        else:
+            zone = timezone.get_current_timezone()
+            start_hours = numpy.fromiter(
+                (_local_hour(start, zone) for start, _ in sessions),
+                dtype=numpy.int64,
+                count=count,
+            )
+
+        hours = numpy.maximum(self.min_hours, numpy.round(seconds / 3600 + 0.5))
+        days, rest = numpy.divmod(hours.astype(numpy.int64), 24)
+        prefix = numpy.array(self._prefix)
+        day_charge = prefix[24]
+        rest_charge = prefix[start_hours + rest] - prefix[start_hours]
+        if self.daily_cap is not None:
+            day_charge = min(day_charge, self.daily_cap)
+            rest_charge = numpy.minimum(rest_charge, self.daily_cap)
+        amounts = (days * day_charge + rest_charge).astype(numpy.int64)
+        if self.grace_seconds:
+            amounts[seconds <= self.grace_seconds] = 0
+        amounts[inside] = 0
+        return amounts.tolist()
+
+
+tariff = Tariff.from_settings()
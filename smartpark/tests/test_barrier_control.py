@@ -0,0 +1,45 @@
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from smartpark.barier_control import CLOSE_COMMAND, OPEN_COMMAND, BarrierController
+
+
+class BarrierControllerTests(SimpleTestCase):
+    def setUp(self):
+        self.controller = BarrierController("loop://", settle_seconds=0)
+        self.written = []
+        self.done = threading.Event()
+        self.addCleanup(self.controller.stop)
+
+    def write(self, command):
+        self.written.append(command)
+        if len(self.written) == 2:
+            self.done.set()
+        return True
+
+    def test_auto_close_after_open(self):
+        with mock.patch.object(self.controller, "_write", side_effect=self.write):
+            self.controller.open_barrier(close_after=0.01)
+            self.assertTrue(self.done.wait(2))
+        self.assertEqual(self.written, [OPEN_COMMAND, CLOSE_COMMAND])
+
+    def test_worker_survives_unexpected_error(self):
+        failures = [RuntimeError("boom")]
+
+        def write(command):
+            if failures:
+                raise failures.pop()
+            return self.write(command)
+
+        with (
+            mock.patch.object(self.controller, "_write", side_effect=write),
+            self.assertLogs("smartpark.barier_control", "ERROR"),
+        ):
+            self.controller.open_barrier()
+            self.controller.open_barrier()
+            self.controller.close_barrier()
+            self.assertTrue(self.done.wait(2))
+        self.assertTrue(self.controller._thread.is_alive())
+        self.assertEqual(self.written, [OPEN_COMMAND, CLOSE_COMMAND])
@@ -0,0 +1,148 @@
+import io
+from importlib import import_module
+from unittest import skipIf
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from smartpark import car_registry
+from smartpark.car_registry import (
+    ImportFormatError,
+    export_xlsx,
+    import_cars,
+    parse_cars,
+    read_rows,
+)
+from smartpark.models import Cars
+
+CSV = (
+    "\ufeffNumber_Plate,car_type,position\n"
+    "01 a 123 bc,free,Direktor\n"
+    "01A456BC,blocked,\n"
+    "bad,normal,\n"
+    "01a456bc,special_taxi,\n"
+)
+
+
+def parse(text, filename="cars.csv"):
+    return parse_cars(read_rows(io.BytesIO(text.encode()), filename))
+
+
+class ParseCarsTests(TestCase):
+    def test_rows_are_normalized_and_validated(self):
+        cars, errors = parse(CSV)
+        self.assertEqual(errors, [{"row": 4, "error": "invalid number plate 'bad'"}])
+        self.assertEqual(
+            [(car.number_plate, car.is_free, car.is_special_taxi) for car in cars],
+            [("01A123BC", True, False), ("01A456BC", False, True)],
+        )
+        self.assertEqual(cars[0].position, "Direktor")
+
+    def test_flag_columns(self):
+        cars, errors = parse(
+            "number_plate,is_free,is_blocked\n01A123BC,0,ha\n01A456BC,maybe,0\n"
+        )
+        self.assertTrue(cars[0].is_blocked)
+        self.assertEqual(errors[0]["row"], 3)
+
+    def test_upsert_on_normalized_plate(self):
+        Cars.objects.create(number_plate="01A123BC", is_blocked=True)
+        cars, _ = parse(CSV)
+        self.assertEqual(import_cars(cars), {"created": 1, "updated": 1})
+        car = Cars.objects.get(number_plate="01A123BC")
+        self.assertTrue(car.is_free)
+        self.assertFalse(car.is_blocked)
+        self.assertEqual(Cars.objects.count(), 2)
+
+
+@skipIf(car_registry.openpyxl is None, "openpyxl is not installed")
+class XlsxTests(TestCase):
+    def test_export_reimports(self):
+        Cars.objects.create(number_plate="01A123BC", is_free=True, position="x")
+        output = io.BytesIO()
+        export_xlsx(output)
+        output.seek(0)
+        cars, errors = parse_cars(read_rows(output, "cars.xlsx"))
+        self.assertEqual(errors, [])
+        self.assertEqual([car.number_plate for car in cars], ["01A123BC"])
+
+    def test_broken_file_is_a_format_error(self):
+        for data in (b"not a zip", b"PK\x03\x04broken"):
+            with self.subTest(data=data), self.assertRaises(ImportFormatError):
+                list(read_rows(io.BytesIO(data), "cars.xlsx"))
+
+
+class NormalizePlatesMigrationTests(TestCase):
+    def test_plates_equal_after_normalizing_are_merged(self):
+        first = Cars.objects.create(number_plate="01 a 123 bc")
+        Cars.objects.create(number_plate="01A123BC", is_blocked=True)
+        Cars.objects.create(number_plate="01A456BC")
+        migration = import_module("smartpark.migrations.0016_cars_unique_number_plate")
+        migration.normalize_plates(apps, None)
+        self.assertEqual(
+            list(Cars.objects.order_by("id").values_list("id", "number_plate")),
+            [(first.id, "01A123BC"), (first.id + 2, "01A456BC")],
+        )
+        self.assertTrue(Cars.objects.get(number_plate="01A123BC").is_blocked)
+
+
+class CarViewTests(TestCase):
+    def test_plates_are_normalized(self):
+        self.client.force_login(get_user_model().objects.create_user("operator"))
+        Cars.objects.create(number_plate="01A123BC")
+        response = self.client.post(
+            reverse("block_car"),
+            {"number_plate": "01 a 123 bc"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Cars.objects.get(number_plate="01A123BC").is_blocked)
+
+        url = reverse("free_plate_number")
+        response = self.client.post(url, {"number_plate": "01a123bc"})
+        self.assertEqual(response.status_code, 400)
+        self.client.post(url, {"number_plate": "01 a 456 bc"})
+        self.assertTrue(Cars.objects.get(number_plate="01A456BC").is_free)
+
+    def test_export_requires_staff(self):
+        url = reverse("export_cars")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        user = get_user_model().objects.create_user("operator", is_staff=True)
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class ImportViewTests(TestCase):
+    def setUp(self):
+        self.client = Client(enforce_csrf_checks=True)
+        self.url = reverse("import_cars")
+
+    def upload(self, **data):
+        return self.client.post(
+            self.url,
+            {"file": SimpleUploadedFile("cars.csv", CSV.encode()), **data},
+        )
+
+    def login(self, is_staff):
+        user = get_user_model().objects.create_user(
+            "operator", password="x", is_staff=is_staff
+        )
+        self.client.force_login(user)
+
+    def test_requires_staff(self):
+        self.assertEqual(self.upload().status_code, 403)
+        self.login(is_staff=False)
+        self.assertEqual(self.upload().status_code, 403)
+        self.assertFalse(Cars.objects.exists())
+
+    def test_requires_csrf_token(self):
+        self.login(is_staff=True)
+        self.assertEqual(self.upload(skip_invalid="1").status_code, 403)
+        self.client.get(reverse("cars_management"))
+        token = self.client.cookies["csrftoken"].value
+        response = self.upload(skip_invalid="1", csrfmiddlewaretoken=token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["created"], 2)
@@ -0,0 +1,46 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from smartpark import event_log, publisher
+from smartpark.event_log import RedisEventLog
+
+
+@asynccontextmanager
+async def hung_redis():
+    """A RedisEventLog whose server accepts the connection and never answers"""
+    server = await asyncio.start_server(lambda reader, writer: None, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        yield RedisEventLog(f"redis://127.0.0.1:{port}/0")
+    finally:
+        server.close()
+
+
+@mock.patch.object(event_log, "REDIS_TIMEOUT_SECONDS", 0.2)
+class HungRedisTests(SimpleTestCase):
+    async def test_append_gives_up(self):
+        started = time.monotonic()
+        async with hung_redis() as log:
+            with self.assertLogs("smartpark.event_log", "ERROR"):
+                self.assertIsNone(await log.append("entries", "{}"))
+        self.assertLess(time.monotonic() - started, 2)
+
+    async def test_broadcast_is_sent_without_an_event_id(self):
+        channel_layer = mock.Mock(group_send=mock.AsyncMock())
+        message = {"type": "broadcast_update", "text": '{"type": "update"}'}
+        async with hung_redis() as log:
+            with (
+                mock.patch.object(event_log, "event_log", log),
+                mock.patch.object(
+                    publisher, "get_channel_layer", return_value=channel_layer
+                ),
+                self.assertLogs("smartpark.event_log", "ERROR"),
+            ):
+                await publisher.BroadcastPublisher()._send_batch(
+                    [("home", message, None)]
+                )
+        channel_layer.group_send.assert_awaited_once_with("home", message)
@@ -0,0 +1,77 @@
+import io
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.test import RequestFactory, SimpleTestCase
+
+from smartpark.management.commands._anpr_payload import build_anpr_payload
+from smartpark.multipart import MemoryViewFile, MultipartParser, read_anpr_event
+
+JPEG = b"\xff\xd8\xff\xe0" + bytes(range(256)) * 40 + b"\xff\xd9"
+
+
+def push(body, content_type):
+    return RequestFactory().generic(
+        "POST", "/receive-entry/", body, content_type=content_type
+    )
+
+
+class ReadAnprEventTests(SimpleTestCase):
+    def test_plate_and_image_are_extracted(self):
+        content_type, body = build_anpr_payload("01A123BC", image=JPEG)
+        event = read_anpr_event(push(body, content_type))
+        self.assertEqual(event.number_plate, "01A123BC")
+        self.assertEqual(bytes(event.image), JPEG)
+
+    def test_small_read_chunks_split_the_delimiter(self):
+        content_type, body = build_anpr_payload("01A123BC", image=JPEG)
+        event = read_anpr_event(push(body, content_type), chunk_size=7)
+        self.assertEqual(bytes(event.image), JPEG)
+
+    def test_missing_closing_boundary_keeps_the_last_part(self):
+        content_type, body = build_anpr_payload("01A123BC", image=JPEG)
+        truncated = body[: body.rindex(b"--MIME_boundary--")]
+        event = read_anpr_event(push(truncated, content_type))
+        self.assertEqual(bytes(event.image), JPEG)
+
+    def test_body_without_boundary_is_searched_for_the_plate(self):
+        event = read_anpr_event(
+            push(b"<licensePlate>01A123BC</licensePlate>", "text/xml")
+        )
+        self.assertEqual(event.number_plate, "01A123BC")
+        self.assertIsNone(event.image)
+
+    def test_closed_parser_does_not_add_an_empty_part(self):
+        parser = MultipartParser(b"B")
+        parser.feed(b"--B\r\nContent-Type: text/plain\r\n\r\nhi\r\n--B--\r\n")
+        parser.close()
+        self.assertEqual(len(parser.parts), 1)
+        self.assertEqual(bytes(parser.view(parser.parts[0])), b"hi")
+
+
+class MemoryViewFileTests(SimpleTestCase):
+    def setUp(self):
+        self.file = MemoryViewFile(memoryview(JPEG), name="plate.jpg")
+
+    def test_seek_supports_whence(self):
+        self.assertEqual(self.file.seek(0, io.SEEK_END), len(JPEG))
+        self.assertEqual(self.file.read(), b"")
+        self.file.seek(-2, io.SEEK_END)
+        self.assertEqual(self.file.read(), b"\xff\xd9")
+        self.file.seek(2)
+        self.file.seek(2, io.SEEK_CUR)
+        self.assertEqual(self.file.tell(), 4)
+        with self.assertRaises(ValueError):
+            self.file.seek(-1)
+
+    def test_chunks_are_bytes(self):
+        chunks = list(self.file.chunks(chunk_size=1000))
+        self.assertTrue(all(type(chunk) is bytes and chunk for chunk in chunks))
+        self.assertEqual(b"".join(chunks), JPEG)
+
+    def test_saved_by_file_system_storage(self):
+        with tempfile.TemporaryDirectory() as root:
+            storage = FileSystemStorage(location=root)
+            name = storage.save("entries/plate.jpg", self.file)
+            with storage.open(name, "rb") as saved:
+                self.assertEqual(saved.read(), JPEG)
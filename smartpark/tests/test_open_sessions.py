@@ -0,0 +1,66 @@
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.files.base import ContentFile
+from django.test import RequestFactory, TestCase, override_settings
+
+from smartpark import ingest
+from smartpark.management.commands._anpr_payload import build_anpr_payload
+from smartpark.models import VehicleEntry
+from smartpark.open_sessions import AlreadyInside, find_open_entry, open_session
+
+
+class OpenSessionTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media = media.name
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.storage = VehicleEntry._meta.get_field("entry_image").storage
+
+    def open(self, number_plate, image):
+        return open_session(
+            number_plate=number_plate,
+            entry_image=ContentFile(image, name=f"{number_plate}.jpg"),
+            total_amount=0,
+        )
+
+    def test_second_entry_is_rejected_and_its_image_removed(self):
+        first = self.open("01A123BC", b"first")
+        with self.assertRaises(AlreadyInside):
+            self.open("01 a 123 bc", b"second")
+        self.assertEqual(VehicleEntry.objects.count(), 1)
+        self.assertEqual(find_open_entry("01A123BC"), first)
+        stored = [name for _, _, files in os.walk(self.media) for name in files]
+        self.assertEqual(stored, [os.path.basename(first.entry_image.name)])
+
+    def test_shared_image_of_the_open_entry_is_kept(self):
+        first = self.open("01A123BC", b"same")
+        with self.assertRaises(AlreadyInside):
+            self.open("01A123BC", b"same")
+        self.assertTrue(self.storage.exists(first.entry_image.name))
+
+    def stored(self):
+        return sorted(name for _, _, files in os.walk(self.media) for name in files)
+
+    async def test_exit_image_is_removed_when_another_push_closed_the_session(self):
+        entry = await sync_to_async(self.open)("01A123BC", b"entry")
+        await VehicleEntry.objects.filter(pk=entry.pk).aupdate(
+            entry_time=entry.entry_time - timedelta(hours=1)
+        )
+        content_type, body = build_anpr_payload("01A123BC", image=b"exit")
+        request = RequestFactory().generic(
+            "POST", "/receive-exit/async/", body, content_type=content_type
+        )
+        before = self.stored()
+        with mock.patch.object(
+            ingest, "close_entry", mock.AsyncMock(return_value=False)
+        ):
+            response = await ingest.areceive_exit(request)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.stored(), before)
@@ -0,0 +1,48 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from smartpark.models import Cars
+from smartpark.plate_cache import CarPolicy, get_car_policy, plate_cache
+
+
+class PlatePolicyCacheTests(TestCase):
+    def setUp(self):
+        plate_cache.invalidate()
+        self.addCleanup(plate_cache.invalidate)
+
+    def test_whole_table_is_loaded_once(self):
+        Cars.objects.create(number_plate="01A123BC", is_free=True, position="x")
+        self.assertEqual(get_car_policy("01A123BC"), CarPolicy(True, False, False))
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_car_policy("99Z999ZZ"))
+            self.assertTrue(get_car_policy("01A123BC").is_free)
+
+    def test_camera_read_is_normalized(self):
+        Cars.objects.create(number_plate="01A123BC", is_blocked=True)
+        self.assertTrue(get_car_policy("01 a 123 bc").is_blocked)
+
+    def test_change_is_visible_after_commit(self):
+        car = Cars.objects.create(number_plate="01A123BC")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertFalse(get_car_policy("01A123BC").is_blocked)
+            car.is_blocked = True
+            car.save()
+        self.assertTrue(get_car_policy("01A123BC").is_blocked)
+
+    def test_uncommitted_change_is_not_dropped_early(self):
+        get_car_policy("01A123BC")
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            Cars.objects.create(number_plate="01A123BC", is_blocked=True)
+            # Boshqa thread hali commit bo'lmagan holatni keshlab qo'ymasligi kerak
+            self.assertIsNotNone(plate_cache._policies)
+        self.assertIn(plate_cache.invalidate, callbacks)
+
+    def test_load_racing_an_invalidation_is_not_cached(self):
+        def read_table():
+            plate_cache.invalidate()
+            return {}
+
+        with mock.patch.object(plate_cache, "_read_table", side_effect=read_table):
+            self.assertIsNone(get_car_policy("01A123BC"))
+        self.assertIsNone(plate_cache._policies)
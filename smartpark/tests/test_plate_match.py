@@ -0,0 +1,63 @@
+from django.test import SimpleTestCase, TestCase
+
+from smartpark.models import OpenSession, VehicleEntry
+from smartpark.open_sessions import match_open_entry
+from smartpark.plate_match import PlateIndex, confidence, distance, open_plates
+
+
+class DistanceTests(SimpleTestCase):
+    def test_lookalikes_are_cheap(self):
+        self.assertEqual(distance("01A123BC", "01A123BC"), 0)
+        self.assertEqual(distance("01A123BC", "O1A123BC"), 0.25)
+        self.assertEqual(distance("01A123BC", "01A123XC"), 1)
+        self.assertEqual(distance("01A123BC", "01A12BC"), 1)
+        self.assertAlmostEqual(confidence("01A123BC", "01A123B0"), 1 - 1 / 8)
+        self.assertAlmostEqual(confidence("01A123BC", "0IA123BC"), 1 - 0.25 / 8)
+        self.assertEqual(confidence("", ""), 0.0)
+
+
+class PlateIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = PlateIndex()
+        self.index.replace(
+            [("01A123BC", 1), ("01A456BC", 2), ("10Z777ZZ", 3), ("95X001AA", 4)]
+        )
+
+    def test_exact_and_misread(self):
+        self.assertEqual(self.index.best_match("01A123BC"), ("01A123BC", 1, 1.0))
+        match = self.index.best_match("O1A1238C")
+        self.assertEqual(match.entry_id, 1)
+        self.assertAlmostEqual(match.confidence, 1 - 0.5 / 8)
+        self.assertIsNone(self.index.best_match("77Q999QQ"))
+        self.assertIsNone(self.index.best_match(""))
+
+    def test_ambiguous_read_is_halved(self):
+        self.index.add("01A124BC", 5)
+        match = self.index.best_match("01A12XBC")
+        self.assertAlmostEqual(match.confidence, (1 - 1 / 8) / 2)
+
+    def test_discard(self):
+        self.index.discard("01A123BC")
+        self.index.discard("01A123BC")
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.best_match("01A123BC").entry_id, 2)
+
+
+class MatchOpenEntryTests(TestCase):
+    def setUp(self):
+        self.entry = VehicleEntry.objects.create(
+            number_plate="01A123BC", entry_image="x.jpg"
+        )
+        OpenSession.objects.create(plate_key="01A123BC", entry=self.entry)
+        open_plates.replace([])
+        self.addCleanup(open_plates.replace, [])
+
+    def test_fuzzy_match_reloads_and_drops_closed_sessions(self):
+        open_plates._loaded_at = None
+        entry, score = match_open_entry("01A 123 8C")
+        self.assertEqual(entry, self.entry)
+        self.assertAlmostEqual(score, 1 - 0.25 / 8)
+
+        OpenSession.objects.all().delete()
+        self.assertEqual(match_open_entry("01A1238C"), (None, 0.0))
+        self.assertEqual(len(open_plates), 0)
@@ -0,0 +1,30 @@
+import random
+from unittest import skipIf
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from smartpark.management.commands.check_query_plans import (
+    analyze_entries,
+    explain_hot_queries,
+    seed_entries,
+    seq_scan_regex,
+)
+
+
+@skipIf(seq_scan_regex() is None, "plan check supports PostgreSQL and SQLite only")
+class HotQueryPlanTests(TestCase):
+    """The dashboard and ingest lookups must stay on the vehicle_entries indexes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        random.seed(6)
+        cls.plates = seed_entries(20_000, 365)
+        analyze_entries()
+
+    def test_hot_queries_avoid_sequential_scans(self):
+        day = timezone.now().date()
+        for name, plan, is_seq_scan in explain_hot_queries(self.plates[0], day):
+            with self.subTest(query=name, vendor=connection.vendor):
+                self.assertFalse(is_seq_scan, plan)
@@ -0,0 +1,121 @@
+import csv
+import io
+from datetime import date, datetime, timedelta
+from unittest import mock, skipIf
+
+from django.conf import settings
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from smartpark import reports
+from smartpark.models import VehicleEntry
+from smartpark.reports import REPORTS, ReportError, parse_range, report_chunks
+from smartpark.statistics import local_date
+
+DAY = date(2025, 7, 17)
+
+
+def local(hour, minute=0, day=DAY):
+    value = datetime.combine(day, datetime.min.time()).replace(hour=hour, minute=minute)
+    return timezone.make_aware(value) if settings.USE_TZ else value
+
+
+class ReportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rows = [
+            ("01A123BC", local(8), local(9, 30), 10000, True),
+            (
+                "01A456BC",
+                local(23, 50),
+                local(1, day=DAY + timedelta(days=1)),
+                5000,
+                False,
+            ),
+            ("01A789BC", local(12), None, 0, False),
+            # Ertangi kun - hisobotga kirmaydi
+            ("95X001AA", local(0, 10, DAY + timedelta(days=1)), None, 0, False),
+        ]
+        VehicleEntry.objects.bulk_create(
+            VehicleEntry(
+                number_plate=number_plate,
+                entry_time=entry_time,
+                exit_time=exit_time,
+                total_amount=total_amount,
+                is_paid=is_paid,
+                entry_image="x.jpg",
+            )
+            for number_plate, entry_time, exit_time, total_amount, is_paid in rows
+        )
+
+    def read_csv(self, name):
+        data = b"".join(report_chunks(REPORTS[name], DAY, DAY, "csv"))
+        return list(csv.reader(io.StringIO(data.decode())))
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("2025-07-17", None), (DAY, DAY))
+        for start, end in (("17.07.2025", None), ("2025-07-17", "2025-07-16")):
+            with self.subTest(start=start, end=end), self.assertRaises(ReportError):
+                parse_range(start, end)
+
+    def test_parse_range_defaults_to_today(self):
+        today = local_date(timezone.now())
+        self.assertEqual(parse_range(None, None), (today, today))
+
+    def test_entries_csv_uses_local_times(self):
+        header, *rows = self.read_csv("entries")
+        self.assertEqual(header, [name for name, _ in reports.ENTRY_COLUMNS])
+        self.assertEqual([row[1] for row in rows], ["01A123BC", "01A789BC", "01A456BC"])
+        self.assertEqual(
+            rows[0][2:6], ["2025-07-17 08:00:00", "2025-07-17 09:30:00", "10000", "1"]
+        )
+        self.assertEqual(rows[1][3], "")
+
+    def test_unpaid_and_revenue(self):
+        _, *unpaid = self.read_csv("unpaid")
+        self.assertEqual([row[1] for row in unpaid], ["01A456BC"])
+        _, revenue = self.read_csv("revenue")
+        self.assertEqual(revenue, ["2025-07-17", "3", "2", "1", "10000", "1", "5000"])
+
+    def test_csv_is_streamed_in_chunks(self):
+        with mock.patch.object(reports, "CSV_CHUNK_BYTES", 1):
+            chunks = list(report_chunks(REPORTS["entries"], DAY, DAY, "csv"))
+        self.assertEqual(len(chunks), 3)
+
+    def test_endpoint(self):
+        url = reverse("export_report", args=["entries"])
+        response = self.client.get(url, {"start": "2025-07-17", "format": "xml"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(url, {"start": "2025-07-17"})
+        self.assertIn("entries_2025-07-17.csv", response["Content-Disposition"])
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 4)
+        # start berilmasa - bugungi kun
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 1)
+
+    @skipIf(reports.pyarrow is None, "pyarrow is not installed")
+    def test_arrow_formats_match_csv(self):
+        import pyarrow.ipc
+        import pyarrow.parquet
+
+        expected = self.read_csv("entries")[1:]
+        with mock.patch.object(reports, "BATCH_ROWS", 2):
+            parquet = b"".join(report_chunks(REPORTS["entries"], DAY, DAY, "parquet"))
+            arrow = b"".join(report_chunks(REPORTS["entries"], DAY, DAY, "arrow"))
+        tables = (
+            pyarrow.parquet.read_table(io.BytesIO(parquet)),
+            pyarrow.ipc.open_stream(arrow).read_all(),
+        )
+        for table in tables:
+            self.assertEqual(table.num_rows, 3)
+            self.assertEqual(
+                table.column("number_plate").to_pylist(), [row[1] for row in expected]
+            )
+            self.assertEqual(
+                table.column("entry_time").to_pylist()[0], datetime(2025, 7, 17, 8)
+            )
+        self.assertEqual(
+            pyarrow.parquet.ParquetFile(io.BytesIO(parquet)).num_row_groups, 2
+        )
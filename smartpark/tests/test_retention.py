@@ -0,0 +1,83 @@
+import hashlib
+import io
+import posixpath
+import tempfile
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from smartpark.models import VehicleEntry
+from smartpark.retention import downscale_tier
+from smartpark.storage import camera_storage
+
+
+def jpeg(color, size=(1600, 1200)):
+    output = io.BytesIO()
+    Image.new("RGB", size, color).save(output, "JPEG")
+    return output.getvalue()
+
+
+class DownscaleTierTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.storage = camera_storage()
+        self.now = timezone.now()
+
+    def entry(self, color, **fields):
+        name = self.storage.save("entries/photo.jpg", ContentFile(jpeg(color)))
+        return VehicleEntry.objects.create(
+            number_plate="01A123BC",
+            entry_image=name,
+            exit_time=self.now - timedelta(days=39),
+            **fields,
+        )
+
+    def downscale(self):
+        VehicleEntry.objects.update(entry_time=self.now - timedelta(days=40))
+        return downscale_tier(
+            self.now - timedelta(days=30),
+            self.now - timedelta(days=180),
+            640,
+            75,
+            False,
+        )
+
+    def test_free_exit_is_rewritten_under_its_new_hash(self):
+        free = self.entry("red", total_amount=0)
+        unpaid = self.entry("blue", total_amount=5000)
+        old_name = free.entry_image.name
+
+        self.assertEqual(self.downscale().files, 1)
+
+        free.refresh_from_db()
+        name = free.entry_image.name
+        self.assertNotEqual(name, old_name)
+        self.assertFalse(self.storage.exists(old_name))
+        # Eski rasm bilan bir xil sana papkasi, nom yangi tarkib xeshi
+        self.assertEqual(
+            posixpath.dirname(posixpath.dirname(name)),
+            posixpath.dirname(posixpath.dirname(old_name)),
+        )
+        with self.storage.open(name) as image_file:
+            data = image_file.read()
+        self.assertTrue(name.endswith(hashlib.sha256(data).hexdigest()[:40] + ".jpg"))
+        with Image.open(io.BytesIO(data)) as image:
+            self.assertEqual(image.size, (640, 480))
+
+        unpaid_name = unpaid.entry_image.name
+        unpaid.refresh_from_db()
+        self.assertEqual(unpaid.entry_image.name, unpaid_name)
+        self.assertEqual(self.downscale().files, 0)
+
+    def test_file_shared_with_an_unpaid_entry_is_kept(self):
+        self.entry("red", is_paid=True, total_amount=5000)
+        unpaid = self.entry("red", total_amount=5000)
+        self.assertEqual(self.downscale().files, 0)
+        self.assertTrue(self.storage.exists(unpaid.entry_image.name))
@@ -0,0 +1,136 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+
+from smartpark.models import Cars, CarClass, HourlyRollup, VehicleEntry
+from smartpark.plate_cache import plate_cache
+from smartpark.rollups import COUNTERS, day_start, hourly, rebuild_rollups
+
+DAY = date(2025, 7, 17)
+
+
+def local(hour, minute=0, day=DAY):
+    # rollups.py soat boshlari kabi: USE_TZ o'chiq bo'lsa zonasiz
+    return day_start(day).replace(hour=hour, minute=minute)
+
+
+def maintained():
+    """{(hour, car_class): counters} of the rows that are not all zero"""
+    return {
+        (hour, car): counters
+        for hour, car, *counters in HourlyRollup.objects.values_list(
+            "hour", "car_class", *COUNTERS
+        )
+        if any(counters)
+    }
+
+
+class HourlyRollupTests(TestCase):
+    def setUp(self):
+        plate_cache.invalidate()
+        self.addCleanup(plate_cache.invalidate)
+
+    def entry(self, number_plate="01A123BC", **fields):
+        return VehicleEntry.objects.create(
+            number_plate=number_plate,
+            entry_time=local(9, 30),
+            entry_image="x.jpg",
+            **fields,
+        )
+
+    def assert_matches_rebuild(self):
+        before = maintained()
+        rebuild_rollups(DAY, DAY + timedelta(days=1))
+        self.assertEqual(maintained(), before)
+
+    def test_exit_counts_parked_seconds_and_revenue(self):
+        entry = self.entry()
+        entry.exit_time = local(12, 15)
+        entry.total_amount = 15000
+        entry.save()
+        rows = maintained()
+        normal = CarClass.NORMAL
+        self.assertEqual(rows[local(9), normal], [1, 0, 0, 0, 1800])
+        self.assertEqual(rows[local(10), normal], [0, 0, 0, 0, 3600])
+        self.assertEqual(rows[local(12), normal], [0, 1, 15000, 0, 900])
+        entry.mark_as_paid()
+        self.assertEqual(maintained()[local(12), normal], [0, 1, 15000, 15000, 900])
+        self.assert_matches_rebuild()
+
+    def test_class_is_kept_from_entry_time(self):
+        car = Cars.objects.create(number_plate="01A123BC", is_free=True, position="x")
+        entry = self.entry()
+        self.assertEqual(entry.car_class, CarClass.FREE)
+
+        car.is_free = False
+        car.save()
+        plate_cache.invalidate()
+        partial = VehicleEntry.objects.only("id", "exit_time").get(pk=entry.pk)
+        partial.exit_time = local(10)
+        partial.save(update_fields=["exit_time"])
+
+        self.assertEqual({car for _, car in maintained()}, {CarClass.FREE})
+        self.assert_matches_rebuild()
+        self.assertEqual({car for _, car in maintained()}, {CarClass.FREE})
+
+    def test_deferred_delete(self):
+        entry = self.entry(exit_time=local(11), total_amount=5000)
+        VehicleEntry.objects.only("id").get(pk=entry.pk).delete()
+        self.assertEqual(maintained(), {})
+
+    def test_rebuild_updates_rows_in_place(self):
+        self.entry(exit_time=local(10, 30))
+        ids = set(HourlyRollup.objects.values_list("id", flat=True))
+        stale = HourlyRollup.objects.create(
+            hour=local(20), car_class=CarClass.NORMAL, entries=7
+        )
+        HourlyRollup.objects.filter(hour=local(9)).update(entries=5)
+
+        self.assertEqual(rebuild_rollups(DAY, DAY), 2)
+        self.assertLessEqual(
+            ids | {stale.id}, set(HourlyRollup.objects.values_list("id", flat=True))
+        )
+        self.assertEqual(
+            maintained(),
+            {
+                (local(9), CarClass.NORMAL): [1, 0, 0, 0, 1800],
+                (local(10), CarClass.NORMAL): [0, 1, 0, 0, 1800],
+            },
+        )
+
+    def test_full_rebuild_without_range(self):
+        self.entry(exit_time=local(1, day=DAY + timedelta(days=2)))
+        before = maintained()
+        HourlyRollup.objects.update(occupied_seconds=0)
+        rebuild_rollups()
+        self.assertEqual(maintained(), before)
+
+    def test_hourly_adds_vehicles_inside(self):
+        entry = self.entry()
+        # Qayta hisoblash yaratgan bo'sh qatorlar javobda ko'rinmaydi
+        rebuild_rollups(DAY, DAY)
+        row = hourly(DAY, DAY)[9]
+        self.assertEqual(row["entries"], 1)
+        self.assertEqual(
+            row["classes"],
+            {
+                CarClass.NORMAL: {
+                    "entries": 1,
+                    "exits": 0,
+                    "revenue": 0,
+                    "paid_revenue": 0,
+                    "occupancy": 0.0,
+                }
+            },
+        )
+        self.assertEqual(entry.car_class, CarClass.NORMAL)
+
+    def test_endpoints_default_to_today(self):
+        for name in ("analytics_hourly", "analytics_summary", "analytics_peak_hours"):
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            len(self.client.get(reverse("analytics_hourly")).json()["hours"]), 24
+        )
@@ -0,0 +1,40 @@
+from unittest import mock
+
+from django.core.files.storage import Storage
+from django.test import TestCase
+from django.utils import timezone
+
+from smartpark.models import VehicleEntry
+from smartpark.serializers import ENTRY_ROW, _field_storage, compile_serializer
+
+
+class RemoteStorage(Storage):
+    def url(self, name):
+        return f"https://cdn.example.com/{name}"
+
+
+class EntrySerializerTests(TestCase):
+    def setUp(self):
+        self.entry = VehicleEntry.objects.create(
+            number_plate="01A123BC",
+            entry_time=timezone.now(),
+            entry_image="entries/a b.jpg",
+            entry_thumbnail="thumbnails/entries/a.jpg",
+        )
+        self.serializer = compile_serializer(ENTRY_ROW)
+
+    def test_rows_and_instance_agree(self):
+        row = self.serializer.first(VehicleEntry.objects.filter(pk=self.entry.pk))
+        self.assertEqual(row, self.serializer.instance(self.entry))
+        self.assertEqual(row["status"], "inside")
+        self.assertEqual(row["entry_image"], "/media/entries/a%20b.jpg")
+        self.assertIsNone(row["exit_image"])
+
+    def test_urls_come_from_the_field_storage(self):
+        field = VehicleEntry._meta.get_field("entry_image")
+        _field_storage.cache_clear()
+        self.addCleanup(_field_storage.cache_clear)
+        with mock.patch.object(field, "storage", RemoteStorage()):
+            row = self.serializer.instance(self.entry)
+        self.assertEqual(row["entry_image"], "https://cdn.example.com/entries/a b.jpg")
+        self.assertEqual(row["entry_thumbnail"], "/media/thumbnails/entries/a.jpg")
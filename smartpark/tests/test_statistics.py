@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from smartpark.models import DailyStatistics, VehicleEntry
+from smartpark.statistics import (
+    get_daily_statistics,
+    local_date,
+    rebuild_daily_statistics,
+)
+
+
+class DailyStatisticsTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.today = local_date(self.now)
+
+    def entry(self, **fields):
+        return VehicleEntry.objects.create(
+            number_plate="01A123BC", entry_time=self.now, entry_image="x.jpg", **fields
+        )
+
+    def counters(self):
+        return get_daily_statistics(self.today)
+
+    def assert_matches_rebuild(self):
+        maintained = self.counters()
+        rebuild_daily_statistics()
+        self.assertEqual(maintained, self.counters())
+
+    def test_entry_exit_and_payment(self):
+        entry = self.entry()
+        self.assertEqual(self.counters()["total_inside"], 1)
+        entry.exit_time = self.now + timedelta(hours=1)
+        entry.save()
+        self.assertEqual(self.counters()["unpaid_entries"], 1)
+        entry.mark_as_paid()
+        self.assertEqual(
+            self.counters(),
+            {
+                "total_entries": 1,
+                "total_exits": 1,
+                "total_inside": 0,
+                "unpaid_entries": 0,
+            },
+        )
+
+    def test_deferred_instance_reads_its_old_state(self):
+        entry = self.entry(exit_time=self.now + timedelta(hours=1))
+        partial = VehicleEntry.objects.only("id", "is_paid").get(pk=entry.pk)
+        partial.is_paid = True
+        partial.save(update_fields=["is_paid"])
+        self.assertEqual(self.counters()["unpaid_entries"], 0)
+        self.assert_matches_rebuild()
+
+    def test_bare_instance_save_and_delete(self):
+        entry = self.entry()
+        VehicleEntry(
+            pk=entry.pk,
+            number_plate=entry.number_plate,
+            entry_time=entry.entry_time,
+            exit_time=self.now + timedelta(minutes=5),
+            entry_image="x.jpg",
+        ).save()
+        self.assertEqual(self.counters()["total_exits"], 1)
+        VehicleEntry.objects.get(pk=entry.pk).delete()
+        self.assertEqual(self.counters()["total_entries"], 0)
+        self.assert_matches_rebuild()
+
+    def test_rebuild_resets_days_without_entries(self):
+        DailyStatistics.objects.create(date=self.today, total_entries=5)
+        rebuild_daily_statistics(self.today, self.today)
+        self.assertEqual(self.counters()["total_entries"], 0)
@@ -0,0 +1,86 @@
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock, skipIf
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from smartpark import tariffs
+from smartpark.plate_cache import CarPolicy
+from smartpark.tariffs import Tariff
+
+
+def local(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+class TariffTests(SimpleTestCase):
+    def setUp(self):
+        self.tariff = Tariff(day_rate=5000, night_rate=3000)
+
+    def test_legacy_hour_rounding(self):
+        flat = Tariff(day_rate=1000)
+        start = local(2025, 7, 17, 10)
+        for minutes, amount in ((0, 1000), (59, 1000), (60, 2000), (120, 2000)):
+            with self.subTest(minutes=minutes):
+                end = start + timedelta(minutes=minutes)
+                self.assertEqual(flat.price(start, end), amount)
+        self.assertEqual(flat.price(start, None), 0)
+
+    def test_each_hour_is_charged_at_its_own_rate(self):
+        # 21:30 - 23:10: 2 soat, biri kunduzgi, biri tungi
+        start = local(2025, 7, 17, 21, 30)
+        self.assertEqual(self.tariff.price(start, local(2025, 7, 17, 23, 10)), 8000)
+
+    def test_daily_cap_and_grace(self):
+        tariff = Tariff(day_rate=5000, daily_cap=20000, grace_minutes=10)
+        start = local(2025, 7, 17, 8)
+        self.assertEqual(tariff.price(start, start + timedelta(minutes=10)), 0)
+        self.assertEqual(tariff.price(start, start + timedelta(hours=30)), 40000)
+
+    def test_car_policy(self):
+        entry = SimpleNamespace(
+            entry_time=local(2025, 7, 17, 10), exit_time=local(2025, 7, 17, 12)
+        )
+        free = CarPolicy(True, False, False)
+        taxi = CarPolicy(False, True, False)
+        self.assertEqual(self.tariff.price_exit(entry, free), 0)
+        self.assertEqual(self.tariff.price_exit(entry, taxi, visits_today=1), 0)
+        charged = Tariff(day_rate=5000, taxi_paid_visits=1)
+        self.assertEqual(charged.price_exit(entry, taxi, visits_today=1), 10000)
+        self.assertEqual(charged.price_exit(entry, taxi, visits_today=2), 0)
+
+
+class PriceManyTests(SimpleTestCase):
+    def sessions(self):
+        rng = random.Random(7)
+        start = local(2025, 3, 1)
+        sessions = []
+        for _ in range(2000):
+            entry = start + timedelta(minutes=rng.randrange(60 * 24 * 60))
+            minutes = rng.choice((0, 10, 59, 60, 61, 120, rng.randrange(6000)))
+            exit = None if rng.random() < 0.1 else entry + timedelta(minutes=minutes)
+            sessions.append((entry, exit))
+        return sessions
+
+    def assert_matches_price(self):
+        for tariff in (
+            Tariff(day_rate=5000),
+            Tariff(day_rate=5000, night_rate=3000, daily_cap=40000),
+            Tariff(day_rate=5000, night_rate=2000, night_start=1, night_end=5),
+            Tariff(day_rate=4000, grace_minutes=15, min_hours=2),
+        ):
+            sessions = self.sessions()
+            self.assertEqual(
+                tariff.price_many(sessions),
+                [tariff.price(*session) for session in sessions],
+            )
+
+    @skipIf(tariffs.numpy is None, "numpy is not installed")
+    def test_vectorized(self):
+        self.assert_matches_price()
+
+    def test_without_numpy(self):
+        with mock.patch.object(tariffs, "numpy", None):
+            self.assert_matches_price()
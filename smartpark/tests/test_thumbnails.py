@@ -0,0 +1,60 @@
+import json
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from smartpark.models import VehicleEntry
+from smartpark.thumbnails import THUMBNAIL_SIZE, generate_thumbnails
+
+
+def jpeg(size=(1280, 720)):
+    output = BytesIO()
+    Image.new("RGB", size, "gray").save(output, "JPEG")
+    return output.getvalue()
+
+
+class ThumbnailTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.entry = VehicleEntry.objects.create(
+            number_plate="01A123BC",
+            entry_image=ContentFile(jpeg(), name="entry.jpg"),
+        )
+
+    def model_updates(self, publish):
+        frames = []
+        for call in publish.call_args_list:
+            message = call.args[1]
+            if isinstance(message, dict) and message["type"] == "broadcast_update":
+                frames.append(json.loads(message["text"]))
+        return frames
+
+    def test_thumbnail_fits_the_box(self):
+        self.assertEqual(generate_thumbnails(self.entry), ["entry_thumbnail"])
+        entry = VehicleEntry.objects.get(pk=self.entry.pk)
+        with Image.open(entry.entry_thumbnail) as image:
+            self.assertLessEqual(image.width, THUMBNAIL_SIZE[0])
+            self.assertLessEqual(image.height, THUMBNAIL_SIZE[1])
+
+    def test_stale_job_does_not_publish_old_row(self):
+        stale = VehicleEntry.objects.get(pk=self.entry.pk)
+        self.entry.exit_time = timezone.now() + timedelta(hours=1)
+        self.entry.save()
+        with mock.patch("smartpark.signals.publish") as publish:
+            generate_thumbnails(stale)
+        (frame,) = self.model_updates(publish)
+        self.assertEqual(frame["action"], "thumbnail_ready")
+        self.assertEqual(frame["entry"]["status"], "unpaid")
+        self.assertIsNotNone(frame["entry"]["entry_thumbnail"])
+        entry = VehicleEntry.objects.get(pk=self.entry.pk)
+        self.assertIsNotNone(entry.exit_time)
@@ -0,0 +1,88 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (480, 320)
+THUMBNAIL_QUALITY = 70
+
+# Asl rasm maydoni -> thumbnail maydoni
+THUMBNAIL_FIELDS = {
+    "entry_image": "entry_thumbnail",
+    "exit_image": "exit_thumbnail",
+}
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="thumbnails")
+
+
+def render_thumbnail(image_file):
+    """Return a recompressed JPEG that fits in THUMBNAIL_SIZE"""
+    with Image.open(image_file) as image:
+        # JPEG ni to'liq o'lchamda emas, kichraytirib dekodlaydi
+        image.draft("RGB", THUMBNAIL_SIZE)
+        image = image.convert("RGB")
+        image.thumbnail(THUMBNAIL_SIZE)
+        output = BytesIO()
+        image.save(
+            output,
+            "JPEG",
+            quality=THUMBNAIL_QUALITY,
+            optimize=True,
+            progressive=True,
+        )
+    return output.getvalue()
+
+
+def missing_thumbnails(entry):
+    return [
+        target
+        for source, target in THUMBNAIL_FIELDS.items()
+        if getattr(entry, source) and not getattr(entry, target)
+    ]
+
+
+def generate_thumbnails(entry):
+    """Render the entry's missing thumbnails and save only those fields"""
+    updated = []
+    for source, target in THUMBNAIL_FIELDS.items():
+        original = getattr(entry, source)
+        if not original or getattr(entry, target):
+            continue
+        try:
+            with original.open("rb"):
+                data = render_thumbnail(original)
+        except (OSError, UnidentifiedImageError, ValueError) as e:
+            logger.warning("Cannot thumbnail %s: %s", original.name, e)
+            continue
+        getattr(entry, target).save(
+            os.path.basename(original.name), ContentFile(data), save=False
+        )
+        updated.append(target)
+    if updated:
+        entry.save(update_fields=updated)
+    return updated
+
+
+def _generate_for_id(entry_id):
+    from .models import VehicleEntry
+
+    close_old_connections()
+    try:
+        entry = VehicleEntry.objects.filter(pk=entry_id).first()
+        if entry is not None:
+            generate_thumbnails(entry)
+    except Exception:
+        logger.exception("Thumbnail generation failed for entry %s", entry_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_thumbnails(entry_id):
+    """Render thumbnails in the background once the current transaction commits"""
+    transaction.on_commit(lambda: _executor.submit(_generate_for_id, entry_id))
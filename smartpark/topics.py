@@ -0,0 +1,50 @@
+"""
+Channel-layer groups a HomeConsumer can subscribe to.
+
+Dated topics are "<name>.<YYYY-MM-DD>", so a dashboard showing one day
+only receives that day's entry deltas and counters.
+"""
+
+import re
+from datetime import date
+
+from django.utils import timezone
+
+# Kunlik: yozuv deltalari (statistika bilan) va faqat statistika
+ENTRIES = "entries"
+STATS = "stats"
+# Oxirgi to'lanmagan yozuv paneli
+UNPAID = "unpaid"
+CARS = "cars"
+ALERTS = "alerts"
+
+_TOPIC_RE = re.compile(r"^(?:(?:entries|stats)\.\d{4}-\d{2}-\d{2}|unpaid|cars|alerts)$")
+
+
+def _day(day):
+    return day.isoformat() if isinstance(day, date) else day
+
+
+def entries_group(day):
+    return f"{ENTRIES}.{_day(day)}"
+
+
+def stats_group(day):
+    return f"{STATS}.{_day(day)}"
+
+
+def default_topics():
+    """What a client that does not ask for topics gets: everything for today"""
+    today = timezone.now().date()
+    return [entries_group(today), stats_group(today), UNPAID, CARS, ALERTS]
+
+
+def parse_topics(value):
+    """Turn "a,b" (or a list from a WebSocket message) into group names"""
+    if isinstance(value, str):
+        value = value.split(",")
+    topics = [str(topic).strip() for topic in value or [] if str(topic).strip()]
+    unknown = [topic for topic in topics if not _TOPIC_RE.match(topic)]
+    if unknown:
+        raise ValueError(f"Unknown topics: {', '.join(unknown)}")
+    return topics
@@ -13,6 +13,8 @@ from .views import (
     block_car,
     get_unpaid_entries,
     get_receipt,
+    metrics,
+    archived_image,
     FreePlateNumberView, 
     DeleteFreePlateView,
     CarsManagementView,
@@ -20,8 +22,15 @@ from .views import (
     update_car,
     delete_car,
     upload_license,
+    import_cars_file,
+    export_cars_file,
+    export_report,
+    analytics_hourly,
+    analytics_summary,
+    analytics_peak_hours,
     UnpaidEntriesView
 )
+from .ingest import areceive_entry, areceive_exit
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib.staticfiles.urls import staticfiles_urlpatterns
@@ -30,6 +39,8 @@ urlpatterns = (
     [
         path("receive-entry/", receive_entry),
         path("receive-exit/", receive_exit),
+        path("receive-entry/async/", areceive_entry),
+        path("receive-exit/async/", areceive_exit),
         path("login/", LoginView.as_view(), name="login"),
         path("logout/", LogoutView.as_view(), name="logout"),
         path("", HomeView.as_view(), name="home"),
@@ -39,6 +50,8 @@ urlpatterns = (
         path("api/cars/<int:car_id>/update/", update_car, name="update_car"),
         path("api/cars/<int:car_id>/delete/", delete_car, name="delete_car"),
         path("api/cars/upload-license/", upload_license, name="upload_license"),
+        path("api/cars/import/", import_cars_file, name="import_cars"),
+        path("api/cars/export/", export_cars_file, name="export_cars"),
         # New API endpoints
         path("api/statistics/", get_statistics, name="get_statistics"),
         path("api/vehicle-entries/", get_vehicle_entries, name="get_vehicle_entries"),
@@ -47,6 +60,21 @@ urlpatterns = (
         path("api/block-car/", block_car, name="block_car"),
         path("api/unpaid-entries/", get_unpaid_entries, name="get_unpaid_entries"),
         path("api/receipt/", get_receipt, name="get_receipt"),
+        path("api/reports/<str:report>/", export_report, name="export_report"),
+        path("api/analytics/hourly/", analytics_hourly, name="analytics_hourly"),
+        path("api/analytics/summary/", analytics_summary, name="analytics_summary"),
+        path(
+            "api/analytics/peak-hours/",
+            analytics_peak_hours,
+            name="analytics_peak_hours",
+        ),
+        path("metrics", metrics, name="metrics"),
+        # apply_retention arxivlagan rasmlar (nginx /media/archive/ ni shu yerga yuborsin)
+        path(
+            f"{settings.MEDIA_URL.lstrip('/')}archive/<path:name>",
+            archived_image,
+            name="archived_image",
+        ),
         path('free-plate-number/', FreePlateNumberView.as_view(), name='free_plate_number'),
         path('delete-free-plate/<int:pk>/', DeleteFreePlateView.as_view(), name='delete_free_plate'),
         path('unpaid-entries/', UnpaidEntriesView.as_view(), name='unpaid_entries'),
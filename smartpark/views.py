@@ -1,4 +1,11 @@
-from django.http import JsonResponse
+import csv
+import io
+import logging
+import mimetypes
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.crypto import constant_time_compare
 from django.views.decorators.csrf import csrf_exempt
 from .models import VehicleEntry, Cars
 from django.views import View
@@ -8,13 +15,57 @@ from django.utils import timezone
 from django.contrib.auth.mixins import LoginRequiredMixin
 import json
 from datetime import datetime, timedelta
-import re
-from django.core.files.base import ContentFile
 from django.db import transaction
 from django.views.decorators.http import require_POST, require_GET
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-from config.settings import MIN_TIME_BETWEEN_ENTRIES
+from config.settings import (
+    METRICS_TOKEN,
+    MIN_TIME_BETWEEN_ENTRIES,
+    PLATE_MATCH_MIN_CONFIDENCE,
+)
+from .car_registry import (
+    ImportFormatError,
+    export_csv,
+    export_xlsx,
+    import_cars,
+    parse_cars,
+    read_rows,
+)
+from .entries import (
+    day_entries,
+    entries_page,
+    parse_fields,
+    parse_limit,
+    unpaid_entries,
+)
+from .metrics import registry
+from .multipart import MemoryViewFile, read_anpr_event
+from .open_sessions import (
+    AlreadyInside,
+    close_session,
+    is_inside,
+    match_open_entry,
+    open_session,
+    plate_key,
+)
+from .plate_cache import get_car_policy
+from .publisher import publish
+from .retention import ARCHIVE_DIR, read_archived
+from .rollups import hourly, peak_hours, summary
+from .reports import (
+    FORMATS,
+    ReportError,
+    aiter_chunks,
+    filename,
+    get_report,
+    parse_range,
+    report_chunks,
+)
+from .serializers import RECEIPT_ROW, compile_serializer, json_response
+from .statistics import get_daily_statistics, parse_day
+from .tariffs import tariff
+from .topics import ALERTS
+
+logger = logging.getLogger(__name__)
 
 class LoginView(View):
     def get(self, request):
@@ -58,42 +109,20 @@ class HomeView(LoginRequiredMixin, View):
 def receive_entry(request):
     try:
         with transaction.atomic():
-            content_type = request.headers.get("Content-Type", "")
-            body_bytes = request.body
-            body_str = body_bytes.decode("utf-8", errors="ignore")
-
-            # 1. XML'dan davlat raqamini ajratamiz (masalan <licensePlate> tagidan)
-            number_plate_match = re.search(
-                r"<licensePlate>(.*?)</licensePlate>", body_str
-            )
+            # 1. So'rov oqimini bir marta o'qib, XML raqam va JPEG qismini ajratamiz
+            event = read_anpr_event(request)
             number_plate = (
-                number_plate_match.group(1)
-                if number_plate_match
-                else f"TEMP{timezone.now().strftime('%H%M%S')}"
-            )
-
-            # 2. Faylni multipart dan ajratish
-            # Bu oddiy variant: multipart so'rovdan rasmni olish
-            boundary = (
-                content_type.split("boundary=")[-1]
-                if "boundary=" in content_type
-                else None
+                event.number_plate
+                or f"TEMP{timezone.now().strftime('%H%M%S')}"
             )
 
-            if boundary:
-                parts = body_bytes.split(boundary.encode())
-                image_data = None
-                for part in parts:
-                    if b"Content-Type: image/jpeg" in part:
-                        image_data = part.split(b"\r\n\r\n", 1)[-1].rsplit(b"\r\n", 1)[
-                            0
-                        ]
-                        break
-                car = Cars.objects.filter(number_plate=number_plate, is_blocked=True).first()
-                if car:
-                    channel_layer = get_channel_layer()
-                    async_to_sync(channel_layer.group_send)(
-                                "home_updates",
+            # 2. Faylni multipart dan ajratish (nusxa olinmaydi - memoryview)
+            if event.boundary:
+                image_data = event.image
+                car = get_car_policy(number_plate)
+                if car and car.is_blocked:
+                    publish(
+                                ALERTS,
                                 {
                                     "type": "broadcast_notification",
                                     "title": "🚫 Bloklangan avtomobil",
@@ -116,13 +145,21 @@ def receive_entry(request):
                     filename = f"{number_plate}_{timestamp}.jpg"
 
                     # 4. Rasmdan ImageField fayl obyektini yasaymiz
-                    image_file = ContentFile(image_data, name=filename)
+                    image_file = MemoryViewFile(image_data, name=filename)
 
                     # 5. Bazaga yozamiz - entry_time auto_now_add=True bo'lgani uchun o'rnatmaymiz
-                    if VehicleEntry.objects.filter(number_plate=number_plate, exit_time__isnull=True).exists():
-                        channel_layer = get_channel_layer()
-                        async_to_sync(channel_layer.group_send)(
-                                    "home_updates",
+                    # Ochiq sessiya raqam bo'yicha unique: bir vaqtda kelgan ikkinchi kirish ham rad etiladi
+                    try:
+                        if is_inside(number_plate):
+                            raise AlreadyInside(number_plate)
+                        entry = open_session(
+                            number_plate=number_plate,
+                            entry_image=image_file,
+                            total_amount=0,
+                        )
+                    except AlreadyInside:
+                        publish(
+                                    ALERTS,
                                     {
                                         "type": "broadcast_notification",
                                         "title": "🚫 Avtomobil oldin kiritilgan",
@@ -137,11 +174,6 @@ def receive_entry(request):
                                 "message": f"Bu avtomobilga taqiq qo'shilgan! {number_plate}",
                             }
                         )
-                    entry = VehicleEntry.objects.create(
-                        number_plate=number_plate,
-                        entry_image=image_file,
-                        total_amount=0,
-                    )
 
                     return JsonResponse(
                         {
@@ -153,6 +185,7 @@ def receive_entry(request):
                         }
                     )
     except Exception as e:
+        logger.exception("Camera entry push failed")
         return JsonResponse({"error": str(e)}, status=500)
 
 
@@ -161,9 +194,7 @@ def receive_entry(request):
 def receive_exit(request):
     try:
         with transaction.atomic():
-            content_type = request.headers.get("Content-Type", "")
-            body_bytes = request.body
-            body_str = body_bytes.decode("utf-8", errors="ignore")
+            event = read_anpr_event(request)
             current_time = timezone.now()
 
             # Create timezone-aware datetime range for today
@@ -176,33 +207,14 @@ def receive_exit(request):
             )
 
             # 1. XML'dan davlat raqamini ajratamiz (masalan <licensePlate> tagidan)
-            number_plate_match = re.search(
-                r"<licensePlate>(.*?)</licensePlate>", body_str
-            )
             number_plate = (
-                number_plate_match.group(1)
-                if number_plate_match
-                else f"TEMP{current_time.strftime('%H%M%S')}"
-            )
-            car = Cars.objects.filter(number_plate=number_plate).first()
-
-            # 2. Faylni multipart dan ajratish
-            # Bu oddiy variant: multipart so'rovdan rasmni olish
-            boundary = (
-                content_type.split("boundary=")[-1]
-                if "boundary=" in content_type
-                else None
+                event.number_plate or f"TEMP{current_time.strftime('%H%M%S')}"
             )
+            car = get_car_policy(number_plate)
 
-            if boundary:
-                parts = body_bytes.split(boundary.encode())
-                image_data = None
-                for part in parts:
-                    if b"Content-Type: image/jpeg" in part:
-                        image_data = part.split(b"\r\n\r\n", 1)[-1].rsplit(b"\r\n", 1)[
-                            0
-                        ]
-                        break
+            # 2. Faylni multipart dan ajratish (nusxa olinmaydi - memoryview)
+            if event.boundary:
+                image_data = event.image
 
                 if image_data:
                     # 3. Fayl nomi: Raqam + sana (20250717_135501.jpg)
@@ -210,22 +222,22 @@ def receive_exit(request):
                     filename = f"{number_plate}_{timestamp}.jpg"
 
                     # 4. Rasmdan ImageField fayl obyektini yasaymiz
-                    image_file = ContentFile(image_data, name=filename)
-
-                    # Use timezone-aware datetime range instead of naive date
-                    latest_entry = (
-                        VehicleEntry.objects.filter(
-                            number_plate=number_plate,
-                            entry_time__gte=start_datetime,
-                            entry_time__lte=end_datetime,
-                        )
-                        .order_by("-entry_time")
-                        .first()
-                    )
-                    if timezone.now() - latest_entry.entry_time <= timedelta(minutes=MIN_TIME_BETWEEN_ENTRIES):
-                        channel_layer = get_channel_layer()
-                        async_to_sync(channel_layer.group_send)(
-                            "home_updates",
+                    image_file = MemoryViewFile(image_data, name=filename)
+
+                    # Ochiq sessiya kirish sanasidan qat'i nazar (tun o'tib qolgan avtomobil ham),
+                    # raqam aniq topilmasa - eng o'xshash raqam (O/0, B/8 ...)
+                    latest_entry, confidence = match_open_entry(number_plate)
+                    closest = ""
+                    if latest_entry and confidence < PLATE_MATCH_MIN_CONFIDENCE:
+                        # Ishonch past - operator qo'lda hal qiladi
+                        closest = f" Eng yaqini: {latest_entry.number_plate} ({confidence:.0%})"
+                        latest_entry = None
+                    if latest_entry and latest_entry.number_plate != number_plate:
+                        # Imtiyoz va taqiq kirishdagi raqam bo'yicha
+                        car = get_car_policy(latest_entry.number_plate)
+                    if latest_entry and timezone.now() - latest_entry.entry_time <= timedelta(minutes=MIN_TIME_BETWEEN_ENTRIES):
+                        publish(
+                            ALERTS,
                             {
                                 "type": "broadcast_notification",
                                 "title": "🚫 Avtomobil oldin kiritilgan",
@@ -241,14 +253,13 @@ def receive_exit(request):
                             }
                         )
 
-                    if latest_entry and not latest_entry.exit_time:
+                    if latest_entry:
                         # Check if car is blocked
                         if car and car.is_blocked:
                             # Send real-time notification about blocked car
                             
-                            channel_layer = get_channel_layer()
-                            async_to_sync(channel_layer.group_send)(
-                                "home_updates",
+                            publish(
+                                ALERTS,
                                 {
                                     "type": "broadcast_notification",
                                     "title": "🚫 Bloklangan avtomobil",
@@ -265,51 +276,55 @@ def receive_exit(request):
                                 }
                             )
                         
-                        if car and car.is_free and not car.is_blocked:
-                            latest_entry.exit_image = image_file
-                            latest_entry.total_amount = 0
-                            latest_entry.exit_time = current_time
-                            latest_entry.save()
-                        elif car and car.is_special_taxi and not car.is_blocked:
-                            latest_entry.exit_image = image_file
-                            latest_entry.total_amount = (
-                                latest_entry.calculate_amount()
-                                if VehicleEntry.objects.filter(
-                                    entry_time__gte=start_datetime,
-                                    entry_time__lte=end_datetime,
-                                    number_plate=number_plate,
-                                ).count()
-                                < 2
-                                else 0
+                        # Bepul, maxsus taksi va oddiy avtomobil narxi tariffs.py da
+                        visits_today = (
+                            VehicleEntry.objects.filter(
+                                entry_time__gte=start_datetime,
+                                entry_time__lte=end_datetime,
+                                number_plate=latest_entry.number_plate,
+                            ).count()
+                            if car and car.is_special_taxi
+                            else 1
+                        )
+                        # Ikki kamera bir vaqtda yuborsa, sessiyani faqat bittasi yopadi
+                        if not close_session(latest_entry):
+                            return JsonResponse(
+                                {"error": "Avtomobil bilan kirish bo'lmagan"}, status=404
                             )
-                            latest_entry.exit_time = current_time
-                            latest_entry.save()
-                        else:
-                            if (car and not car.is_blocked) or not car:
-                                latest_entry.exit_image = image_file
-                                latest_entry.exit_time = current_time
-                                latest_entry.total_amount = (
-                                    latest_entry.calculate_amount()
-                                )
-                                latest_entry.save()
-
-                                
+                        latest_entry.exit_image = image_file
+                        latest_entry.exit_time = current_time
+                        latest_entry.total_amount = tariff.price_exit(
+                            latest_entry, car, visits_today
+                        )
+                        latest_entry.save()
 
+                        if confidence < 1:
+                            publish(
+                                ALERTS,
+                                {
+                                    "type": "broadcast_notification",
+                                    "title": "🔎 Raqam taxminan aniqlandi",
+                                    "message": f"Kamera {number_plate} o'qidi, {latest_entry.number_plate} sifatida chiqarildi ({confidence:.0%})",
+                                    "notification_type": "warning",
+                                    "timestamp": timezone.now().isoformat(),
+                                },
+                            )
                         return JsonResponse(
                             {
                                 "status": "ok",
                                 "number_plate": number_plate,
+                                "matched_plate": latest_entry.number_plate,
+                                "match_confidence": round(confidence, 3),
                                 "amount": latest_entry.total_amount,
                             }
                         )
                     else:
-                        channel_layer = get_channel_layer()
-                        async_to_sync(channel_layer.group_send)(
-                                "home_updates",
+                        publish(
+                                ALERTS,
                                 {
                                     "type": "broadcast_notification",
                                     "title": "🚫 Avtomobil bilan kirish bo'lmagan",
-                                    "message": f"Avtomobil {number_plate} bilan kirish bo'lmagan!",
+                                    "message": f"Avtomobil {number_plate} bilan kirish bo'lmagan!{closest}",
                                     "notification_type": "error",
                                     "timestamp": timezone.now().isoformat(),
                                 },
@@ -319,6 +334,7 @@ def receive_exit(request):
                         )
 
     except Exception as e:
+        logger.exception("Camera exit push failed")
         return JsonResponse({"error": str(e)}, status=500)
 
 
@@ -330,49 +346,15 @@ def receive_exit(request):
 def get_statistics(request):
     """Get statistics for a specific date"""
     date_str = request.GET.get("date", timezone.now().date().isoformat())
-    try:
-        # Convert date string to timezone-aware datetime for proper filtering
-        date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-        # Create timezone-aware datetime range for the entire day
-        start_datetime = timezone.make_aware(
-            datetime.combine(date_obj, datetime.min.time())
-        )
-        end_datetime = timezone.make_aware(
-            datetime.combine(date_obj, datetime.max.time())
-        )
-    except ValueError:
-        # Fallback to today if date parsing fails
-        today = timezone.now().date()
-        start_datetime = timezone.make_aware(
-            datetime.combine(today, datetime.min.time())
-        )
-        end_datetime = timezone.make_aware(datetime.combine(today, datetime.max.time()))
 
-    # Use timezone-aware datetime range instead of naive date
-    today_entries = VehicleEntry.objects.filter(
-        entry_time__gte=start_datetime, entry_time__lte=end_datetime
-    )
-    total_entries = today_entries.count()
-    total_exits = today_entries.filter(exit_time__isnull=False).count()
-    total_inside = total_entries - total_exits
-    unpaid_entries = today_entries.filter(
-        is_paid=False, exit_time__isnull=False
-    ).count()
-
-    return JsonResponse(
-        {
-            "total_entries": total_entries,
-            "total_exits": total_exits,
-            "total_inside": total_inside,
-            "unpaid_entries": unpaid_entries,
-        }
-    )
+    # Hisoblagichlar DailyStatistics jadvalida tayyor turadi
+    return JsonResponse(get_daily_statistics(parse_day(date_str)))
 
 
 @csrf_exempt
 @require_GET
 def get_vehicle_entries(request):
-    """Get vehicle entries for a specific date with filters"""
+    """Get one page of vehicle entries for a specific date with filters"""
     try:
         date_str = request.GET.get("date", timezone.now().date().isoformat())
         number_plate_filter = request.GET.get("number_plate", "")
@@ -381,77 +363,27 @@ def get_vehicle_entries(request):
         )  # all, paid, unpaid, inside, exited
 
         try:
-            # Convert date string to timezone-aware datetime for proper filtering
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-            # Create timezone-aware datetime range for the entire day
-            start_datetime = timezone.make_aware(
-                datetime.combine(date_obj, datetime.min.time())
-            )
-            end_datetime = timezone.make_aware(
-                datetime.combine(date_obj, datetime.max.time())
-            )
-        except ValueError:
-            # Fallback to today if date parsing fails
-            today = timezone.now().date()
-            start_datetime = timezone.make_aware(
-                datetime.combine(today, datetime.min.time())
-            )
-            end_datetime = timezone.make_aware(
-                datetime.combine(today, datetime.max.time())
-            )
-
-        # Use timezone-aware datetime range instead of naive date
-        entries = VehicleEntry.objects.filter(
-            entry_time__gte=start_datetime, entry_time__lte=end_datetime
-        ).order_by("-entry_time")
-
-        if number_plate_filter:
-            entries = entries.filter(number_plate__icontains=number_plate_filter)
-
-        # Status filter
-        if status_filter == "paid":
-            entries = entries.filter(is_paid=True)
-        elif status_filter == "unpaid":
-            entries = entries.filter(is_paid=False, exit_time__isnull=False)
-        elif status_filter == "inside":
-            entries = entries.filter(exit_time__isnull=True)
-        elif status_filter == "exited":
-            entries = entries.filter(exit_time__isnull=False)
-
-        entries_data = []
-        for entry in entries:
-            # Ensure timezone-aware formatting
-            entry_time = (
-                timezone.localtime(entry.entry_time)
-                if timezone.is_naive(entry.entry_time)
-                else entry.entry_time
-            )
-            exit_time = (
-                timezone.localtime(entry.exit_time)
-                if entry.exit_time and timezone.is_naive(entry.exit_time)
-                else entry.exit_time
-            )
-
-            entries_data.append(
-                {
-                    "id": entry.id,
-                    "number_plate": entry.number_plate,
-                    "entry_time": entry_time.strftime("%H:%M"),
-                    "exit_time": exit_time.strftime("%H:%M") if exit_time else None,
-                    "total_amount": entry.total_amount or 0,
-                    "is_paid": entry.is_paid,
-                    "entry_image": entry.entry_image.url if entry.entry_image else None,
-                    "exit_image": entry.exit_image.url if entry.exit_image else None,
-                    "status": "inside"
-                    if not entry.exit_time
-                    else ("paid" if entry.is_paid else "unpaid"),
-                }
+            fields = parse_fields(request.GET.get("fields"))
+            entries_data, next_cursor = entries_page(
+                day_entries(parse_day(date_str), number_plate_filter, status_filter),
+                fields,
+                cursor=request.GET.get("cursor"),
+                limit=parse_limit(request.GET.get("limit")),
             )
+        except ValueError as e:
+            return json_response({"error": str(e)}, status=400)
 
-        return JsonResponse({"status": "ok", "entries": entries_data})
+        return json_response(
+            {
+                "status": "ok",
+                "entries": entries_data,
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None,
+            }
+        )
 
     except Exception as e:
-        return JsonResponse({"error": str(e)}, status=500)
+        return json_response({"error": str(e)}, status=500)
 
 
 @csrf_exempt
@@ -479,7 +411,8 @@ def add_car(request):
     """Add or update a car with boolean flags"""
     try:
         data = json.loads(request.body)
-        number_plate = data.get("number_plate")
+        # Import bilan bir xil ko'rinishda saqlanadi: '01 a 123 bc' -> '01A123BC'
+        number_plate = plate_key(data.get("number_plate") or "")
         car_type = data.get("car_type", "")  # "free", "special_taxi", "blocked", "normal"
         position = data.get("position", "")
         is_blocked = data.get("is_blocked", False)
@@ -539,7 +472,7 @@ def block_car(request):
     """Block a car by number plate"""
     try:
         data = json.loads(request.body)
-        number_plate = data.get("number_plate")
+        number_plate = plate_key(data.get("number_plate") or "")
 
         if not number_plate:
             return JsonResponse(
@@ -563,56 +496,11 @@ def get_unpaid_entries(request):
     """Get unpaid entries for receipt printing"""
     try:
         date_str = request.GET.get("date", timezone.now().date().isoformat())
-
-        try:
-            # Convert date string to timezone-aware datetime for proper filtering
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-            # Create timezone-aware datetime range for the entire day
-            start_datetime = timezone.make_aware(
-                datetime.combine(date_obj, datetime.min.time())
-            )
-            end_datetime = timezone.make_aware(
-                datetime.combine(date_obj, datetime.max.time())
-            )
-        except ValueError:
-            # Fallback to today if date parsing fails
-            today = timezone.now().date()
-            start_datetime = timezone.make_aware(
-                datetime.combine(today, datetime.min.time())
-            )
-            end_datetime = timezone.make_aware(
-                datetime.combine(today, datetime.max.time())
-            )
-
-        # Get unpaid entries that have exited using timezone-aware datetime range
-        unpaid_entries = VehicleEntry.objects.filter(
-            entry_time__gte=start_datetime,
-            entry_time__lte=end_datetime,
-            is_paid=False,
-            exit_time__isnull=False,
-        ).order_by("-exit_time")
-
-        entries_data = []
-        for entry in unpaid_entries:
-            # Ensure timezone-aware formatting
-            entry_time = entry.entry_time
-            exit_time = entry.exit_time
-
-            entries_data.append(
-                {
-                    "id": entry.id,
-                    "number_plate": entry.number_plate,
-                    "entry_time": entry_time.strftime("%H:%M"),
-                    "exit_time": exit_time.strftime("%H:%M"),
-                    "total_amount": entry.total_amount or 0,
-                    "duration_hours": (exit_time - entry_time).total_seconds() / 3600,
-                }
-            )
-
-        return JsonResponse({"status": "ok", "entries": entries_data})
+        entries_data = unpaid_entries(parse_day(date_str))
+        return json_response({"status": "ok", "entries": entries_data})
 
     except Exception as e:
-        return JsonResponse({"error": str(e)}, status=500)
+        return json_response({"error": str(e)}, status=500)
 
 
 class FreePlateNumberView(LoginRequiredMixin, View):
@@ -621,8 +509,12 @@ class FreePlateNumberView(LoginRequiredMixin, View):
         return render(request, "freeplatenumber.html", {"free_plates": free_plates})
 
     def post(self, request):
-        number_plate = request.POST.get("number_plate")
+        number_plate = plate_key(request.POST.get("number_plate") or "")
 
+        if not number_plate:
+            return JsonResponse(
+                {"success": False, "message": "Raqam kiritilmagan"}, status=400
+            )
         if Cars.objects.filter(number_plate=number_plate).exists():
             return JsonResponse(
                 {"success": False, "message": "Bu raqamli avtomobil allaqachon mavjud"},
@@ -652,35 +544,21 @@ def get_receipt(request):
     try:
         entry_id = request.GET.get("entry_id")
         if not entry_id:
-            return JsonResponse({"error": "Entry ID is required"}, status=400)
+            return json_response({"error": "Entry ID is required"}, status=400)
 
-        entry = VehicleEntry.objects.get(id=entry_id)
+        receipt_data = compile_serializer(RECEIPT_ROW).first(
+            VehicleEntry.objects.filter(id=entry_id)
+        )
+        if receipt_data is None:
+            return json_response({"error": "Entry not found"}, status=404)
 
-        if not entry.is_paid:
-            return JsonResponse({"error": "Entry is not paid"}, status=400)
-
-        # Ensure timezone-aware formatting
-        entry_time = entry.entry_time
-        exit_time = entry.exit_time
-
-        receipt_data = {
-            "id": entry.id,
-            "number_plate": entry.number_plate,
-            "entry_time": entry_time.strftime("%H:%M"),
-            "exit_time": exit_time.strftime("%H:%M") if exit_time else None,
-            "total_amount": entry.total_amount or 0,
-            "is_paid": entry.is_paid,
-            "duration_hours": (exit_time - entry_time).total_seconds() / 3600
-            if exit_time
-            else 0,
-        }
+        if not receipt_data["is_paid"]:
+            return json_response({"error": "Entry is not paid"}, status=400)
 
-        return JsonResponse({"status": "ok", "receipt": receipt_data})
+        return json_response({"status": "ok", "receipt": receipt_data})
 
-    except VehicleEntry.DoesNotExist:
-        return JsonResponse({"error": "Entry not found"}, status=404)
     except Exception as e:
-        return JsonResponse({"error": str(e)}, status=500)
+        return json_response({"error": str(e)}, status=500)
 
 
 class CarsManagementView(LoginRequiredMixin, View):
@@ -709,7 +587,8 @@ def create_car(request):
     """Create a new car"""
     try:
         data = json.loads(request.body)
-        number_plate = data.get("number_plate")
+        # Import bilan bir xil ko'rinishda saqlanadi: '01 a 123 bc' -> '01A123BC'
+        number_plate = plate_key(data.get("number_plate") or "")
         car_type = data.get("car_type", "")  # "free", "special_taxi", "blocked", "normal"
         position = data.get("position", "")
         is_blocked = data.get("is_blocked", False)
@@ -849,6 +728,152 @@ def upload_license(request):
         return JsonResponse({"success": False, "error": str(e)}, status=400)
 
 
+MAX_REPORTED_ERRORS = 100
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+@require_POST
+def import_cars_file(request):
+    """Bulk upsert cars from a CSV/XLSX upload (dry_run=1 only validates)"""
+    # Butun reyestrni qayta yozadi - faqat xodimlar uchun, CSRF tekshiruvi bilan
+    if not request.user.is_staff:
+        return JsonResponse({"success": False, "error": "Ruxsat yo'q"}, status=403)
+    if "file" not in request.FILES:
+        return JsonResponse({"success": False, "error": "Fayl yuklanmadi"}, status=400)
+    upload = request.FILES["file"]
+    try:
+        cars, errors = parse_cars(read_rows(upload, upload.name))
+    except (ImportFormatError, UnicodeDecodeError, csv.Error) as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
+
+    # Xatoli qator bo'lsa, skip_invalid=1 berilmaguncha hech narsa yozilmaydi
+    if errors and request.POST.get("skip_invalid") != "1":
+        return JsonResponse(
+            {
+                "success": False,
+                "error": f"{len(errors)} ta qatorda xato",
+                "errors": errors[:MAX_REPORTED_ERRORS],
+            },
+            status=400,
+        )
+    if request.POST.get("dry_run") == "1":
+        summary = {"valid": len(cars)}
+    else:
+        summary = import_cars(cars)
+    return JsonResponse(
+        {
+            "success": True,
+            **summary,
+            "skipped": len(errors),
+            "errors": errors[:MAX_REPORTED_ERRORS],
+        }
+    )
+
+
+@require_GET
+def export_cars_file(request):
+    """Download the Cars registry as CSV (default) or XLSX"""
+    # Import kabi faqat xodimlar uchun
+    if not request.user.is_staff:
+        return JsonResponse({"success": False, "error": "Ruxsat yo'q"}, status=403)
+    file_format = request.GET.get("format", "csv")
+    if file_format == "xlsx":
+        output = io.BytesIO()
+        try:
+            export_xlsx(output)
+        except ImportFormatError as e:
+            return JsonResponse({"success": False, "error": str(e)}, status=400)
+        response = HttpResponse(output.getvalue(), content_type=XLSX_CONTENT_TYPE)
+    elif file_format == "csv":
+        response = HttpResponse(content_type="text/csv; charset=utf-8")
+        export_csv(response)
+    else:
+        return JsonResponse(
+            {"success": False, "error": "format must be csv or xlsx"}, status=400
+        )
+    response["Content-Disposition"] = f'attachment; filename="cars.{file_format}"'
+    return response
+
+
 class UnpaidEntriesView(LoginRequiredMixin, View):
     def get(self, request):
             return render(request, "unpaid_entries.html")
+
+
+@require_GET
+def metrics(request):
+    """Prometheus scrape endpoint; reports only the worker that serves it"""
+    if METRICS_TOKEN and not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {METRICS_TOKEN}"
+    ):
+        return JsonResponse({"error": "Unauthorized"}, status=401)
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@require_GET
+def archived_image(request, name):
+    """Camera photo packed into a daily archive by manage.py apply_retention"""
+    data = read_archived(f"{ARCHIVE_DIR}/{name}")
+    if data is None:
+        return JsonResponse({"error": "Rasm topilmadi"}, status=404)
+    response = HttpResponse(
+        data, content_type=mimetypes.guess_type(name)[0] or "application/octet-stream"
+    )
+    # Arxivdagi rasm o'zgarmaydi
+    response["Cache-Control"] = "max-age=31536000, immutable"
+    return response
+
+
+@require_GET
+def export_report(request, report):
+    """Stream the entries/unpaid/revenue report for ?start=&end= (inclusive days)"""
+    file_format = request.GET.get("format", "csv")
+    try:
+        report = get_report(report, file_format)
+        first, last = parse_range(request.GET.get("start"), request.GET.get("end"))
+    except ReportError as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
+
+    chunks = report_chunks(report, first, last, file_format)
+    if isinstance(request, ASGIRequest):
+        chunks = aiter_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=FORMATS[file_format][0])
+    response["Content-Disposition"] = (
+        f'attachment; filename="{filename(report, first, last, file_format)}"'
+    )
+    return response
+
+
+@require_GET
+def analytics_hourly(request):
+    """Hourly entries, exits, revenue and average occupancy by car class"""
+    try:
+        first, last = parse_range(request.GET.get("start"), request.GET.get("end"))
+        return json_response({"status": "ok", "hours": hourly(first, last)})
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
+
+
+@require_GET
+def analytics_summary(request):
+    """The same counters per ?period=day|week|month"""
+    try:
+        first, last = parse_range(request.GET.get("start"), request.GET.get("end"))
+        period = request.GET.get("period", "day")
+        return json_response(
+            {"status": "ok", "period": period, "rows": summary(first, last, period)}
+        )
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
+
+
+@require_GET
+def analytics_peak_hours(request):
+    """Average load for each hour of the day over the range"""
+    try:
+        first, last = parse_range(request.GET.get("start"), request.GET.get("end"))
+        return json_response({"status": "ok", **peak_hours(first, last)})
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)